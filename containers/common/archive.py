@@ -0,0 +1,343 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Streaming fetch-and-extract of zip bundles (seed images, replay sequences).
+
+The archive is spooled to disk chunk by chunk, hashed on the fly and, as long
+as its entries can be read from their local headers, extracted while it is
+still downloading. Entries land in a staging directory that is moved into
+place only once the checksum is verified. Bundles can also come from a local
+path or from an offline mirror (PYRO_ASSETS_MIRROR), so that the stack can be
+built without network access.
+"""
+
+from typing import Callable, Iterable, Iterator, Optional
+import hashlib
+import logging
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+import zlib
+from urllib.parse import urlsplit
+
+from http_client import get_session
+
+__all__ = ["ArchiveError", "fetch_and_extract", "resolve_source"]
+
+CHUNK_SIZE = 1024 * 1024
+MIRROR = os.environ.get("PYRO_ASSETS_MIRROR")
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_LOCAL_HEADER_SIG = 0x04034B50
+_DESCRIPTOR_SIG = 0x08074B50
+_ZIP64_LIMIT = 0xFFFFFFFF
+_FLAG_ENCRYPTED = 0x1
+_FLAG_DESCRIPTOR = 0x8
+
+
+class ArchiveError(ValueError):
+    """Raised when an archive fails its checksum or holds unsafe entries."""
+
+
+class _Unstreamable(Exception):
+    """The archive needs its central directory, extract it once spooled."""
+
+
+class _TeeReader:
+    """Reads a chunk iterator while spooling and hashing everything read."""
+
+    def __init__(self, chunks: Iterable[bytes], spool, digest) -> None:
+        self._chunks: Iterator[bytes] = iter(chunks)
+        self._spool = spool
+        self._digest = digest
+        self._buffer = bytearray()
+
+    def _pull(self) -> bool:
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        self._spool.write(chunk)
+        self._digest.update(chunk)
+        self._buffer += chunk
+        return True
+
+    def read(self, size: int) -> bytes:
+        """Read exactly size bytes, fewer only at the end of the stream."""
+        while len(self._buffer) < size and self._pull():
+            pass
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def read_some(self, size: int) -> bytes:
+        """Read at most size bytes, as soon as some are available."""
+        if not self._buffer:
+            self._pull()
+        return self.read(min(size, len(self._buffer)))
+
+    def unread(self, data: bytes) -> None:
+        self._buffer[:0] = data
+
+    def drain(self) -> None:
+        """Spool the rest of the stream."""
+        while self._pull():
+            self._buffer.clear()
+        self._buffer.clear()
+
+
+def _safe_path(root: str, name: str) -> str:
+    path = os.path.normpath(os.path.join(root, name))
+    if os.path.isabs(name) or os.path.commonpath([root, path]) != root:
+        raise ArchiveError(f"unsafe archive entry: {name}")
+    return path
+
+
+def _stream_extract(reader: _TeeReader, root: str) -> int:
+    """
+    Extract zip entries from their local headers, in stream order.
+
+    Returns:
+        Number of extracted entries
+
+    Raises:
+        _Unstreamable: if an entry cannot be read without the central directory
+    """
+    n_entries = 0
+    while True:
+        header = reader.read(_LOCAL_HEADER.size)
+        if len(header) < 4 or struct.unpack("<I", header[:4])[0] != _LOCAL_HEADER_SIG:
+            # Central directory reached: every entry was read
+            return n_entries
+        if len(header) < _LOCAL_HEADER.size:
+            raise _Unstreamable("truncated local header")
+        fields = _LOCAL_HEADER.unpack(header)
+        flags, method, crc, csize = fields[2], fields[3], fields[6], fields[7]
+        name_len, extra_len = fields[9], fields[10]
+        name = reader.read(name_len).decode("utf-8" if flags & 0x800 else "cp437")
+        reader.read(extra_len)
+        has_descriptor = bool(flags & _FLAG_DESCRIPTOR)
+        if (
+            flags & _FLAG_ENCRYPTED
+            or method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+            or csize == _ZIP64_LIMIT
+            or (method == zipfile.ZIP_STORED and has_descriptor)
+        ):
+            raise _Unstreamable(f"{name}: sizes or method not streamable")
+
+        path = _safe_path(root, name)
+        if name.endswith("/"):
+            os.makedirs(path, exist_ok=True)
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        running_crc = 0
+        with open(path, "wb") as file:
+            if method == zipfile.ZIP_STORED:
+                remaining = csize
+                while remaining:
+                    data = reader.read_some(min(remaining, CHUNK_SIZE))
+                    if not data:
+                        raise _Unstreamable(f"{name}: truncated")
+                    running_crc = zlib.crc32(data, running_crc)
+                    file.write(data)
+                    remaining -= len(data)
+            else:
+                # Deflate streams know where they end, even without sizes
+                inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+                while not inflater.eof:
+                    data = reader.read_some(CHUNK_SIZE)
+                    if not data:
+                        raise _Unstreamable(f"{name}: truncated")
+                    out = inflater.decompress(data)
+                    running_crc = zlib.crc32(out, running_crc)
+                    file.write(out)
+                reader.unread(inflater.unused_data)
+        if has_descriptor:
+            descriptor = reader.read(16)
+            if struct.unpack("<I", descriptor[:4])[0] == _DESCRIPTOR_SIG:
+                crc = struct.unpack("<I", descriptor[4:8])[0]
+            else:
+                crc = struct.unpack("<I", descriptor[:4])[0]
+                reader.unread(descriptor[12:])
+        if running_crc != crc:
+            raise _Unstreamable(f"{name}: CRC mismatch")
+        n_entries += 1
+
+
+def resolve_source(url: str, mirror: Optional[str] = None) -> str:
+    """
+    Find where a bundle should be read from.
+
+    A local path (or file:// URL) is used as is. Otherwise, if a mirror is
+    set, the bundle is looked up there by file name, either as the zip itself
+    or as a directory named after it (without .zip) holding its content. A
+    mirror can also be a base URL.
+
+    Args:
+        url: Bundle URL or local path
+        mirror: Mirror directory or base URL, defaults to PYRO_ASSETS_MIRROR
+
+    Returns:
+        Local path or URL to fetch
+    """
+    if url.startswith("file://"):
+        return urlsplit(url).path
+    if os.path.exists(url):
+        return url
+    mirror = mirror or MIRROR
+    if not mirror:
+        return url
+    name = os.path.basename(urlsplit(url).path)
+    if mirror.startswith(("http://", "https://")):
+        return f"{mirror.rstrip('/')}/{name}"
+    for candidate in (
+        os.path.join(mirror, name),
+        os.path.join(mirror, os.path.splitext(name)[0]),
+    ):
+        if os.path.exists(candidate):
+            return candidate
+    logging.warning(f"{name} not found in mirror {mirror}, fetching {url}")
+    return url
+
+
+def _hash_file(path: str, digest) -> None:
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+
+def _spool_complete(spool_path: str, sha256: Optional[str]) -> bool:
+    """Whether a spool left by an earlier run already holds the whole archive."""
+    if sha256:
+        digest = hashlib.sha256()
+        _hash_file(spool_path, digest)
+        return digest.hexdigest() == sha256.lower()
+    # Without a checksum, a complete zip at least ends with its central directory
+    return zipfile.is_zipfile(spool_path)
+
+
+def _spool(
+    url: str,
+    spool_path: str,
+    extract: Callable[[_TeeReader], int],
+    digest,
+    sha256: Optional[str] = None,
+):
+    """Download url into spool_path, resuming it, and extract while reading."""
+    offset = os.path.getsize(spool_path) if os.path.isfile(spool_path) else 0
+    if offset and _spool_complete(spool_path, sha256):
+        # e.g. the previous run stopped while extracting
+        logging.info(f"{spool_path} is already complete, skipping the download")
+        _hash_file(spool_path, digest)
+        return False
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    with get_session().get(url, headers=headers, stream=True) as response:
+        if response.status_code == 416:
+            # Nothing past offset, yet the spool is not a valid archive: it is
+            # stale (the remote file changed), start over
+            logging.info(f"Discarding {spool_path}, it does not match {url}")
+            os.remove(spool_path)
+            return _spool(url, spool_path, extract, digest, sha256)
+        response.raise_for_status()
+        resumed = response.status_code == 206
+        if resumed:
+            logging.info(f"Resuming download of {url} at {offset} bytes")
+            _hash_file(spool_path, digest)
+        with open(spool_path, "ab" if resumed else "wb") as spool:
+            reader = _TeeReader(response.iter_content(CHUNK_SIZE), spool, digest)
+            if resumed:
+                # The beginning of the archive is only on disk
+                reader.drain()
+                return False
+            try:
+                n_entries = extract(reader)
+            except _Unstreamable as e:
+                logging.info(f"Streaming extraction stopped ({e}), extracting after")
+                reader.drain()
+                return False
+            reader.drain()
+            return n_entries > 0
+
+
+def fetch_and_extract(
+    url: str,
+    extract_dir: str,
+    sha256: Optional[str] = None,
+    mirror: Optional[str] = None,
+) -> str:
+    """
+    Fetch a zip bundle and extract it into extract_dir.
+
+    Top-level entries of the archive replace the existing ones in extract_dir
+    only once the whole archive was read and its checksum verified.
+
+    Args:
+        url: Bundle URL, local zip or local directory
+        extract_dir: Directory receiving the archive content
+        sha256: Expected SHA-256 of the zip, not checked if None
+        mirror: Mirror directory or base URL, defaults to PYRO_ASSETS_MIRROR
+
+    Returns:
+        SHA-256 of the zip ("" for a directory source)
+
+    Raises:
+        ArchiveError: if the checksum does not match or an entry is unsafe
+    """
+    source = resolve_source(url, mirror)
+    os.makedirs(extract_dir, exist_ok=True)
+    extract_dir = os.path.abspath(extract_dir)
+    staging = tempfile.mkdtemp(dir=extract_dir, prefix=".staging-")
+    digest = hashlib.sha256()
+    spool_path = None
+    try:
+        if os.path.isdir(source):
+            logging.info(f"Copying {source} into {extract_dir}")
+            shutil.copytree(source, staging, dirs_exist_ok=True)
+        else:
+            if os.path.isfile(source):
+                zip_path = source
+                _hash_file(zip_path, digest)
+                streamed = False
+            else:
+                name = os.path.basename(urlsplit(source).path) or "archive.zip"
+                spool_path = zip_path = os.path.join(extract_dir, f".{name}.part")
+                streamed = _spool(
+                    source,
+                    spool_path,
+                    lambda r: _stream_extract(r, staging),
+                    digest,
+                    sha256,
+                )
+            if sha256 and digest.hexdigest() != sha256.lower():
+                if spool_path:
+                    os.remove(spool_path)
+                raise ArchiveError(
+                    f"{url}: sha256 is {digest.hexdigest()}, expected {sha256}"
+                )
+            if not streamed:
+                shutil.rmtree(staging)
+                os.makedirs(staging)
+                with zipfile.ZipFile(zip_path) as archive:
+                    for member in archive.namelist():
+                        _safe_path(staging, member)
+                    archive.extractall(staging)
+
+        for entry in os.listdir(staging):
+            target = os.path.join(extract_dir, entry)
+            if os.path.isdir(target) and not os.path.islink(target):
+                shutil.rmtree(target)
+            elif os.path.lexists(target):
+                os.remove(target)
+            os.replace(os.path.join(staging, entry), target)
+        if spool_path:
+            os.remove(spool_path)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    logging.info(f"{url} extracted into {extract_dir}")
+    return digest.hexdigest() if not os.path.isdir(source) else ""
@@ -0,0 +1,191 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Shared HTTP client for the init script and the notebooks.
+Provides a keep-alive connection pool with per-host sizing, default timeouts,
+retries with exponential backoff and error reporting through exceptions.
+"""
+
+from typing import Any, Dict, Optional, Tuple, Union
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+__all__ = [
+    "APIError",
+    "api_request",
+    "configure_host",
+    "create_session",
+    "get_session",
+]
+
+DEFAULT_TIMEOUT: Tuple[float, float] = (5.0, 30.0)  # (connect, read) seconds
+DEFAULT_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 16))
+DEFAULT_RETRIES = int(os.environ.get("HTTP_RETRIES", 3))
+DEFAULT_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", 0.5))
+RETRY_STATUSES = (500, 502, 503, 504)
+# Replayed after a read timeout or a 5xx: PATCH only sets fields on this API.
+# POST is only retried on connection errors, when the request was not sent:
+# poses, detections and camera tokens have no natural key, a replayed create
+# would add a second row.
+RETRY_METHODS = Retry.DEFAULT_ALLOWED_METHODS | {"PATCH"}
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class APIError(RuntimeError):
+    """Raised when the API answers with a non-2xx status code."""
+
+    def __init__(self, method: str, url: str, status_code: int, detail: Any) -> None:
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.detail = detail
+        super().__init__(f"{method.upper()} {url} -> {status_code}: {detail}")
+
+
+class _TimeoutSession(requests.Session):
+    """Session applying a default timeout to every request."""
+
+    def __init__(self, timeout: Timeout = DEFAULT_TIMEOUT) -> None:
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.default_timeout)
+        return super().request(method, url, **kwargs)
+
+
+def _build_adapter(pool_maxsize: int, retries: int, backoff_factor: float):
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=RETRY_METHODS,
+        raise_on_status=False,
+    )
+    return HTTPAdapter(
+        pool_connections=pool_maxsize,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+
+
+def create_session(
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    retries: int = DEFAULT_RETRIES,
+    backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+    timeout: Timeout = DEFAULT_TIMEOUT,
+) -> requests.Session:
+    """
+    Create a pooled, retrying session.
+
+    Args:
+        pool_maxsize: Number of keep-alive connections kept per host
+        retries: Retries on connection errors, and on read errors and 5xx
+            responses for the RETRY_METHODS
+        backoff_factor: Exponential backoff factor between retries (seconds)
+        timeout: Default (connect, read) timeout applied to every request
+
+    Returns:
+        Configured requests session
+    """
+    session = _TimeoutSession(timeout)
+    adapter = _build_adapter(pool_maxsize, retries, backoff_factor)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def configure_host(
+    base_url: str,
+    pool_maxsize: int,
+    retries: int = DEFAULT_RETRIES,
+    backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+    session: Optional[requests.Session] = None,
+) -> None:
+    """
+    Size the connection pool used for one host.
+
+    Useful to give the API more connections than occasional downloads, e.g.
+    to match the number of seeding workers.
+
+    Args:
+        base_url: Any URL on the host (scheme, host and port are used)
+        pool_maxsize: Number of keep-alive connections kept for this host
+        retries: Retries on connection errors, and on read errors and 5xx
+            responses for the RETRY_METHODS
+        backoff_factor: Exponential backoff factor between retries (seconds)
+        session: Session to configure, defaults to the shared session
+    """
+    parts = urlsplit(base_url)
+    session = session or get_session()
+    session.mount(
+        f"{parts.scheme}://{parts.netloc}/",
+        _build_adapter(pool_maxsize, retries, backoff_factor),
+    )
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide shared session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def api_request(
+    method_type: str,
+    route: str,
+    headers: Optional[Dict[str, str]] = None,
+    payload: Optional[Dict[str, Any]] = None,
+    session: Optional[requests.Session] = None,
+    **kwargs: Any,
+) -> Any:
+    """
+    Make an API request through the shared session.
+
+    Args:
+        method_type: HTTP method (get, post, patch, delete)
+        route: Full API route URL
+        headers: Request headers including authorization
+        payload: Optional JSON payload
+        session: Session to use, defaults to the shared session
+        kwargs: Extra arguments forwarded to requests (data, files, timeout...)
+
+    Returns:
+        JSON response data, or None for an empty body
+
+    Raises:
+        APIError: if the response status code is not 2xx
+    """
+    session = session or get_session()
+    if isinstance(payload, dict):
+        kwargs["json"] = payload
+    response = session.request(method_type.upper(), route, headers=headers, **kwargs)
+    if response.status_code // 100 != 2:
+        try:
+            detail = response.json().get("detail", response.text)
+        except (ValueError, AttributeError):
+            detail = response.text
+        raise APIError(method_type, route, response.status_code, detail)
+    if not response.content:
+        return None
+    return response.json()
@@ -0,0 +1,197 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Cache of JPEG payloads for the upload paths of the init script and notebooks.
+Images are decoded and re-encoded once per (content, quality, max size); the
+encoded bytes are kept in memory with LRU eviction and persisted on disk so
+that later runs skip PIL entirely.
+"""
+
+from typing import Dict, Optional, Tuple
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+__all__ = ["ImageCache", "encode_image", "get_image_cache"]
+
+DATA_DIR = os.environ.get("PYRO_DATA_DIR", "data")
+DEFAULT_CACHE_DIR = os.path.join(DATA_DIR, "image_cache")
+DEFAULT_QUALITY = 80
+DEFAULT_MAX_BYTES = int(os.environ.get("IMAGE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+JPEG_MAGIC = b"\xff\xd8\xff"
+
+
+class ImageCache:
+    """
+    Content-addressed cache of encoded JPEG payloads.
+
+    Args:
+        quality: JPEG quality used when re-encoding
+        max_size: Optional bound on the largest side, in pixels
+        max_bytes: Memory budget of the LRU, in bytes
+        cache_dir: Directory persisting encoded payloads, None to disable
+        passthrough_jpeg: Send files that already are JPEG (and fit max_size)
+            unchanged instead of re-encoding them
+    """
+
+    def __init__(
+        self,
+        quality: int = DEFAULT_QUALITY,
+        max_size: Optional[int] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+        passthrough_jpeg: bool = False,
+    ) -> None:
+        self.quality = quality
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.passthrough_jpeg = passthrough_jpeg
+        self._lru: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        # (path, mtime_ns, size) -> content digest, so unchanged files are not
+        # hashed again
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def _digest(self, path: str) -> Tuple[str, Optional[bytes]]:
+        stat = os.stat(path)
+        stat_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        digest = self._digests.get(stat_key)
+        if digest is not None:
+            return digest, None
+        with open(path, "rb") as file:
+            raw = file.read()
+        digest = hashlib.sha1(raw).hexdigest()
+        self._digests[stat_key] = digest
+        return digest, raw
+
+    def _key(self, digest: str) -> str:
+        mode = f"q{self.quality}" + ("-raw" if self.passthrough_jpeg else "")
+        return f"{digest}-{mode}-{self.max_size or 'full'}"
+
+    def _remember(self, key: str, payload: bytes) -> None:
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                return
+            self._lru[key] = payload
+            self._size += len(payload)
+            while self._size > self.max_bytes and len(self._lru) > 1:
+                _, evicted = self._lru.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _load_disk(self, key: str) -> Optional[bytes]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.jpg"), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def _store_disk(self, key: str, payload: bytes) -> None:
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            file.write(payload)
+        os.replace(tmp_path, os.path.join(self.cache_dir, f"{key}.jpg"))
+
+    def _encode(self, path: str, raw: Optional[bytes]) -> bytes:
+        if raw is None:
+            with open(path, "rb") as file:
+                raw = file.read()
+        is_jpeg = raw.startswith(JPEG_MAGIC)
+        if self.passthrough_jpeg and is_jpeg and self.max_size is None:
+            return raw
+        im = Image.open(io.BytesIO(raw))
+        fits = self.max_size is None or max(im.size) <= self.max_size
+        if self.passthrough_jpeg and is_jpeg and fits:
+            return raw
+        if not fits:
+            im.thumbnail((self.max_size, self.max_size))
+        if im.mode not in ("RGB", "L"):
+            im = im.convert("RGB")
+        stream = io.BytesIO()
+        im.save(stream, format="JPEG", quality=self.quality)
+        return stream.getvalue()
+
+    def get(self, path: str) -> bytes:
+        """
+        Return the encoded payload of an image file.
+
+        Args:
+            path: Image file path
+
+        Returns:
+            JPEG bytes ready to upload
+        """
+        digest, raw = self._digest(path)
+        key = self._key(digest)
+        with self._lock:
+            payload = self._lru.get(key)
+            if payload is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return payload
+        payload = self._load_disk(key)
+        if payload is None:
+            self.misses += 1
+            payload = self._encode(path, raw)
+            self._store_disk(key, payload)
+        else:
+            self.hits += 1
+        self._remember(key, payload)
+        return payload
+
+
+_caches: Dict[Tuple[int, Optional[int], bool], ImageCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_image_cache(
+    quality: int = DEFAULT_QUALITY,
+    max_size: Optional[int] = None,
+    passthrough_jpeg: bool = False,
+) -> ImageCache:
+    """Return the process-wide cache for a set of encoding parameters."""
+    key = (quality, max_size, passthrough_jpeg)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = ImageCache(
+                quality=quality, max_size=max_size, passthrough_jpeg=passthrough_jpeg
+            )
+        return _caches[key]
+
+
+def encode_image(
+    path: str,
+    quality: int = DEFAULT_QUALITY,
+    max_size: Optional[int] = None,
+    passthrough_jpeg: bool = False,
+) -> bytes:
+    """
+    Encode an image file as JPEG, going through the shared cache.
+
+    Args:
+        path: Image file path
+        quality: JPEG quality
+        max_size: Optional bound on the largest side, in pixels
+        passthrough_jpeg: Send JPEG files unchanged instead of re-encoding them
+
+    Returns:
+        JPEG bytes ready to upload
+    """
+    return get_image_cache(quality, max_size, passthrough_jpeg).get(path)
@@ -0,0 +1,318 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Request-level timing of every outgoing HTTP call.
+
+Once enabled, requests.Session.send is wrapped so that every request (ours,
+pyroclient's, presigned S3 uploads...) gets recorded with its endpoint
+template, method, status, bytes sent and latency. Calls are aggregated per
+endpoint into latency histograms, and reported as a summary table and a JSON
+or CSV file at the end of a run.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import bisect
+import csv
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+
+__all__ = [
+    "Recorder",
+    "disable",
+    "enable",
+    "endpoint_template",
+    "instrument",
+    "percentile",
+]
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+_ID_SEGMENT = re.compile(
+    r"^(\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{24,})$",
+    re.IGNORECASE,
+)
+
+
+def endpoint_template(url: str) -> str:
+    """
+    Turn a URL into an endpoint template, e.g. "api:5050/api/v1/cameras/{id}".
+
+    IDs (integers, UUIDs, long hex digests) become {id} and file names
+    (anything with an extension, e.g. S3 keys) become {file}; the query string
+    is dropped.
+    """
+    parts = urlsplit(url)
+    segments = []
+    for segment in parts.path.split("/"):
+        if _ID_SEGMENT.match(segment):
+            segment = "{id}"
+        elif "." in segment:
+            segment = "{file}"
+        segments.append(segment)
+    return f"{parts.netloc}{'/'.join(segments)}"
+
+
+def _body_size(body: Any) -> int:
+    if isinstance(body, (bytes, bytearray, str)):
+        return len(body)
+    return 0  # streamed bodies are not measured
+
+
+class _Endpoint:
+    """Aggregated calls of one (method, endpoint) pair."""
+
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.histogram = [0] * len(BUCKETS_MS)
+        self.statuses: Dict[str, int] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def add(self, status: str, latency_ms: float, sent: int, received: int) -> None:
+        self.latencies.append(latency_ms)
+        self.histogram[bisect.bisect_left(BUCKETS_MS, latency_ms)] += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.bytes_sent += sent
+        self.bytes_received += received
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile, shared by every latency report of the repo.
+
+    Args:
+        ordered: Values sorted in increasing order, at least one
+        q: Percentile, from 0 to 100
+
+    Returns:
+        Smallest value such that at least q% of the values are lower or equal
+    """
+    index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Recorder:
+    """Thread-safe aggregation of the recorded calls."""
+
+    def __init__(self) -> None:
+        self._endpoints: Dict[Tuple[str, str], _Endpoint] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def record(
+        self,
+        method: str,
+        url: str,
+        status: str,
+        latency_ms: float,
+        bytes_sent: int = 0,
+        bytes_received: int = 0,
+    ) -> None:
+        """Record one call."""
+        key = (method.upper(), endpoint_template(url))
+        with self._lock:
+            endpoint = self._endpoints.setdefault(key, _Endpoint())
+            endpoint.add(status, latency_ms, bytes_sent, bytes_received)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints = {}
+            self.started_at = time.time()
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Aggregate the calls per endpoint, slowest total time first.
+
+        Returns:
+            One dictionary per (method, endpoint) with the call count, status
+            counts, bytes, latency percentiles and histogram
+        """
+        rows = []
+        with self._lock:
+            endpoints = list(self._endpoints.items())
+        for (method, template), endpoint in endpoints:
+            ordered = sorted(endpoint.latencies)
+            rows.append(
+                {
+                    "method": method,
+                    "endpoint": template,
+                    "calls": len(ordered),
+                    "statuses": dict(endpoint.statuses),
+                    "bytes_sent": endpoint.bytes_sent,
+                    "bytes_received": endpoint.bytes_received,
+                    "total_ms": round(sum(ordered), 3),
+                    "mean_ms": round(sum(ordered) / len(ordered), 3),
+                    "p50_ms": round(percentile(ordered, 50), 3),
+                    "p95_ms": round(percentile(ordered, 95), 3),
+                    "p99_ms": round(percentile(ordered, 99), 3),
+                    "max_ms": round(ordered[-1], 3),
+                    "histogram": {
+                        f"<={bound}": count
+                        for bound, count in zip(BUCKETS_MS, endpoint.histogram)
+                    },
+                }
+            )
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def format_table(self) -> str:
+        """Render the summary as a fixed-width table."""
+        header = (
+            f"{'method':<7}{'endpoint':<50}{'calls':>7}{'errors':>7}"
+            f"{'MB sent':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'total s':>9}"
+        )
+        lines = [header, "-" * len(header)]
+        for row in self.summary():
+            errors = sum(
+                count
+                for status, count in row["statuses"].items()
+                if not status.startswith(("2", "3"))
+            )
+            lines.append(
+                f"{row['method']:<7}{row['endpoint'][-49:]:<50}{row['calls']:>7}"
+                f"{errors:>7}{row['bytes_sent'] / 1e6:>9.2f}{row['p50_ms']:>9.1f}"
+                f"{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+                f"{row['total_ms'] / 1000:>9.2f}"
+            )
+        return "\n".join(lines)
+
+    def write_report(self, path: str) -> None:
+        """
+        Write the summary to a file, as CSV if path ends with .csv, else JSON.
+
+        Args:
+            path: Report file path
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        rows = self.summary()
+        if path.endswith(".csv"):
+            columns = [key for key in rows[0] if key != "histogram"] if rows else []
+            with open(path, "w", newline="") as file:
+                writer = csv.DictWriter(file, fieldnames=columns, extrasaction="ignore")
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow({**row, "statuses": json.dumps(row["statuses"])})
+        else:
+            with open(path, "w") as file:
+                json.dump(
+                    {
+                        "started_at": self.started_at,
+                        "duration_s": round(time.time() - self.started_at, 3),
+                        "endpoints": rows,
+                    },
+                    file,
+                    indent=4,
+                )
+        logging.info(f"Request report written to {path}")
+
+
+# Active recorders, innermost last: nested blocks are recorded by every
+# recorder enabled around them
+_recorders: Tuple[Recorder, ...] = ()
+_recorders_lock = threading.Lock()
+_original_send = requests.Session.send
+
+
+def _instrumented_send(self, request, **kwargs):
+    recorders = _recorders
+    if not recorders:
+        return _original_send(self, request, **kwargs)
+    start = time.perf_counter()
+    try:
+        response = _original_send(self, request, **kwargs)
+    except Exception as e:
+        for recorder in recorders:
+            recorder.record(
+                request.method,
+                request.url,
+                type(e).__name__,
+                (time.perf_counter() - start) * 1000,
+                _body_size(request.body),
+            )
+        raise
+    latency_ms = (time.perf_counter() - start) * 1000
+    for recorder in recorders:
+        recorder.record(
+            request.method,
+            request.url,
+            str(response.status_code),
+            latency_ms,
+            _body_size(request.body),
+            # Streamed bodies are not read here, rely on the announced length
+            int(response.headers.get("Content-Length") or 0),
+        )
+    return response
+
+
+def enable(recorder: Optional[Recorder] = None) -> Recorder:
+    """
+    Start recording every request sent through requests.
+
+    Args:
+        recorder: Recorder to feed on top of the active ones, defaults to the
+            innermost active one or a new one
+
+    Returns:
+        Enabled recorder
+    """
+    global _recorders
+    with _recorders_lock:
+        if recorder is None and _recorders:
+            return _recorders[-1]
+        recorder = recorder or Recorder()
+        if recorder not in _recorders:
+            _recorders = _recorders + (recorder,)
+        requests.Session.send = _instrumented_send
+    return recorder
+
+
+def disable(recorder: Optional[Recorder] = None) -> None:
+    """
+    Stop feeding a recorder, the ones enabled before it keep recording.
+
+    Args:
+        recorder: Recorder to stop, defaults to the innermost active one
+    """
+    global _recorders
+    with _recorders_lock:
+        if recorder is None:
+            _recorders = _recorders[:-1]
+        else:
+            _recorders = tuple(r for r in _recorders if r is not recorder)
+        if not _recorders:
+            requests.Session.send = _original_send
+
+
+@contextmanager
+def instrument(report_path: Optional[str] = None, log=logging.info):
+    """
+    Record the requests of a block, then log the table and write the report.
+
+    Blocks can be nested: the requests of an inner block are recorded by the
+    outer recorders as well, which keep recording after it.
+
+    Args:
+        report_path: JSON or CSV report path, no report file if None
+        log: Function receiving the summary table
+    """
+    recorder = enable(Recorder())
+    try:
+        yield recorder
+    finally:
+        disable(recorder)
+        log("Request timings:\n" + recorder.format_table())
+        if report_path:
+            recorder.write_report(report_path)
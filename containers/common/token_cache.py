@@ -0,0 +1,292 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Camera token cache shared by the init script and the notebooks.
+Tokens are persisted in a cache file keyed on API URL then camera ID, since
+camera IDs of two stacks are unrelated, and, for the API of the stack only, in
+the credentials files read by the engine and the ETL (matched on camera name).
+A token is reused until its JWT expiry gets close, then minted again lazily; a
+token without expiry is reused for no_expiry_ttl seconds after it was stored.
+"""
+
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+import base64
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+__all__ = ["CameraTokenCache", "is_stack_api", "jwt_expiry"]
+
+DATA_DIR = os.environ.get("PYRO_DATA_DIR", "data")
+DEFAULT_CREDENTIALS_PATHS = (
+    os.path.join(DATA_DIR, "credentials.json"),
+    os.path.join(DATA_DIR, "credentials-wildfire.json"),
+)
+DEFAULT_CACHE_PATH = os.path.join(DATA_DIR, "camera_tokens.json")
+# URLs the API of the stack is reached at (comma separated), the credentials
+# files only hold tokens of that API
+STACK_API_URLS = os.environ.get("PYRO_STACK_API_URLS", os.environ.get("API_URL", ""))
+DEFAULT_REFRESH_MARGIN = 300  # seconds before expiry when a token gets replaced
+DEFAULT_NO_EXPIRY_TTL = 24 * 3600  # seconds a token without exp claim is reused
+
+
+def jwt_expiry(token: str) -> Optional[float]:
+    """
+    Read the expiry of a JWT without verifying its signature.
+
+    Args:
+        token: Encoded JWT
+
+    Returns:
+        Expiry as a UNIX timestamp, or None if the token has no exp claim
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+    except (IndexError, ValueError, AttributeError):
+        return None
+    return float(exp) if exp is not None else None
+
+
+@contextmanager
+def _locked(path: str, exclusive: bool):
+    # Sidecar lock file: the data files themselves are replaced atomically
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read(path: str) -> Dict:
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _api_key(api_url: str) -> str:
+    # Same key with or without the /api/v1 prefix
+    api_url = api_url.rstrip("/")
+    return api_url[: -len("/api/v1")] if api_url.endswith("/api/v1") else api_url
+
+
+def is_stack_api(api_url: str) -> bool:
+    """Tell whether an API URL is one of STACK_API_URLS."""
+    stack_keys = {_api_key(url.strip()) for url in STACK_API_URLS.split(",")}
+    return _api_key(api_url) in stack_keys - {""}
+
+
+def _write_atomic(path: str, data: Dict) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    with os.fdopen(fd, "w") as file:
+        json.dump(data, file, indent=4)
+    # mkstemp creates 0600 files, keep the data readable from the host
+    mode = os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644
+    os.chmod(tmp_path, mode)
+    os.replace(tmp_path, path)
+
+
+class CameraTokenCache:
+    """
+    Camera token cache backed by the credentials files.
+
+    Args:
+        mint: Callable minting a fresh token for a camera ID
+        api_url: URL of the API the tokens are minted by, with or without /api/v1
+        credentials_paths: Credentials files read and updated by camera name,
+            by default those of the data directory if api_url is the API of
+            the stack (is_stack_api), none otherwise
+        cache_path: File keeping every token by API URL and camera ID
+        refresh_margin: Seconds before expiry when a token gets minted again
+        no_expiry_ttl: Seconds a token without expiry is reused after it was
+            stored
+    """
+
+    def __init__(
+        self,
+        mint: Callable[[int], str],
+        api_url: str,
+        credentials_paths: Optional[Sequence[str]] = None,
+        cache_path: str = DEFAULT_CACHE_PATH,
+        refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+        no_expiry_ttl: float = DEFAULT_NO_EXPIRY_TTL,
+    ) -> None:
+        self.mint = mint
+        self.api_key = _api_key(api_url)
+        if credentials_paths is None:
+            credentials_paths = (
+                DEFAULT_CREDENTIALS_PATHS if is_stack_api(api_url) else ()
+            )
+        self.credentials_paths = tuple(credentials_paths)
+        self.cache_path = cache_path
+        self.refresh_margin = refresh_margin
+        self.no_expiry_ttl = no_expiry_ttl
+        self._tokens: Dict[int, str] = {}
+        self._names: Dict[int, str] = {}
+        # When tokens were stored, the lifetime of those without exp claim
+        self._stored_at: Dict[str, float] = {}
+        self._rejected = set()
+        self._lock = threading.Lock()
+        self._camera_locks: Dict[int, threading.Lock] = {}
+        self._load()
+
+    def _load(self) -> None:
+        with _locked(self.cache_path, exclusive=False):
+            cached = _read(self.cache_path).get(self.api_key, {})
+        self._stored_at = {
+            entry["token"]: entry["stored_at"]
+            for entry in cached.values()
+            if entry.get("token") and entry.get("stored_at")
+        }
+        self._tokens = {
+            int(camera_id): entry["token"]
+            for camera_id, entry in cached.items()
+            if entry.get("token")
+        }
+        self._names = {
+            int(camera_id): entry["name"]
+            for camera_id, entry in cached.items()
+            if entry.get("name")
+        }
+
+    def _lookup_by_id(self, camera_id: int) -> Optional[str]:
+        # Another process (e.g. the init script) may have stored a newer token
+        with _locked(self.cache_path, exclusive=False):
+            cached = _read(self.cache_path).get(self.api_key, {})
+        entry = cached.get(str(camera_id), {})
+        if entry.get("token") and entry.get("stored_at"):
+            with self._lock:
+                self._stored_at.setdefault(entry["token"], entry["stored_at"])
+        return entry.get("token")
+
+    def _lookup_by_name(self, name: str) -> Optional[str]:
+        for path in self.credentials_paths:
+            with _locked(path, exclusive=False):
+                data = _read(path)
+            for entry in data.values():
+                if entry.get("name") == name and entry.get("token"):
+                    return entry["token"]
+        return None
+
+    def is_fresh(self, token: Optional[str]) -> bool:
+        """Tell whether a token can still be used for a while."""
+        if not token or token in self._rejected:
+            return False
+        expiry = jwt_expiry(token)
+        if expiry is None:
+            # Unknown lifetime: trusted for a while after it was stored only
+            stored_at = self._stored_at.get(token)
+            return (
+                stored_at is not None and time.time() - stored_at < self.no_expiry_ttl
+            )
+        return expiry - time.time() > self.refresh_margin
+
+    def get(self, camera_id: int, name: Optional[str] = None) -> str:
+        """
+        Return a usable token for a camera, minting one only if needed.
+
+        Args:
+            camera_id: API ID of the camera
+            name: Camera name, used to find a token in the credentials files
+
+        Returns:
+            Camera access token
+        """
+        camera_id = int(camera_id)
+        with self._lock:
+            name = name or self._names.get(camera_id)
+            token = self._tokens.get(camera_id)
+            camera_lock = self._camera_locks.setdefault(camera_id, threading.Lock())
+        if self.is_fresh(token):
+            return token
+
+        # One mint per camera even when several threads miss at once
+        with camera_lock:
+            token = self._tokens.get(camera_id)
+            if self.is_fresh(token):
+                return token
+            for token in (
+                self._lookup_by_id(camera_id),
+                self._lookup_by_name(name) if name else None,
+            ):
+                if self.is_fresh(token):
+                    with self._lock:
+                        self._tokens[camera_id] = token
+                    return token
+            token = self.mint(camera_id)
+            self.put_many([(camera_id, name, token)])
+            return token
+
+    def invalidate(self, camera_id: int) -> None:
+        """
+        Forget the token of a camera, e.g. after the API answered 401.
+
+        The token is never handed out again by this cache, the one minted by
+        the next get() overwrites it on disk.
+        """
+        with self._lock:
+            token = self._tokens.pop(int(camera_id), None)
+            if token:
+                self._rejected.add(token)
+
+    def put_many(self, entries: Iterable[Tuple[int, Optional[str], str]]) -> None:
+        """
+        Store tokens in memory and on disk, with one write per file.
+
+        Args:
+            entries: (camera_id, camera name or None, token) tuples
+        """
+        entries = [(int(camera_id), name, token) for camera_id, name, token in entries]
+        if not entries:
+            return
+        now = time.time()
+        with self._lock:
+            self._tokens.update({camera_id: token for camera_id, _, token in entries})
+            self._names.update(
+                {camera_id: name for camera_id, name, _ in entries if name}
+            )
+            self._stored_at.update({token: now for _, _, token in entries})
+
+        with _locked(self.cache_path, exclusive=True):
+            cached = _read(self.cache_path)
+            section = cached.setdefault(self.api_key, {})
+            for camera_id, name, token in entries:
+                section[str(camera_id)] = {
+                    "name": name or self._names.get(camera_id),
+                    "token": token,
+                    "stored_at": now,
+                }
+            _write_atomic(self.cache_path, cached)
+
+        by_name = {
+            self._names[camera_id]: token
+            for camera_id, _, token in entries
+            if camera_id in self._names
+        }
+        for path in self.credentials_paths:
+            if not os.path.isfile(path):
+                continue
+            with _locked(path, exclusive=True):
+                data = _read(path)
+                updated = False
+                for entry in data.values():
+                    if entry.get("name") in by_name:
+                        entry["token"] = by_name[entry["name"]]
+                        updated = True
+                if updated:
+                    _write_atomic(path, data)
+        logging.debug(f"{len(entries)} camera tokens stored")
@@ -0,0 +1,556 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Historical backfill for the dev stack.
+Generates months of sequences and detections for the seeded cameras and loads
+them in bulk, bypassing the API: rows go to Postgres through COPY, one batch
+per transaction, and the detection images to the per-organization
+{SERVER_NAME}-alert-api-{org_id} buckets through concurrent uploads.
+
+The columns of the sequences and detections tables are read from the database,
+so that the rows follow the schema of the running pyro-api image: generated
+values are only written to the columns that exist, and the run stops before
+loading anything if a required column cannot be filled.
+
+Usage (stack seeded and running):
+    docker compose run --rm --no-deps init_script \
+        python /usr/local/bin/backfill.py --days 90 --sequences-per-day 2
+"""
+
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+import argparse
+import csv
+import glob
+import io
+import logging
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+
+import boto3
+import psycopg2
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+__all__ = [
+    "BackfillError",
+    "Column",
+    "ImageUploader",
+    "SeededCamera",
+    "copy_rows",
+    "generate_history",
+    "load_cameras",
+    "table_columns",
+]
+
+DEFAULT_IMAGES = "data/last_image_cameras/*.jpg"
+FRAME_INTERVAL = 30  # seconds between two detections of a sequence
+BATCH_SEQUENCES = 2000  # sequences (and their detections) per COPY transaction
+PART_SIZE = 5 * 1024 * 1024  # smallest S3 multipart part
+# Field of view assumed for cameras without a valid one, the most common value
+# of the seed data (degrees)
+DEFAULT_ANGLE_OF_VIEW = 54.2
+
+# Every column name pyro-api has used for these tables, the ones the running
+# schema does not have are left out of the COPY
+SEQUENCE_FIELDS = (
+    "id",
+    "camera_id",
+    "pose_id",
+    "azimuth",
+    "camera_azimuth",
+    "sequence_azimuth",
+    "cone_azimuth",
+    "cone_angle",
+    "started_at",
+    "last_seen_at",
+    "created_at",
+)
+DETECTION_FIELDS = (
+    "id",
+    "camera_id",
+    "pose_id",
+    "sequence_id",
+    "azimuth",
+    "bucket_key",
+    "bboxes",
+    "created_at",
+)
+
+
+class BackfillError(RuntimeError):
+    """Raised when the history cannot be loaded into the running stack."""
+
+
+class Column(NamedTuple):
+    nullable: bool
+    has_default: bool
+
+
+class SeededCamera(NamedTuple):
+    id: int
+    organization_id: int
+    angle_of_view: float
+    poses: List[Tuple[int, float]]  # (pose id, azimuth)
+
+
+def table_columns(conn, table: str) -> Dict[str, Column]:
+    """
+    Columns of a table, in table order.
+
+    Args:
+        conn: Postgres connection
+        table: Table name
+
+    Returns:
+        Nullability and default of each column, by name
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT column_name, is_nullable = 'YES', column_default IS NOT NULL
+            FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s
+            ORDER BY ordinal_position
+            """,
+            (table,),
+        )
+        columns = {
+            name: Column(nullable, default) for name, nullable, default in cursor
+        }
+    if not columns:
+        raise BackfillError(f"table {table} not found, is the stack seeded?")
+    return columns
+
+
+def copy_columns(
+    table: str, columns: Dict[str, Column], generated: Tuple[str, ...]
+) -> List[str]:
+    """
+    Columns to COPY: the generated ones that exist in the table.
+
+    Raises:
+        BackfillError: if a NOT NULL column without default is not generated
+    """
+    missing = [
+        name
+        for name, column in columns.items()
+        if not column.nullable and not column.has_default and name not in generated
+    ]
+    if missing:
+        raise BackfillError(f"{table}: no value generated for column(s) {missing}")
+    return [name for name in columns if name in generated]
+
+
+def load_cameras(conn) -> List[SeededCamera]:
+    """Cameras of the database and their poses."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT id, organization_id, angle_of_view FROM cameras ORDER BY id"
+        )
+        cameras = {row[0]: SeededCamera(*row, poses=[]) for row in cursor}
+        cursor.execute("SELECT id, camera_id, azimuth FROM poses ORDER BY id")
+        for pose_id, camera_id, azimuth in cursor:
+            if camera_id in cameras:
+                cameras[camera_id].poses.append((pose_id, azimuth))
+    return list(cameras.values())
+
+
+def generate_history(
+    cameras: List[SeededCamera],
+    days: float,
+    sequences_per_day: float,
+    detections: Tuple[int, int],
+    end: datetime,
+    seed: Optional[int] = None,
+) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    Generate sequences and their detections over the last days.
+
+    Rows hold SEQUENCE_FIELDS and DETECTION_FIELDS but the IDs and bucket
+    keys, which are set when loading.
+
+    Args:
+        cameras: Seeded cameras
+        days: Length of the history
+        sequences_per_day: Mean number of sequences of a camera per day
+        detections: Inclusive range of the number of detections per sequence
+        end: End of the history
+        seed: Random seed, for a reproducible history
+
+    Cameras whose angle_of_view is missing or not positive are given
+    DEFAULT_ANGLE_OF_VIEW.
+
+    Yields:
+        (sequence, detections) rows, in chronological order per camera
+    """
+    rng = random.Random(seed)
+    span = timedelta(days=days).total_seconds()
+    for camera in cameras:
+        angle_of_view = camera.angle_of_view
+        if not angle_of_view or angle_of_view <= 0:
+            logging.warning(
+                f"camera {camera.id}: angle_of_view {angle_of_view!r}, "
+                f"{DEFAULT_ANGLE_OF_VIEW} assumed"
+            )
+            angle_of_view = DEFAULT_ANGLE_OF_VIEW
+        n_sequences = round(rng.gauss(1, 0.1) * days * sequences_per_day)
+        starts = sorted(rng.uniform(0, span) for _ in range(max(n_sequences, 0)))
+        for start in starts:
+            pose_id, pose_azimuth = (
+                rng.choice(camera.poses) if camera.poses else (None, 0.0)
+            )
+            # Smoke position within the field of view, drifting slowly
+            offset = rng.uniform(-0.4, 0.4) * angle_of_view
+            width = 3 / angle_of_view
+            started_at = end - timedelta(seconds=span - start)
+            count = rng.randint(*detections)
+            rows = []
+            for index in range(count):
+                drift = offset + rng.uniform(-0.5, 0.5)
+                x_center = 0.5 + drift / angle_of_view
+                y_center, height = rng.uniform(0.4, 0.6), rng.uniform(0.02, 0.08)
+                bbox = (
+                    round(max(x_center - width, 0.0), 4),
+                    round(y_center - height, 4),
+                    round(min(x_center + width, 1.0), 4),
+                    round(y_center + height, 4),
+                    round(rng.uniform(0.3, 0.95), 2),
+                )
+                rows.append(
+                    {
+                        "camera_id": camera.id,
+                        "pose_id": pose_id,
+                        "azimuth": round((pose_azimuth + drift) % 360, 1),
+                        "bboxes": f"[{bbox}]",
+                        "created_at": started_at
+                        + timedelta(seconds=index * FRAME_INTERVAL),
+                    }
+                )
+            azimuth = round((pose_azimuth + offset) % 360, 1)
+            sequence = {
+                "camera_id": camera.id,
+                "pose_id": pose_id,
+                "azimuth": azimuth,
+                "camera_azimuth": pose_azimuth,
+                "sequence_azimuth": azimuth,
+                "cone_azimuth": azimuth,
+                "cone_angle": round(2 * width * angle_of_view, 1),
+                "started_at": started_at,
+                "last_seen_at": rows[-1]["created_at"],
+                "created_at": started_at,
+            }
+            yield sequence, rows
+
+
+def reserve_ids(cursor, table: str, count: int) -> List[int]:
+    """Take count IDs from the serial of a table, as inserts through the API do."""
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+        (table, count),
+    )
+    return [row[0] for row in cursor]
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""  # unquoted empty field: NULL
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def copy_rows(cursor, table: str, columns: List[str], rows: List[Dict]) -> None:
+    """Load rows with a single COPY, columns missing from a row are NULL."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_csv_value(row.get(name)) for name in columns])
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+    )
+
+
+class ImageUploader:
+    """
+    Concurrent uploads to S3 with a bounded number of uploads in flight.
+
+    Objects larger than part_size go through multipart uploads, their parts
+    sent concurrently too.
+
+    Args:
+        s3_client: boto3 S3 client, its pool sized for the workers
+        workers: Concurrent uploads
+        part_size: Multipart threshold and part size (bytes)
+    """
+
+    def __init__(self, s3_client, workers: int, part_size: int = PART_SIZE) -> None:
+        self.s3_client = s3_client
+        self.workers = workers
+        self.transfer = TransferConfig(
+            multipart_threshold=part_size,
+            multipart_chunksize=part_size,
+            max_concurrency=4,
+        )
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._pending: set = set()
+        self.uploaded = 0
+        self.uploaded_bytes = 0
+        self.errors: List[str] = []
+
+    def _upload(self, bucket: str, key: str, data: bytes) -> None:
+        self.s3_client.upload_fileobj(
+            io.BytesIO(data), bucket, key, Config=self.transfer
+        )
+
+    def _collect(self, done) -> None:
+        for future in done:
+            self._pending.discard(future)
+            try:
+                future.result()
+                self.uploaded += 1
+                self.uploaded_bytes += future.size
+            except Exception as e:
+                self.errors.append(f"{future.key}: {e}")
+
+    def submit(self, bucket: str, key: str, data: bytes) -> None:
+        """Queue an upload, waiting first if too many are in flight."""
+        # A few uploads per worker keep the pool busy without buffering them all
+        if len(self._pending) >= 4 * self.workers:
+            done, _ = wait(self._pending, return_when=FIRST_COMPLETED)
+            self._collect(done)
+        future: Future = self._pool.submit(self._upload, bucket, key, data)
+        future.key, future.size = key, len(data)
+        self._pending.add(future)
+
+    def drain(self) -> List[str]:
+        """
+        Wait for the uploads in flight.
+
+        Returns:
+            Errors of the uploads that failed since the previous drain
+        """
+        self._collect(wait(self._pending).done)
+        errors, self.errors = self.errors, []
+        return errors
+
+    def close(self) -> None:
+        """Wait for the uploads still in flight."""
+        self.drain()
+        self._pool.shutdown()
+
+
+def ensure_buckets(s3_client, buckets: List[str]) -> None:
+    existing = {bucket["Name"] for bucket in s3_client.list_buckets()["Buckets"]}
+    for bucket in sorted(set(buckets) - existing):
+        logging.info(f"Creating bucket {bucket}")
+        s3_client.create_bucket(Bucket=bucket)
+
+
+def load_images(pattern: str) -> List[bytes]:
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        raise BackfillError(
+            f"no image matches {pattern}, run init_script first or pass --images"
+        )
+    images = []
+    for path in paths:
+        with open(path, "rb") as file:
+            images.append(file.read())
+    return images
+
+
+def backfill(args: argparse.Namespace) -> None:
+    conn = psycopg2.connect(
+        host=os.environ.get("POSTGRES_HOST", "db"),
+        port=os.environ.get("POSTGRES_PORT", "5432"),
+        dbname=os.environ.get("POSTGRES_DB"),
+        user=os.environ.get("POSTGRES_USER"),
+        password=os.environ.get("POSTGRES_PASSWORD"),
+    )
+    cameras = load_cameras(conn)
+    if not cameras:
+        raise BackfillError("no camera in the database, run init_script first")
+
+    sequence_columns = copy_columns(
+        "sequences", table_columns(conn, "sequences"), SEQUENCE_FIELDS
+    )
+    detection_columns = copy_columns(
+        "detections", table_columns(conn, "detections"), DETECTION_FIELDS
+    )
+    logging.info(f"sequences columns: {', '.join(sequence_columns)}")
+    logging.info(f"detections columns: {', '.join(detection_columns)}")
+
+    uploader = None
+    if not args.no_images:
+        images = load_images(args.images)
+        s3_client = boto3.client(
+            "s3",
+            endpoint_url=os.environ.get("S3_ENDPOINT_URL"),
+            aws_access_key_id=os.environ.get("S3_ACCESS_KEY"),
+            aws_secret_access_key=os.environ.get("S3_SECRET_KEY"),
+            region_name=os.environ.get("S3_REGION"),
+            config=Config(max_pool_connections=args.workers * 4),
+        )
+        server_name = os.environ.get("SERVER_NAME")
+        buckets = {
+            camera.id: f"{server_name}-alert-api-{camera.organization_id}"
+            for camera in cameras
+        }
+        ensure_buckets(s3_client, list(buckets.values()))
+        uploader = ImageUploader(s3_client, args.workers)
+
+    start = time.perf_counter()
+    n_sequences, n_detections = 0, 0
+    history = generate_history(
+        cameras,
+        args.days,
+        args.sequences_per_day,
+        tuple(args.detections),
+        _now(),
+        args.seed,
+    )
+    batch: List[Tuple[Dict, List[Dict]]] = []
+
+    def flush() -> None:
+        nonlocal n_sequences, n_detections
+        # The transaction only commits once the images of its detections are
+        # stored, it is rolled back if one of them failed
+        with conn, conn.cursor() as cursor:
+            sequence_ids = reserve_ids(cursor, "sequences", len(batch))
+            detection_ids = iter(
+                reserve_ids(cursor, "detections", sum(len(rows) for _, rows in batch))
+            )
+            sequences, detections = [], []
+            for sequence_id, (sequence, rows) in zip(sequence_ids, batch):
+                sequences.append({**sequence, "id": sequence_id})
+                for row in rows:
+                    detection_id = next(detection_ids)
+                    bucket_key = (
+                        f"{row['camera_id']}-{row['created_at']:%Y%m%d%H%M%S}"
+                        f"-{detection_id:08x}.jpg"
+                    )
+                    detections.append(
+                        {
+                            **row,
+                            "id": detection_id,
+                            "sequence_id": sequence_id,
+                            "bucket_key": bucket_key,
+                        }
+                    )
+                    if uploader is not None:
+                        uploader.submit(
+                            buckets[row["camera_id"]],
+                            bucket_key,
+                            images[detection_id % len(images)],
+                        )
+            copy_rows(cursor, "sequences", sequence_columns, sequences)
+            copy_rows(cursor, "detections", detection_columns, detections)
+            errors = uploader.drain() if uploader is not None else []
+            if errors:
+                raise BackfillError(
+                    f"{len(errors)} image upload(s) failed, batch rolled back, e.g. "
+                    + "; ".join(errors[:5])
+                )
+        n_sequences += len(sequences)
+        n_detections += len(detections)
+        elapsed = time.perf_counter() - start
+        logging.info(
+            f"{n_sequences} sequences, {n_detections} detections loaded "
+            f"({n_detections / elapsed:.0f} detections/s)"
+        )
+        batch.clear()
+
+    try:
+        for item in history:
+            batch.append(item)
+            if len(batch) >= args.batch_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        conn.close()
+        if uploader is not None:
+            uploader.close()
+
+    if uploader is not None:
+        logging.info(
+            f"{uploader.uploaded} images uploaded "
+            f"({uploader.uploaded_bytes / 1e6:.1f} MB)"
+        )
+    logging.info(f"Backfill completed in {time.perf_counter() - start:.1f}s")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Bulk-load historical sequences and detections"
+    )
+    parser.add_argument(
+        "--days", type=float, default=90, help="length of the history (days)"
+    )
+    parser.add_argument(
+        "--sequences-per-day",
+        type=float,
+        default=2.0,
+        help="mean number of sequences of each camera per day",
+    )
+    parser.add_argument(
+        "--detections",
+        type=int,
+        nargs=2,
+        default=(3, 15),
+        metavar=("MIN", "MAX"),
+        help="inclusive range of the number of detections per sequence",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_SEQUENCES,
+        help="sequences loaded per COPY transaction",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("BACKFILL_WORKERS", 32)),
+        help="concurrent image uploads",
+    )
+    parser.add_argument(
+        "--images",
+        default=DEFAULT_IMAGES,
+        help="glob of the images uploaded for the detections, in turn",
+    )
+    parser.add_argument(
+        "--no-images",
+        action="store_true",
+        help="only load the database rows",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    args = parser.parse_args(argv)
+    if not 1 <= args.detections[0] <= args.detections[1]:
+        parser.error("--detections needs 1 <= MIN <= MAX")
+    return args
+
+
+def main(argv=None) -> None:
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO, format="%(message)s")
+    try:
+        backfill(parse_args(argv))
+    except BackfillError as e:
+        logging.error(str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
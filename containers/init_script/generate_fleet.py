@@ -0,0 +1,226 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Synthetic fleet generator for the initialization script.
+
+Writes organizations, users, cameras and poses CSVs with the schema of the
+DEV seed data, scaled up to any number of cameras. Organizations stand for
+fire departments spread over mainland France; each gets its sites clustered
+around its center, and each site holds one to four cameras sharing a
+position, like the real deployments.
+
+Usage:
+    python containers/init_script/generate_fleet.py --scale 600 --seed 0
+    INIT_SUB_PATH=_FLEET docker compose up -d
+
+Only uses the standard library, so that it runs on the host as is (pyarrow
+is only needed for --format parquet).
+"""
+
+from typing import Dict, List, Tuple
+import argparse
+import csv
+import logging
+import math
+import os
+import random
+
+BASE_CAMERAS = 17  # cameras in the DEV seed data, i.e. scale 1
+FIRST_ORGA_ID = 2  # 1 is the admin organization created by the API
+CREATED_AT = "2025-01-01T00:00:00.000000"
+
+# Mainland France, where department centers are drawn
+LAT_RANGE = (43.0, 50.5)
+LON_RANGE = (-1.5, 7.5)
+SITE_SPREAD_DEG = 0.25  # standard deviation of sites around their department
+CAMERAS_PER_SITE = (1, 2, 3, 4)
+CAMERAS_PER_SITE_WEIGHTS = (2, 5, 1, 2)
+ANGLES_OF_VIEW = (54.2, 87.0, 180.0)
+ANGLES_OF_VIEW_WEIGHTS = (12, 4, 1)
+
+CSV_COLUMNS = {
+    "organizations": ["id", "name"],
+    "users": ["id", "organization_id", "password", "login", "role", "created_at"],
+    "cameras": [
+        "id",
+        "organization_id",
+        "name",
+        "angle_of_view",
+        "elevation",
+        "lat",
+        "lon",
+        "is_trustable",
+        "created_at",
+    ],
+    "poses": ["id", "camera_id", "azimuth", "patrol_id"],
+}
+
+
+def parse_range(value: str) -> Tuple[int, int]:
+    """Parse "N" or "MIN-MAX" into an inclusive (min, max) range."""
+    low, _, high = value.partition("-")
+    bounds = (int(low), int(high or low))
+    if bounds[0] < 1 or bounds[0] > bounds[1]:
+        raise argparse.ArgumentTypeError(f"invalid range: {value}")
+    return bounds
+
+
+def generate_fleet(
+    n_cameras: int,
+    cameras_per_orga: int = 250,
+    patrols: Tuple[int, int] = (3, 5),
+    seed: int = 0,
+) -> Dict[str, List[Dict]]:
+    """
+    Generate the rows of a synthetic fleet.
+
+    IDs are the ones a serial run of the init script assigns on a fresh
+    database, which is what the poses and cameras CSVs reference.
+
+    Args:
+        n_cameras: Number of cameras
+        cameras_per_orga: Average number of cameras per organization
+        patrols: Inclusive range of the number of poses per camera
+        seed: Seed of the random generator, same seed gives same CSVs
+
+    Returns:
+        Rows of each CSV, keyed on CSV name
+    """
+    rng = random.Random(seed)
+    n_orgas = max(2, math.ceil(n_cameras / cameras_per_orga))
+    rows: Dict[str, List[Dict]] = {name: [] for name in CSV_COLUMNS}
+
+    centers = []
+    for index in range(n_orgas):
+        orga_id = FIRST_ORGA_ID + index
+        rows["organizations"].append({"id": orga_id, "name": f"sdis-fleet-{index:03d}"})
+        rows["users"].append(
+            {
+                "id": orga_id,
+                "organization_id": orga_id,
+                "password": "test",
+                "login": f"fleet{index:03d}",
+                "role": "agent",
+                "created_at": CREATED_AT,
+            }
+        )
+        centers.append((rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)))
+
+    site_index = 0
+    while len(rows["cameras"]) < n_cameras:
+        orga_index = rng.randrange(n_orgas)
+        center_lat, center_lon = centers[orga_index]
+        lat = rng.gauss(center_lat, SITE_SPREAD_DEG)
+        # Keep distances isotropic: a degree of longitude shrinks with latitude
+        lon = rng.gauss(center_lon, SITE_SPREAD_DEG / math.cos(math.radians(lat)))
+        elevation = round(rng.uniform(80, 1200))
+        n_site_cameras = rng.choices(CAMERAS_PER_SITE, CAMERAS_PER_SITE_WEIGHTS)[0]
+        n_site_cameras = min(n_site_cameras, n_cameras - len(rows["cameras"]))
+        for camera_index in range(n_site_cameras):
+            camera_id = len(rows["cameras"]) + 1
+            rows["cameras"].append(
+                {
+                    "id": camera_id,
+                    "organization_id": FIRST_ORGA_ID + orga_index,
+                    "name": f"fleet-{site_index:05d}-{camera_index + 1:02d}",
+                    "angle_of_view": rng.choices(
+                        ANGLES_OF_VIEW, ANGLES_OF_VIEW_WEIGHTS
+                    )[0],
+                    "elevation": elevation,
+                    "lat": round(lat, 5),
+                    "lon": round(lon, 5),
+                    "is_trustable": True,
+                    "created_at": CREATED_AT,
+                }
+            )
+
+            # Evenly spread patrol, cameras of a site starting at different azimuths
+            n_poses = rng.randint(*patrols)
+            start = rng.uniform(0, 360 / n_poses)
+            for patrol_index in range(n_poses):
+                rows["poses"].append(
+                    {
+                        "id": len(rows["poses"]) + 1,
+                        "camera_id": camera_id,
+                        "azimuth": round(start + patrol_index * 360 / n_poses) % 360,
+                        "patrol_id": patrol_index + 1,
+                    }
+                )
+        site_index += 1
+
+    return rows
+
+
+def write_fleet(
+    rows: Dict[str, List[Dict]], output_dir: str, sub_path: str, fmt: str = "csv"
+) -> None:
+    """
+    Write the fleet tables where the init script reads them.
+
+    Args:
+        rows: Rows of each CSV, as returned by generate_fleet
+        output_dir: CSV directory, e.g. "data/csv"
+        sub_path: Dataset suffix, e.g. "_FLEET" for "API_DATA_FLEET - poses.csv"
+        fmt: "csv", or "parquet" (needs pyarrow) which loads faster
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    for name, columns in CSV_COLUMNS.items():
+        path = os.path.join(output_dir, f"API_DATA{sub_path} - {name}.{fmt}")
+        if fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            pq.write_table(pa.Table.from_pylist(rows[name]), path)
+        else:
+            with open(path, "w", newline="") as file:
+                writer = csv.DictWriter(file, fieldnames=columns)
+                writer.writeheader()
+                writer.writerows(rows[name])
+        logging.info(f"{len(rows[name])} {name} written to {path}")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a synthetic fleet")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help=f"Fleet size relative to the DEV data ({BASE_CAMERAS} cameras)",
+    )
+    size.add_argument("--cameras", type=int, help="Number of cameras")
+    parser.add_argument("--cameras-per-orga", type=int, default=250)
+    parser.add_argument(
+        "--patrols",
+        type=parse_range,
+        default=(3, 5),
+        help="Poses per camera, N or MIN-MAX",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", default="data/csv")
+    parser.add_argument("--sub-path", default="_FLEET", help="Dataset suffix")
+    parser.add_argument(
+        "--format",
+        choices=("csv", "parquet"),
+        default="csv",
+        help="parquet needs pyarrow, and wins over CSVs with the same suffix",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    n_cameras = args.cameras or max(1, round(BASE_CAMERAS * args.scale))
+    rows = generate_fleet(n_cameras, args.cameras_per_orga, args.patrols, args.seed)
+    write_fleet(rows, args.output_dir, args.sub_path, args.format)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    main()
@@ -0,0 +1,424 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Fleet heartbeat simulator.
+
+Keeps every camera of the API online: each camera sends a heartbeat every
+--heartbeat-interval seconds and a new last image every --image-interval
+seconds, both jittered so that a large fleet does not fire in bursts. Calls
+are scheduled on a hashed timer wheel and sent by a bounded worker pool, and
+the camera list is fetched again every --refresh-interval seconds so that
+cameras created after startup are picked up (and deleted ones dropped).
+
+Sent, failed, late and dropped counters are logged periodically and served as
+JSON on http://<host>:--stats-port/.
+
+Usage (runs in the init image, see the simulator compose profile):
+    python heartbeat_simulator.py --heartbeat-interval 30 --image-interval 300
+"""
+
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import argparse
+import glob
+import json
+import logging
+import math
+import os
+import queue
+import random
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from http_client import APIError, api_request, configure_host
+from image_cache import encode_image
+from token_cache import CameraTokenCache
+from utils import get_token
+
+KINDS = ("heartbeat", "last_image")
+IMAGE_DIR = os.path.join("data", "last_image_cameras")
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel: scheduling is O(1), each tick only looks at one slot.
+
+    Args:
+        tick: Resolution in seconds
+        slots: Number of slots, a full turn lasts tick * slots seconds
+    """
+
+    def __init__(self, tick: float = 0.1, slots: int = 1024) -> None:
+        self.tick = tick
+        self.current = 0
+        self.start = time.monotonic()
+        self._slots: List[List[Tuple[int, Any]]] = [[] for _ in range(slots)]
+
+    def schedule(self, at: float, item: Any) -> None:
+        """Schedule an item at a monotonic time, at least one tick from now."""
+        due_tick = max(self.current + 1, math.ceil((at - self.start) / self.tick))
+        self._slots[due_tick % len(self._slots)].append((due_tick, item))
+
+    def due_ticks(self, now: float) -> int:
+        """Number of ticks elapsed by now that were not advanced yet."""
+        return max(0, int((now - self.start) / self.tick) - self.current)
+
+    def advance(self) -> List[Tuple[float, Any]]:
+        """
+        Move one tick forward.
+
+        Returns:
+            (scheduled time, item) of the items due on this tick
+        """
+        self.current += 1
+        slot = self._slots[self.current % len(self._slots)]
+        # Items more than one turn away share the slot, they stay for later
+        due = [entry for entry in slot if entry[0] <= self.current]
+        if due:
+            slot[:] = [entry for entry in slot if entry[0] > self.current]
+        return [(self.start + tick * self.tick, item) for tick, item in due]
+
+
+class Counters:
+    """Thread-safe counters per kind of update."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts = {
+            kind: dict.fromkeys(("sent", "failed", "late", "dropped"), 0)
+            for kind in KINDS
+        }
+        self.cameras = 0
+        self.started_at = time.time()
+
+    def add(self, kind: str, name: str) -> None:
+        with self._lock:
+            self._counts[kind][name] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {kind: dict(values) for kind, values in self._counts.items()}
+        return {
+            "cameras": self.cameras,
+            "uptime_s": round(time.time() - self.started_at),
+            **counts,
+        }
+
+
+class Simulator:
+    """
+    Schedules and sends the heartbeats and last images of the whole fleet.
+
+    Args:
+        api_url: API URL with /api/v1
+        login: Admin login, used to list cameras and mint camera tokens
+        password: Admin password
+        heartbeat_interval: Mean seconds between two heartbeats of a camera
+        image_interval: Mean seconds between two last images, 0 to disable
+        jitter: Relative jitter of the intervals, e.g. 0.1 for +/-10%
+        workers: Maximum number of concurrent requests
+        max_pending: Maximum number of queued requests, beyond which updates
+            are dropped rather than piling up
+        late_after: Seconds after its scheduled time when an update counts as late
+        refresh_interval: Seconds between two fetches of the camera list
+        images: Images sent as last images, in turn
+        seed: Seed of the jitter
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        login: str,
+        password: str,
+        heartbeat_interval: float = 30.0,
+        image_interval: float = 300.0,
+        jitter: float = 0.1,
+        workers: int = 16,
+        max_pending: Optional[int] = None,
+        late_after: float = 5.0,
+        refresh_interval: float = 60.0,
+        images: Optional[List[str]] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.api_url = api_url
+        self.login = login
+        self.password = password
+        self.intervals = {"heartbeat": heartbeat_interval, "last_image": image_interval}
+        self.jitter = jitter
+        self.late_after = late_after
+        self.refresh_interval = refresh_interval
+        self.images = images or []
+        self.counters = Counters()
+        self.wheel = TimerWheel()
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self._pending = threading.BoundedSemaphore(max_pending or 4 * workers)
+        self._rng = random.Random(seed)
+        self._cameras: Dict[int, str] = {}
+        self._new_cameras: "queue.SimpleQueue[Dict[int, str]]" = queue.SimpleQueue()
+        self._sequence: Dict[int, int] = {}
+        self._admin_headers: Dict[str, str] = {}
+        self._stop = threading.Event()
+        self.tokens = CameraTokenCache(mint=self._mint, api_url=api_url)
+        # One keep-alive connection per worker towards the API
+        configure_host(api_url, pool_maxsize=workers)
+
+    def _login(self) -> None:
+        token = get_token(self.api_url, self.login, self.password)
+        self._admin_headers = {"Authorization": f"Bearer {token}"}
+
+    def _mint(self, camera_id: int) -> str:
+        route = f"{self.api_url}/cameras/{camera_id}/token"
+        return api_request("post", route, self._admin_headers)["access_token"]
+
+    def _jittered(self, interval: float) -> float:
+        return interval * (1 + self._rng.uniform(-self.jitter, self.jitter))
+
+    # ------------------------------------------------------------------
+    # Camera list
+    # ------------------------------------------------------------------
+
+    def _fetch_cameras(self) -> Dict[int, str]:
+        try:
+            cameras = api_request(
+                "get", f"{self.api_url}/cameras/", self._admin_headers
+            )
+        except APIError as e:
+            if e.status_code != 401:
+                raise
+            # Admin token expired
+            self._login()
+            cameras = api_request(
+                "get", f"{self.api_url}/cameras/", self._admin_headers
+            )
+        return {camera["id"]: camera["name"] for camera in cameras}
+
+    def _refresh(self) -> None:
+        try:
+            self._new_cameras.put(self._fetch_cameras())
+        except Exception as e:
+            logging.error(f"Camera list refresh failed: {e}")
+
+    def _apply_camera_list(self, cameras: Dict[int, str], now: float) -> None:
+        added = cameras.keys() - self._cameras.keys()
+        removed = self._cameras.keys() - cameras.keys()
+        # Removed cameras are dropped when their next update comes up
+        self._cameras = cameras
+        self.counters.cameras = len(cameras)
+        for camera_id in added:
+            for kind, interval in self.intervals.items():
+                if interval > 0 and (kind != "last_image" or self.images):
+                    # Spread the first updates over a whole interval
+                    self.wheel.schedule(
+                        now + self._rng.uniform(0, interval), (kind, camera_id)
+                    )
+        if added or removed:
+            logging.info(
+                f"{len(cameras)} cameras ({len(added)} added, {len(removed)} removed)"
+            )
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def _send(
+        self, kind: str, camera_id: int, scheduled: float, image: Optional[str]
+    ) -> None:
+        try:
+            if time.monotonic() - scheduled > self.late_after:
+                self.counters.add(kind, "late")
+            token = self.tokens.get(camera_id, self._cameras.get(camera_id))
+            headers = {"Authorization": f"Bearer {token}"}
+            try:
+                if kind == "heartbeat":
+                    api_request("patch", f"{self.api_url}/cameras/heartbeat", headers)
+                else:
+                    api_request(
+                        "patch",
+                        f"{self.api_url}/cameras/image",
+                        headers,
+                        files={
+                            "file": (
+                                os.path.basename(image),
+                                encode_image(image),
+                                "image/jpeg",
+                            )
+                        },
+                    )
+            except APIError as e:
+                if e.status_code == 401:
+                    # Token signed by another stack or expired: mint one next time
+                    self.tokens.invalidate(camera_id)
+                raise
+            self.counters.add(kind, "sent")
+        except Exception as e:
+            self.counters.add(kind, "failed")
+            logging.debug(f"{kind} of camera {camera_id} failed: {e}")
+        finally:
+            self._pending.release()
+
+    def _dispatch(self, scheduled: float, item: Tuple[str, Hashable]) -> None:
+        kind, camera_id = item
+        if kind == "refresh":
+            self.wheel.schedule(scheduled + self.refresh_interval, item)
+            self.pool.submit(self._refresh)
+            return
+        if camera_id not in self._cameras:
+            return  # deleted meanwhile, not rescheduled
+        # The cadence follows the schedule, not the response times
+        self.wheel.schedule(scheduled + self._jittered(self.intervals[kind]), item)
+        if not self._pending.acquire(blocking=False):
+            self.counters.add(kind, "dropped")
+            return
+        image = None
+        if kind == "last_image":
+            # Each camera goes through the images in turn
+            sequence = self._sequence.get(camera_id, camera_id)
+            self._sequence[camera_id] = sequence + 1
+            image = self.images[sequence % len(self.images)]
+        self.pool.submit(self._send, kind, camera_id, scheduled, image)
+
+    # ------------------------------------------------------------------
+    # Main loop
+    # ------------------------------------------------------------------
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self, log_interval: float = 60.0) -> None:
+        """Run until stop() is called."""
+        self._login()
+        self._apply_camera_list(self._fetch_cameras(), time.monotonic())
+        self.wheel.schedule(time.monotonic() + self.refresh_interval, ("refresh", None))
+        next_log = time.monotonic() + log_interval
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                while True:
+                    try:
+                        self._apply_camera_list(self._new_cameras.get_nowait(), now)
+                    except queue.Empty:
+                        break
+                # Catch up on every elapsed tick if the loop fell behind
+                for _ in range(self.wheel.due_ticks(now)):
+                    for scheduled, item in self.wheel.advance():
+                        self._dispatch(scheduled, item)
+                if now >= next_log:
+                    logging.info(json.dumps(self.counters.snapshot()))
+                    next_log += log_interval
+                self._stop.wait(self.wheel.tick)
+        finally:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            logging.info(json.dumps(self.counters.snapshot()))
+
+
+def serve_stats(counters: Counters, port: int) -> ThreadingHTTPServer:
+    """Serve the counters as JSON on every path, in a background thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            body = json.dumps(counters.snapshot()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    env = os.environ.get
+    parser = argparse.ArgumentParser(
+        description="Keep the cameras of the dev stack online"
+    )
+    parser.add_argument(
+        "--heartbeat-interval",
+        type=float,
+        default=float(env("SIM_HEARTBEAT_INTERVAL", 30)),
+        help="mean seconds between two heartbeats of a camera",
+    )
+    parser.add_argument(
+        "--image-interval",
+        type=float,
+        default=float(env("SIM_IMAGE_INTERVAL", 300)),
+        help="mean seconds between two last images of a camera, 0 to disable",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=float(env("SIM_JITTER", 0.1)),
+        help="relative jitter of the intervals",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(env("SIM_WORKERS", 16)),
+        help="maximum number of concurrent requests",
+    )
+    parser.add_argument(
+        "--late-after",
+        type=float,
+        default=float(env("SIM_LATE_AFTER", 5)),
+        help="seconds after its scheduled time when an update counts as late",
+    )
+    parser.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=float(env("SIM_REFRESH_INTERVAL", 60)),
+        help="seconds between two fetches of the camera list",
+    )
+    parser.add_argument(
+        "--stats-port",
+        type=int,
+        default=int(env("SIM_STATS_PORT", 8095)),
+        help="port serving the counters as JSON, 0 to disable",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    images = sorted(glob.glob(os.path.join(IMAGE_DIR, "*.jpg")))
+    if not images:
+        logging.warning(f"No image in {IMAGE_DIR}, last images are not updated")
+
+    simulator = Simulator(
+        os.environ.get("API_URL") + "/api/v1",
+        os.environ.get("SUPERADMIN_LOGIN"),
+        os.environ.get("SUPERADMIN_PWD"),
+        heartbeat_interval=args.heartbeat_interval,
+        image_interval=args.image_interval,
+        jitter=args.jitter,
+        workers=args.workers,
+        late_after=args.late_after,
+        refresh_interval=args.refresh_interval,
+        images=images,
+        seed=args.seed,
+    )
+    signal.signal(signal.SIGTERM, lambda *_: simulator.stop())
+    if args.stats_port:
+        serve_stats(simulator.counters, args.stats_port)
+    try:
+        simulator.run()
+    except KeyboardInterrupt:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        stream=sys.stdout, level=logging.INFO, format="%(asctime)s %(message)s"
+    )
+    main()
@@ -1,100 +1,111 @@
-#  TODO REFACTOR : use the init scripts which are in the test_update_pi directory
+#  TODO REFACTOR : use the init scripts which are in the test_update_pi directory
 
 #!/usr/bin/env python
+import argparse
 import sys
 import logging
 import os
 import glob
 import itertools
 import random
-import io
-import pandas as pd
-import requests
-from PIL import Image
+from functools import partial
+from typing import Dict, List, Tuple
 from pyroclient import Client
 
 # Import utility functions
 from utils import (
     get_token,
     api_request,
-    read_json_file,
-    write_json_file,
     download_images_if_needed,
 )
+from http_client import configure_host
+from image_cache import encode_image
+from instrumentation import instrument
+from journal import Journal
+from token_cache import CameraTokenCache
+from seed_data import ADMIN_ORGA_ID, load_seed_data
+from seeding import EXECUTORS, StageRunner, resolve_id, serial_id_map
+from sync import Snapshot, camera_patches, fetch_snapshot, pose_key, pose_patch
 
 logging.basicConfig(stream=sys.stdout, level=logging.INFO, format="%(message)s")
 
-# Base URL for Client initialization (like in notebook: "http://api:5050")
-base_url = os.environ.get("API_URL")
-# API URL with /api/v1 for direct API requests
-api_url = base_url + "/api/v1"
-
-superuser_login = os.environ.get("SUPERADMIN_LOGIN")
-superuser_pwd = os.environ.get("SUPERADMIN_PWD")
 slack_hook = os.environ.get("SLACK_HOOK")
-credentials_path = "data/credentials.json"
-credentials_path_etl = "data/credentials-wildfire.json"
 
+# Seed dataset: {data dir}/csv/API_DATA{sub_path} - *.csv (see generate_fleet.py)
+sub_path = os.environ.get("INIT_SUB_PATH", "_DEV")
 
-superuser_auth = {
-    "Authorization": f"Bearer {get_token(api_url, superuser_login, superuser_pwd)}",
-    "Content-Type": "application/json",
-}
+# Constants
+BASE_DIRECTORY = "data"
+SAMPLE_PATH = "last_image_cameras"
+IMAGES_URL = "https://github.com/pyronear/pyro-envdev/releases/download/v0.0.1/last_image_cameras.zip"
+# Optional SHA-256 of the images zip, checked before extraction
+IMAGES_SHA256 = os.environ.get("IMAGES_SHA256")
 
-sub_path = "_DEV"
+# Predefined list of image filenames for pose images
+# (to be filled with actual filenames)
+POSE_IMAGE_FILES = [
+    "11-20251001151013-d6de7b82.jpg",
+    "17-20251001143249-dc04ad6f.jpg",
+    "22-20251001150858-6578cf9e.jpg",
+    "59-20251001151203-354621da.jpg",
+    "69-20251003170645-721ec72e.jpg",
+]
+
+# Cameras to skip for pose images (one per organization)
+# Format: {organization_id: camera_id_to_skip}
+CAMERAS_TO_SKIP_POSE_IMAGES = {
+    2: 8,  # Organization 2: skip camera 1 (videlles-01)
+    3: 14,  # Organization 3: skip camera 9 (brison-01)
+}
 
-users = pd.read_csv(f"data/csv/API_DATA{sub_path} - users.csv")
-organizations = pd.read_csv(f"data/csv/API_DATA{sub_path} - organizations.csv")
-cameras = pd.read_csv(f"data/csv/API_DATA{sub_path} - cameras.csv")
-cameras = cameras.fillna("")
-poses = pd.read_csv(f"data/csv/API_DATA{sub_path} - poses.csv")
 
 # ============================================================================
 # ORGAS CREATION
 # ============================================================================
 
-for orga in organizations.itertuples(index=False):
+
+def create_organization(orga, headers, api_url) -> int:
     logging.info(f"saving orga : {orga.name}")
     payload = {"name": orga.name}
-    api_request("post", f"{api_url}/organizations/", superuser_auth, payload)
+    orga_id = api_request("post", f"{api_url}/organizations/", headers, payload)["id"]
 
     # ACTIVATE SLACK NOTIFICATION
     if slack_hook:
         logging.info("Notifications slack activés")
         payload = {"slack_hook": slack_hook}
-        result = api_request(
+        api_request(
             "patch",
-            f"{api_url}/organizations/slack-hook/{orga.id}",
-            superuser_auth,
+            f"{api_url}/organizations/slack-hook/{orga_id}",
+            headers,
             payload,
         )
+    return orga_id
+
 
 # ============================================================================
 # USERS CREATION
 # ============================================================================
 
-for user in users.itertuples(index=False):
+
+def create_user(user, headers, orga_ids, api_url) -> None:
     logging.info(f"saving user : {user.login}")
     payload = {
-        "organization_id": user.organization_id,
+        "organization_id": resolve_id(orga_ids, user.organization_id, "organization"),
         "password": user.password,
         "login": user.login,
         "role": user.role,
     }
-    api_request("post", f"{api_url}/users/", superuser_auth, payload)
+    api_request("post", f"{api_url}/users/", headers, payload)
 
 
-data = read_json_file(credentials_path)
-data_wildfire = read_json_file(credentials_path_etl)
-
 # ============================================================================
 # CAMERAS CREATION
 # ============================================================================
 
-for camera in cameras.itertuples(index=False):
-    logging.info(f"saving camera : {camera.name}")
-    payload = {
-        "organization_id": camera.organization_id,
+
+def camera_payload(camera, orga_ids) -> dict:
+    return {
+        "organization_id": resolve_id(orga_ids, camera.organization_id, "organization"),
         "name": camera.name,
         "angle_of_view": camera.angle_of_view,
         "elevation": camera.elevation,
@@ -102,168 +113,490 @@ for camera in cameras.itertuples(index=False):
         "lon": camera.lon,
         "is_trustable": camera.is_trustable,
     }
-    id = api_request("post", f"{api_url}/cameras/", superuser_auth, payload)["id"]
+
+
+def create_camera(camera, headers, orga_ids, api_url) -> int:
+    logging.info(f"saving camera : {camera.name}")
+    payload = camera_payload(camera, orga_ids)
+    id = api_request("post", f"{api_url}/cameras/", headers, payload)["id"]
     logging.info(f"Caméra créé, id : {str(id)}")
-    result = api_request("post", f"{api_url}/cameras/{id}/token", superuser_auth)
+    return id
+
+
+def patch_camera(patch, headers, api_url) -> None:
+    route, payload = patch
+    logging.info(f"patching camera : {route} {payload}")
+    api_request("patch", f"{api_url}/cameras/{route}", headers, payload)
 
+
+def create_camera_token(camera_id, headers, api_url) -> str:
+    result = api_request("post", f"{api_url}/cameras/{camera_id}/token", headers)
     camera_token = result["access_token"]
-    logging.info(f"Token generated : {camera_token}")
-    for i, key in enumerate(data):
-        if data[key]["name"] == camera.name:
-            data[key]["token"] = camera_token
-    for i, key in enumerate(data_wildfire):
-        if data_wildfire[key]["name"] == camera.name:
-            data_wildfire[key]["token"] = camera_token
+    logging.debug(f"Token generated for camera {camera_id}")
+    return camera_token
 
-write_json_file(credentials_path, data)
-write_json_file(credentials_path_etl, data_wildfire)
 
 # ============================================================================
 # POSES CREATION
 # ============================================================================
 
-logging.info("creating poses")
-for pose in poses.itertuples(index=False):
-    payload = {
-        "camera_id": pose.camera_id,
-        "azimuth": pose.azimuth,
-        "patrol_id": pose.patrol_id,
-    }
-    api_request("post", f"{api_url}/poses/", superuser_auth, payload)
+
+def create_pose(payload, headers, api_url) -> dict:
+    pose_data = api_request("post", f"{api_url}/poses/", headers, payload)
+    return {**payload, **pose_data}
+
+
+def patch_pose(patch, headers, api_url) -> None:
+    pose_id, payload = patch
+    logging.info(f"patching pose {pose_id} : {payload}")
+    api_request("patch", f"{api_url}/poses/{pose_id}", headers, payload)
 
 
 # ============================================================================
 # CAMERA STATUS UPDATES AND POSE IMAGE UPLOADS
 # ============================================================================
 
-# Constants
-BASE_DIRECTORY = "data"
-SAMPLE_PATH = "last_image_cameras"
-IMAGES_URL = "https://github.com/pyronear/pyro-envdev/releases/download/v0.0.1/last_image_cameras.zip"
 
-# Predefined list of image filenames for pose images
-# (to be filled with actual filenames)
-POSE_IMAGE_FILES = [
-    "11-20251001151013-d6de7b82.jpg",
-    "17-20251001143249-dc04ad6f.jpg",
-    "22-20251001150858-6578cf9e.jpg",
-    "59-20251001151203-354621da.jpg",
-    "69-20251003170645-721ec72e.jpg",
-]
+def update_camera_status(
+    job,
+    token_cache,
+    journal,
+    base_url,
+) -> None:
+    camera_data, img_file = job
+    camera_id = camera_data["id"]
+    camera_name = camera_data["name"]
 
-# Cameras to skip for pose images (one per organization)
-# Format: {organization_id: camera_id_to_skip}
-CAMERAS_TO_SKIP_POSE_IMAGES = {
-    2: 8,  # Organization 2: skip camera 1 (videlles-01)
-    3: 14,  # Organization 3: skip camera 9 (brison-01)
-}
+    if journal.is_done("images", camera_id):
+        logging.info(f"Skipping camera {camera_name}, already done")
+        return
 
-# Download images if needed
-logging.info("Checking for image files...")
-download_images_if_needed(BASE_DIRECTORY, SAMPLE_PATH, IMAGES_URL)
+    logging.info(f"Processing camera {camera_name} (id: {camera_id})...")
 
-# Get all image files
-image_dir = os.path.join(BASE_DIRECTORY, SAMPLE_PATH)
-all_images = glob.glob(os.path.join(image_dir, "*.jpg"))
+    try:
+        # Reuse the token minted earlier in the run, cameras that are not in
+        # the CSVs still need one
+        camera_token = token_cache.get(camera_id, camera_name)
 
-if not all_images:
-    logging.warning(
-        "No images found in directory, skipping camera and pose image updates"
-    )
-else:
-    # Cycle images for camera last image updates
-    images_cycle = itertools.cycle(all_images)
-
-    # Prepare pose images
-    pose_images_full_paths = [
-        os.path.join(image_dir, fname)
-        for fname in POSE_IMAGE_FILES
-        if os.path.exists(os.path.join(image_dir, fname))
-    ]
+        camera_client = Client(camera_token, base_url)
 
-    if not pose_images_full_paths:
-        logging.warning("No valid pose images found in predefined list")
+        # Update heartbeat
+        camera_client.heartbeat()
+        logging.info(f"  ✓ Heartbeat updated ({camera_name})")
 
-    logging.info("Updating cameras (heartbeat, last image) and pose images...")
+        # Update camera last image
+        camera_client.update_last_image(encode_image(img_file))
+        logging.info(f"  ✓ Last image updated ({camera_name})")
 
-    # Create admin client once for all operations
-    admin_token = superuser_auth["Authorization"].replace("Bearer ", "")
-    admin_client = Client(admin_token, base_url)
+    except Exception as e:
+        # Cameras with a failure are retried by the next --resume run
+        logging.error(f"  Error processing camera {camera_name}: {e}")
+        return
 
-    # Fetch all cameras using pyroclient
-    cameras_response = admin_client.fetch_cameras().json()
+    journal.record("images", camera_id)
 
-    # Process each camera
-    for camera_data in cameras_response:
+
+def load_pose_images(paths) -> Dict[str, bytes]:
+    """Read each distinct pose image once, keyed on path."""
+    images = {}
+    for path in dict.fromkeys(paths):
+        with open(path, "rb") as f:
+            images[path] = f.read()
+    return images
+
+
+def plan_pose_images(cameras, new_poses, pose_images, cameras_to_skip) -> List:
+    """
+    Assign pose images to the new poses, as one ordered upload job per camera.
+
+    Returns:
+        List of (camera name, [(pose data, image bytes), ...]) jobs
+    """
+    jobs = []
+    for camera_data in cameras:
         camera_id = camera_data["id"]
         camera_name = camera_data["name"]
-        org_id = camera_data["organization_id"]
+        # Only newly created poses without an image yet need one
+        camera_poses = new_poses.get(camera_id, [])
+        if not camera_poses:
+            continue
+        if cameras_to_skip.get(camera_data["organization_id"]) == camera_id:
+            logging.info(f"  Skipping pose images of {camera_name} (org skip rule)")
+            continue
+        num_images = min(len(camera_poses), len(pose_images))
+        selected_images = random.sample(list(pose_images.values()), num_images)
+        jobs.append((camera_name, list(zip(camera_poses, selected_images))))
+    return jobs
+
+
+def upload_pose_images(job, admin_client, journal) -> Tuple[int, int, bool]:
+    """
+    Upload the pose images of a camera, in pose order.
+
+    Returns:
+        Number of uploaded images, uploaded bytes and whether one upload failed
+    """
+    camera_name, uploads = job
+    uploaded, uploaded_bytes, failed = 0, 0, False
+    for pose_data, image_data in uploads:
+        try:
+            response = admin_client.update_pose_image(pose_data["id"], image_data)
+            response.raise_for_status()
+            journal.record("pose_images", pose_data["id"])
+            uploaded += 1
+            uploaded_bytes += len(image_data)
+            logging.info(
+                f"✓ Pose {pose_data['id']} of {camera_name} "
+                f"(azimuth {pose_data['azimuth']})"
+            )
+        except Exception as e:
+            failed = True
+            logging.error(f"    ✗ Pose {pose_data['id']} of {camera_name}: {e}")
+    return uploaded, uploaded_bytes, failed
 
-        logging.info(f"Processing camera {camera_name} (id: {camera_id})...")
 
-        try:
-            result = api_request(
-                "post", f"{api_url}/cameras/{camera_id}/token", superuser_auth
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Seed the Pyronear dev stack")
+    parser.add_argument(
+        "--api-url",
+        default=os.environ.get("API_URL"),
+        help="API base URL, without /api/v1 (e.g. http://pyro_api:5050)",
+    )
+    parser.add_argument(
+        "--data-dir",
+        default=BASE_DIRECTORY,
+        help=(
+            "directory of the seed CSVs (csv/), the credentials files and the "
+            "camera images, which are only downloaded when missing"
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("INIT_WORKERS", 8)),
+        help="maximum number of concurrent requests within a stage (1 = serial)",
+    )
+    parser.add_argument(
+        "--executor",
+        choices=EXECUTORS,
+        default=os.environ.get("INIT_EXECUTOR", "thread"),
+        help="worker pool flavour used to run a stage",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=("sync", "full"),
+        default=os.environ.get("INIT_MODE", "sync"),
+        help=(
+            "sync: diff the CSVs against what already exists and only send the "
+            "needed creates and patches; full: POST every CSV row"
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=os.environ.get("INIT_RESUME", "").lower() in ("1", "true", "yes"),
+        help="skip the work recorded in the journal by a previous, interrupted run",
+    )
+    parser.add_argument(
+        "--journal",
+        default=os.environ.get("INIT_JOURNAL"),
+        help="append-only JSONL progress journal ({data dir}/init_journal.jsonl)",
+    )
+    parser.add_argument(
+        "--report",
+        default=os.environ.get("INIT_REPORT"),
+        help=(
+            "per-endpoint request timing report, .json or .csv "
+            "(default: {data dir}/init_report.json)"
+        ),
+    )
+    args = parser.parse_args(argv)
+    if not args.api_url:
+        parser.error("--api-url or the API_URL environment variable is required")
+    if args.journal is None:
+        args.journal = os.path.join(args.data_dir, "init_journal.jsonl")
+    if args.report is None:
+        args.report = os.path.join(args.data_dir, "init_report.json")
+    return args
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    # Every outgoing request is timed, the table is logged at the end
+    with instrument(args.report):
+        seed(args)
+
+
+def seed(args: argparse.Namespace) -> None:
+    # Base URL for the pyroclient Clients, /api/v1 for direct API requests
+    base_url = args.api_url.rstrip("/")
+    api_url = f"{base_url}/api/v1"
+
+    # Checked before any request, a bad row must not stop the run halfway
+    seed_data = load_seed_data(os.path.join(args.data_dir, "csv"), sub_path)
+
+    runner = StageRunner(workers=args.workers, executor=args.executor)
+    # One keep-alive connection per worker towards the API
+    configure_host(api_url, pool_maxsize=max(args.workers, 1))
+
+    superuser_token = get_token(
+        api_url, os.environ.get("SUPERADMIN_LOGIN"), os.environ.get("SUPERADMIN_PWD")
+    )
+    superuser_auth = {
+        "Authorization": f"Bearer {superuser_token}",
+        "Content-Type": "application/json",
+    }
+
+    # A full run is a sync against an empty API
+    if args.mode == "sync":
+        snapshot = fetch_snapshot(
+            api_url,
+            superuser_auth,
+            lambda func, items: runner.run("fetch poses", func, items),
+        )
+    else:
+        snapshot = Snapshot()
+
+    # Entities created by an interrupted run count as existing ones
+    journal = Journal(args.journal, resume=args.resume)
+    for name, orga_id in journal.entries("organizations").items():
+        snapshot.organizations.setdefault(name, {"id": orga_id, "name": name})
+    for login in journal.entries("users"):
+        snapshot.users.setdefault(login, {"login": login})
+    for name, camera_id in journal.entries("cameras").items():
+        snapshot.cameras.setdefault(name, {"id": camera_id, "name": name})
+    for pose_data in journal.entries("poses").values():
+        key = pose_key(pose_data["camera_id"], pose_data["azimuth"])
+        snapshot.poses.setdefault(key, pose_data)
+
+    # Orgs first: users and cameras reference them
+    orga_rows = seed_data.organizations
+    missing_orgas = [o for o in orga_rows if o.name not in snapshot.organizations]
+    created_orga_ids = runner.run(
+        "organizations",
+        journal.wrap(
+            "organizations",
+            lambda orga: orga.name,
+            partial(create_organization, headers=superuser_auth, api_url=api_url),
+        ),
+        missing_orgas,
+    )
+    journal.complete("organizations")
+    created = dict(zip((o.name for o in missing_orgas), created_orga_ids))
+    # The admin organization is created by the API, the CSV rows come next
+    orga_ids = {
+        ADMIN_ORGA_ID: ADMIN_ORGA_ID,
+        **serial_id_map(
+            [
+                snapshot.organizations[o.name]["id"]
+                if o.name in snapshot.organizations
+                else created[o.name]
+                for o in orga_rows
+            ],
+            first_id=ADMIN_ORGA_ID + 1,
+        ),
+    }
+
+    # Users and cameras only depend on orgs, so they share a stage
+    camera_rows = seed_data.cameras
+    missing_users = [
+        user for user in seed_data.users if user.login not in snapshot.users
+    ]
+    missing_cameras = [c for c in camera_rows if c.name not in snapshot.cameras]
+    patches = [
+        patch
+        for c in camera_rows
+        if c.name in snapshot.cameras
+        for patch in camera_patches(
+            snapshot.cameras[c.name]["id"],
+            camera_payload(c, orga_ids),
+            snapshot.cameras[c.name],
+        )
+    ]
+
+    def create_user_or_camera(item):
+        kind, row = item
+        if kind == "user":
+            create_user(row, superuser_auth, orga_ids, api_url)
+            journal.record("users", row.login)
+        elif kind == "patch":
+            patch_camera(row, superuser_auth, api_url)
+        else:
+            camera_id = create_camera(row, superuser_auth, orga_ids, api_url)
+            journal.record("cameras", row.name, camera_id)
+            return camera_id
+
+    results = runner.run(
+        "users/cameras",
+        create_user_or_camera,
+        [("camera", camera) for camera in missing_cameras]
+        + [("user", user) for user in missing_users]
+        + [("patch", patch) for patch in patches],
+    )
+    journal.complete("users/cameras")
+    created = dict(zip((c.name for c in missing_cameras), results))
+    camera_row_ids = [
+        snapshot.cameras[c.name]["id"]
+        if c.name in snapshot.cameras
+        else created[c.name]
+        for c in camera_rows
+    ]
+    camera_ids = serial_id_map(camera_row_ids)
+
+    # One token per camera and per run, reused by the status updates below.
+    # Always minted here: tokens cached by a previous stack may have been
+    # signed with another secret.
+    mint = partial(create_camera_token, headers=superuser_auth, api_url=api_url)
+    tokens = runner.run("tokens", mint, camera_row_ids)
+    # Stored for the engine, the ETL and the notebooks
+    token_cache = CameraTokenCache(
+        mint=mint,
+        api_url=api_url,
+        credentials_paths=(
+            os.path.join(args.data_dir, "credentials.json"),
+            os.path.join(args.data_dir, "credentials-wildfire.json"),
+        ),
+        cache_path=os.path.join(args.data_dir, "camera_tokens.json"),
+    )
+    token_cache.put_many(
+        (camera_id, camera.name, token)
+        for camera_id, camera, token in zip(camera_row_ids, camera_rows, tokens)
+    )
+
+    logging.info("creating poses")
+    pose_creates, pose_patches = [], []
+    for pose in seed_data.poses:
+        payload = {
+            "camera_id": resolve_id(camera_ids, pose.camera_id, "camera"),
+            "azimuth": pose.azimuth,
+            "patrol_id": pose.patrol_id,
+        }
+        existing = snapshot.poses.get(pose_key(payload["camera_id"], pose.azimuth))
+        patch = pose_patch(payload, existing)
+        if existing is None:
+            pose_creates.append(payload)
+        elif patch is not None:
+            pose_patches.append((existing["id"], patch))
+
+    runner.run(
+        "poses",
+        journal.wrap(
+            "poses",
+            lambda payload: f"{payload['camera_id']}:{payload['azimuth']}",
+            partial(create_pose, headers=superuser_auth, api_url=api_url),
+        ),
+        pose_creates,
+    )
+    if pose_patches:
+        runner.run(
+            "pose patches",
+            partial(patch_pose, headers=superuser_auth, api_url=api_url),
+            pose_patches,
+        )
+    journal.complete("poses")
+
+    # Poses created by this run, or by an interrupted one, still lacking an image
+    new_poses = {}
+    for pose_data in journal.entries("poses").values():
+        if not journal.is_done("pose_images", pose_data["id"]):
+            new_poses.setdefault(pose_data["camera_id"], []).append(pose_data)
+    logging.info(
+        f"{len(pose_creates)} poses created, {len(pose_patches)} patched, "
+        f"{len(seed_data.poses) - len(pose_creates) - len(pose_patches)} up to date"
+    )
+
+    # Download images if needed
+    logging.info("Checking for image files...")
+    download_images_if_needed(args.data_dir, SAMPLE_PATH, IMAGES_URL, IMAGES_SHA256)
+
+    # Get all image files
+    image_dir = os.path.join(args.data_dir, SAMPLE_PATH)
+    all_images = glob.glob(os.path.join(image_dir, "*.jpg"))
+
+    if journal.is_complete("images"):
+        logging.info("Camera and pose image updates already done, skipping")
+    elif not all_images:
+        logging.warning(
+            "No images found in directory, skipping camera and pose image updates"
+        )
+    else:
+        # Prepare pose images, each one read from disk once
+        pose_images = load_pose_images(
+            os.path.join(image_dir, fname)
+            for fname in POSE_IMAGE_FILES
+            if os.path.exists(os.path.join(image_dir, fname))
+        )
+
+        if not pose_images:
+            logging.warning("No valid pose images found in predefined list")
+
+        logging.info("Updating cameras (heartbeat, last image)...")
+
+        # Create admin client once for all operations
+        admin_token = superuser_auth["Authorization"].replace("Bearer ", "")
+        admin_client = Client(admin_token, base_url)
+
+        # Fetch all cameras using pyroclient
+        response = admin_client.fetch_cameras()
+        response.raise_for_status()
+        cameras_response = response.json()
+
+        # Cycle images for camera last image updates, assigned up front so
+        # that workers do not share the iterator
+        runner.run(
+            "images",
+            partial(
+                update_camera_status,
+                token_cache=token_cache,
+                journal=journal,
+                base_url=base_url,
+            ),
+            zip(cameras_response, itertools.cycle(all_images)),
+        )
+
+        # Skip rules are written against serial IDs as well
+        cameras_to_skip = {
+            resolve_id(orga_ids, org_id, "organization"): resolve_id(
+                camera_ids, camera_id, "camera"
             )
-            camera_token = result["access_token"]
-
-            camera_client = Client(camera_token, base_url)
-
-            # Update heartbeat
-            camera_client.heartbeat()
-            logging.info("  ✓ Heartbeat updated")
-
-            # Update camera last image
-            img_file = next(images_cycle)
-            stream = io.BytesIO()
-            im = Image.open(img_file)
-            im.save(stream, format="JPEG", quality=80)
-            stream.seek(0)
-            camera_client.update_last_image(stream.getvalue())
-            logging.info("  ✓ Last image updated")
-
-            # Fetch camera details including poses
-            camera_details = requests.get(
-                f"{api_url}/cameras/{camera_id}", headers=superuser_auth, timeout=10
-            ).json()
-
-            camera_poses = camera_details.get("poses", [])
-
-            if not camera_poses:
-                logging.info("  No poses for this camera")
-            elif CAMERAS_TO_SKIP_POSE_IMAGES.get(org_id) == camera_id:
-                logging.info(f"  Skipping pose images (org {org_id} skip rule)")
-            elif not pose_images_full_paths:
-                logging.info("  No pose images available")
-            else:
-                # Upload pose images
-                num_poses = len(camera_poses)
-                num_images = min(num_poses, len(pose_images_full_paths))
-                selected_images = random.sample(pose_images_full_paths, num_images)
-
-                logging.info(f"  Uploading {num_images} pose images...")
-                for pose_data, image_path in zip(camera_poses, selected_images):
-                    try:
-                        with open(image_path, "rb") as f:
-                            image_data = f.read()
-
-                        # time.sleep(2)
-                        admin_client.update_pose_image(pose_data["id"], image_data)
-                        logging.info(
-                            f"✓ Pose {pose_data['id']} (azimuth {pose_data['azimuth']})"
-                        )
-                    except Exception as e:
-                        logging.error(f"    ✗ Pose {pose_data['id']}: {e}")
-
-            logging.info(f"  Completed camera {camera_name}")
+            for org_id, camera_id in CAMERAS_TO_SKIP_POSE_IMAGES.items()
+        }
+        pose_jobs = (
+            plan_pose_images(cameras_response, new_poses, pose_images, cameras_to_skip)
+            if pose_images
+            else []
+        )
 
-        except Exception as e:
-            logging.error(f"  Error processing camera {camera_name}: {e}")
-            continue
+        # Cameras upload concurrently, the poses of a camera one after another
+        logging.info(f"Uploading pose images for {len(pose_jobs)} cameras...")
+        results = runner.run(
+            "pose images",
+            partial(upload_pose_images, admin_client=admin_client, journal=journal),
+            pose_jobs,
+        )
+        uploaded = sum(result[0] for result in results)
+        uploaded_mb = sum(result[1] for result in results) / 1e6
+        elapsed = runner.timings.get("pose images", 0.0)
+        if uploaded and elapsed:
+            logging.info(
+                f"{uploaded} pose images uploaded ({uploaded_mb:.1f} MB): "
+                f"{uploaded / elapsed:.1f} images/s, {uploaded_mb / elapsed:.2f} MB/s"
+            )
+
+        if not any(result[2] for result in results) and all(
+            journal.is_done("images", c["id"]) for c in cameras_response
+        ):
+            journal.complete("images")
+
+        logging.info("All camera and pose updates completed")
+
+    journal.close()
+    runner.report()
+    logging.info("Initialization script completed successfully")
 
-    logging.info("All camera and pose updates completed")
 
-logging.info("Initialization script completed successfully")
+if __name__ == "__main__":
+    main()
 
 # Load environment variables from .env file
 # load_dotenv()
@@ -0,0 +1,139 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Progress journal for the initialization script.
+Records every completed entity and stage as one JSON line, so that an
+interrupted run can be resumed without redoing the work already done.
+
+Entity line: {"stage": "cameras", "key": "videlles-01", "value": 1, "ts": ...}
+Stage line:  {"stage": "cameras", "complete": true, "ts": ...}
+"""
+
+from typing import Any, Callable, Dict, Hashable, Optional
+import json
+import logging
+import os
+import threading
+import time
+
+DEFAULT_JOURNAL_PATH = "data/init_journal.jsonl"
+
+
+class Journal:
+    """
+    Append-only JSONL progress journal.
+
+    Args:
+        path: Journal file location
+        resume: Keep the entries of the previous run instead of starting over
+    """
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH, resume: bool = False) -> None:
+        self.path = path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._complete = set()
+        self._lock = threading.Lock()
+
+        if resume and os.path.isfile(path):
+            self._load()
+            logging.info(
+                f"Resuming from {path}: "
+                + ", ".join(f"{stage}={len(e)}" for stage, e in self._entries.items())
+            )
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Line buffered: every record reaches the OS as soon as it is written
+        self._file = open(path, "a" if resume else "w", buffering=1)
+        if resume and self._file.tell() > 0 and not self._ends_with_newline():
+            self._file.write("\n")
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as file:
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) == b"\n"
+
+    def _load(self) -> None:
+        with open(self.path, "r") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Last line of a killed run may be truncated
+                    continue
+                if entry.get("complete"):
+                    self._complete.add(entry["stage"])
+                else:
+                    self._entries.setdefault(entry["stage"], {})[entry["key"]] = entry[
+                        "value"
+                    ]
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        entry["ts"] = time.time()
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+
+    def record(self, stage: str, key: Hashable, value: Any = None) -> None:
+        """
+        Record that an entity of a stage is done.
+
+        Args:
+            stage: Stage name
+            key: Natural key of the entity, stored as a string
+            value: JSON-serializable result to keep (e.g. the created ID)
+        """
+        key = str(key)
+        with self._lock:
+            self._entries.setdefault(stage, {})[key] = value
+        self._write({"stage": stage, "key": key, "value": value})
+
+    def complete(self, stage: str) -> None:
+        """Record that a whole stage is done."""
+        self._complete.add(stage)
+        self._write({"stage": stage, "complete": True})
+
+    def is_done(self, stage: str, key: Hashable) -> bool:
+        """Tell whether an entity was recorded for a stage."""
+        return str(key) in self._entries.get(stage, {})
+
+    def is_complete(self, stage: str) -> bool:
+        """Tell whether a whole stage was recorded as done."""
+        return stage in self._complete
+
+    def entries(self, stage: str) -> Dict[str, Any]:
+        """Return the recorded values of a stage, keyed on entity key."""
+        return dict(self._entries.get(stage, {}))
+
+    def wrap(
+        self,
+        stage: str,
+        key_func: Callable[[Any], Hashable],
+        func: Callable[[Any], Any],
+        value_func: Optional[Callable[[Any], Any]] = None,
+    ) -> Callable[[Any], Any]:
+        """
+        Wrap a stage function so that each successful call gets recorded.
+
+        Args:
+            stage: Stage name
+            key_func: Computes the entity key from the stage item
+            func: Stage function
+            value_func: Computes the recorded value from the result,
+                defaults to the result itself
+
+        Returns:
+            Wrapped stage function
+        """
+
+        def wrapper(item: Any) -> Any:
+            result = func(item)
+            value = value_func(result) if value_func else result
+            self.record(stage, key_func(item), value)
+            return result
+
+        return wrapper
+
+    def close(self) -> None:
+        self._file.close()
@@ -0,0 +1,309 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Seed data loader for the initialization script.
+Streams the seed tables (data/csv/API_DATA{sub_path} - {table}.csv, or .parquet
+next to it for large synthetic fleets) into typed records, and checks them
+before any request is sent: values are parsed against the record types, natural
+keys are unique and every reference points to an existing row.
+
+References use the IDs a serial run assigns on a fresh database, i.e. the
+position of the referenced row in its CSV (the id column is not used):
+    users, cameras -> organizations: 1 is the admin organization created by
+        the API, the n-th CSV row gets n + 1
+    poses -> cameras: the n-th CSV row gets n
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Type, Union
+import csv
+import importlib.util
+import logging
+import os
+import typing
+from dataclasses import dataclass, fields
+
+__all__ = [
+    "Camera",
+    "Organization",
+    "Pose",
+    "SeedData",
+    "SeedDataError",
+    "User",
+    "check_integrity",
+    "load_seed_data",
+    "read_records",
+    "table_path",
+]
+
+ADMIN_ORGA_ID = 1
+MAX_REPORTED_ERRORS = 20
+PARQUET_BATCH_SIZE = 65536
+
+
+class SeedDataError(ValueError):
+    """Raised when the seed data cannot be parsed or is inconsistent."""
+
+    def __init__(self, errors: List[str]) -> None:
+        self.errors = errors
+        shown = errors[:MAX_REPORTED_ERRORS]
+        more = len(errors) - len(shown)
+        super().__init__(
+            f"{len(errors)} seed data error(s):\n  "
+            + "\n  ".join(shown)
+            + (f"\n  ... and {more} more" if more else "")
+        )
+
+
+@dataclass(frozen=True)
+class Organization:
+    id: int
+    name: str
+
+
+@dataclass(frozen=True)
+class User:
+    id: int
+    organization_id: int
+    password: str
+    login: str
+    role: str
+
+
+@dataclass(frozen=True)
+class Camera:
+    id: int
+    organization_id: int
+    name: str
+    angle_of_view: float
+    elevation: float
+    lat: float
+    lon: float
+    is_trustable: bool
+
+
+@dataclass(frozen=True)
+class Pose:
+    id: int
+    camera_id: int
+    azimuth: float
+    patrol_id: Optional[int]
+
+
+Record = Union[Organization, User, Camera, Pose]
+
+TABLES: Dict[str, Type[Record]] = {
+    "organizations": Organization,
+    "users": User,
+    "cameras": Camera,
+    "poses": Pose,
+}
+
+
+@dataclass(frozen=True)
+class SeedData:
+    """Validated seed tables, in file order."""
+
+    organizations: List[Organization]
+    users: List[User]
+    cameras: List[Camera]
+    poses: List[Pose]
+
+
+def _parse_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "1", "yes"):
+        return True
+    if text in ("false", "0", "no"):
+        return False
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def _parse_int(value: Any) -> int:
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError(f"not an integer: {value!r}")
+    return int(number)
+
+
+_PARSERS: Dict[Any, Callable[[Any], Any]] = {
+    int: _parse_int,
+    float: float,
+    str: str,
+    bool: _parse_bool,
+}
+
+
+def _converters(record_type: Type[Record]) -> Dict[str, Callable[[Any], Any]]:
+    """Parser of each field, empty values being None for Optional fields only."""
+    converters = {}
+    for item in fields(record_type):
+        # Optional[X] is Union[X, None]
+        args = [arg for arg in typing.get_args(item.type) if arg is not type(None)]
+        optional = bool(args)
+        parse = _PARSERS[args[0] if optional else item.type]
+
+        def convert(value, parse=parse, optional=optional, name=item.name):
+            if value is None or (isinstance(value, str) and not value.strip()):
+                if optional:
+                    return None
+                raise ValueError(f"{name} is required")
+            return parse(value.strip() if isinstance(value, str) else value)
+
+        converters[item.name] = convert
+    return converters
+
+
+def _csv_rows(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", newline="", encoding="utf-8") as file:
+        yield from csv.DictReader(file)
+
+
+def _parquet_rows(path: str) -> Iterator[Dict[str, Any]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise SeedDataError([f"{path}: reading Parquet needs pyarrow"]) from e
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=PARQUET_BATCH_SIZE):
+        yield from batch.to_pylist()
+
+
+def read_records(path: str, record_type: Type[Record]) -> Iterator[Record]:
+    """
+    Stream the rows of a CSV or Parquet file as typed records.
+
+    Extra columns (e.g. created_at) are ignored.
+
+    Args:
+        path: File path, read as Parquet if it ends with .parquet
+        record_type: Record class of the rows
+
+    Yields:
+        One record per row
+
+    Raises:
+        SeedDataError: on a missing column or an invalid value
+    """
+    converters = _converters(record_type)
+    rows = _parquet_rows(path) if path.endswith(".parquet") else _csv_rows(path)
+    errors = []
+    # Line numbers as in an editor, the header being line 1
+    for line, row in enumerate(rows, start=2):
+        missing = [name for name in converters if name not in row]
+        if missing:
+            raise SeedDataError([f"{path}: missing column(s) {missing}"])
+        try:
+            yield record_type(
+                **{name: convert(row[name]) for name, convert in converters.items()}
+            )
+        except (TypeError, ValueError) as e:
+            errors.append(f"{path}:{line}: {e}")
+    if errors:
+        raise SeedDataError(errors)
+
+
+def table_path(csv_dir: str, sub_path: str, table: str) -> str:
+    """
+    Path of a seed table.
+
+    The Parquet file wins over the CSV one when pyarrow is installed; without
+    it the CSV is read, and a Parquet-only table fails with a clear error.
+    """
+    base = os.path.join(csv_dir, f"API_DATA{sub_path} - {table}")
+    parquet, csv_path = f"{base}.parquet", f"{base}.csv"
+    if not os.path.isfile(parquet):
+        return csv_path
+    if importlib.util.find_spec("pyarrow") is None and os.path.isfile(csv_path):
+        logging.warning(f"{parquet}: pyarrow is not installed, reading {csv_path}")
+        return csv_path
+    return parquet
+
+
+def _duplicates(keys: List[Any]) -> List[Any]:
+    seen, duplicates = set(), []
+    for key in keys:
+        if key in seen:
+            duplicates.append(key)
+        seen.add(key)
+    return duplicates
+
+
+def check_integrity(data: SeedData) -> List[str]:
+    """
+    List the consistency errors of the seed data.
+
+    Args:
+        data: Parsed seed tables
+
+    Returns:
+        Error messages, empty when the data is consistent
+    """
+    errors = []
+    for table, key in (
+        ("organizations", lambda o: o.name),
+        ("users", lambda u: u.login),
+        ("cameras", lambda c: c.name),
+        ("poses", lambda p: (p.camera_id, round(p.azimuth, 2))),
+    ):
+        for duplicate in _duplicates([key(row) for row in getattr(data, table)]):
+            errors.append(f"{table}: duplicate {duplicate!r}")
+
+    orga_ids = range(ADMIN_ORGA_ID, ADMIN_ORGA_ID + len(data.organizations) + 1)
+    for table in ("users", "cameras"):
+        for row in getattr(data, table):
+            if row.organization_id not in orga_ids:
+                name = row.login if table == "users" else row.name
+                errors.append(
+                    f"{table}: {name} references unknown organization "
+                    f"{row.organization_id}"
+                )
+    n_cameras = len(data.cameras)
+    for pose in data.poses:
+        if not 1 <= pose.camera_id <= n_cameras:
+            errors.append(
+                f"poses: pose {pose.id} references camera {pose.camera_id}, "
+                f"only {n_cameras} cameras"
+            )
+    return errors
+
+
+def load_seed_data(csv_dir: str = "data/csv", sub_path: str = "_DEV") -> SeedData:
+    """
+    Load and check the seed tables.
+
+    Args:
+        csv_dir: Directory of the seed tables
+        sub_path: Dataset suffix, e.g. "_DEV" or "_FLEET"
+
+    Returns:
+        Validated seed data
+
+    Raises:
+        SeedDataError: listing every parsing and consistency error found
+    """
+    tables, errors = {}, []
+    for table, record_type in TABLES.items():
+        path = table_path(csv_dir, sub_path, table)
+        try:
+            tables[table] = list(read_records(path, record_type))
+        except FileNotFoundError:
+            errors.append(f"{path}: not found")
+        except SeedDataError as e:
+            errors.extend(e.errors)
+    if errors:
+        raise SeedDataError(errors)
+
+    data = SeedData(**tables)
+    errors = check_integrity(data)
+    if errors:
+        raise SeedDataError(errors)
+    logging.info(
+        "Seed data: "
+        + ", ".join(f"{len(getattr(data, table))} {table}" for table in TABLES)
+    )
+    return data
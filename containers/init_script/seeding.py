@@ -0,0 +1,143 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Concurrent seeding engine for the initialization script.
+Runs the independent requests of a seeding stage through a bounded worker pool
+and keeps track of the wall-clock time spent in each stage.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+EXECUTORS = ("thread", "asyncio")
+
+
+def serial_id_map(row_ids: List[int], first_id: int = 1) -> Dict[int, int]:
+    """
+    Map the IDs a serial run would have assigned to the IDs actually assigned.
+
+    The seed CSVs reference organizations and cameras by the ID they get when
+    rows are created one by one, in file order, on a fresh database: the row at
+    position i gets first_id + i. The actual IDs differ when a stage runs
+    concurrently, or when the rows already exist on the stack, so references
+    have to be translated through this mapping.
+
+    Args:
+        row_ids: Actual IDs (from the snapshot, the journal or the create
+            response), in CSV row order
+        first_id: Serial ID of the first row
+
+    Returns:
+        Dictionary mapping serial-equivalent ID to actual ID
+    """
+    return {first_id + position: row_id for position, row_id in enumerate(row_ids)}
+
+
+def resolve_id(id_map: Dict[int, int], serial_id: int, table: str) -> int:
+    """
+    Translate a serial ID referenced by the seed data to the actual ID.
+
+    Args:
+        id_map: Mapping built by serial_id_map
+        serial_id: ID referenced by a seed row
+        table: Referenced table, for the error message
+
+    Returns:
+        Actual ID of the referenced row
+
+    Raises:
+        ValueError: if no seed row gets this serial ID
+    """
+    try:
+        return id_map[serial_id]
+    except KeyError:
+        raise ValueError(
+            f"{table} {serial_id} is referenced but no seed row gets this ID"
+        ) from None
+
+
+class StageRunner:
+    """
+    Run seeding stages through a bounded worker pool.
+
+    Stages are executed one after the other, so the dependency order between
+    them (orgs -> users/cameras -> tokens -> poses -> images) is preserved,
+    while the items of a single stage are processed concurrently.
+
+    Args:
+        workers: Maximum number of requests in flight within a stage
+        executor: "thread" for a thread pool, "asyncio" for an event loop
+            dispatching the blocking calls to threads under a semaphore
+    """
+
+    def __init__(self, workers: int = 1, executor: str = "thread") -> None:
+        if executor not in EXECUTORS:
+            raise ValueError(f"executor must be one of {EXECUTORS}, got {executor}")
+        self.workers = max(1, workers)
+        self.executor = executor
+        self.timings: Dict[str, float] = {}
+
+    def run(
+        self, name: str, func: Callable[[Any], Any], items: Iterable[Any]
+    ) -> List[Any]:
+        """
+        Apply func to every item of a stage and return results in item order.
+
+        The first exception raised by func aborts the stage and is propagated.
+
+        Args:
+            name: Stage name used for logging and timing report
+            func: Callable processing one item
+            items: Items of the stage
+
+        Returns:
+            List of func results, in the same order as items
+        """
+        items = list(items)
+        logging.info(f"[{name}] starting ({len(items)} items)")
+        start = time.perf_counter()
+
+        if self.workers == 1 or len(items) <= 1:
+            results = [func(item) for item in items]
+        elif self.executor == "asyncio":
+            results = asyncio.run(self._run_async(func, items))
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(func, items))
+
+        elapsed = time.perf_counter() - start
+        self.timings[name] = self.timings.get(name, 0.0) + elapsed
+        logging.info(f"[{name}] done in {elapsed:.2f}s")
+        return results
+
+    async def _run_async(
+        self, func: Callable[[Any], Any], items: List[Any]
+    ) -> List[Any]:
+        # The default executor is sized on CPU count, not on the requested pool
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=self.workers)
+        )
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def bounded(item: Any) -> Any:
+            async with semaphore:
+                return await asyncio.to_thread(func, item)
+
+        return await asyncio.gather(*(bounded(item) for item in items))
+
+    def report(self) -> None:
+        """Log the wall-clock time of every stage run so far."""
+        total = sum(self.timings.values())
+        logging.info(
+            f"Stage timings ({self.workers} workers, {self.executor} executor):"
+        )
+        for name, elapsed in self.timings.items():
+            logging.info(f"  {name:<20} {elapsed:8.2f}s")
+        logging.info(f"  {'total':<20} {total:8.2f}s")
@@ -0,0 +1,169 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Incremental seeding helpers for the initialization script.
+Fetches what already exists in the API once and diffs it against the seed
+CSVs on natural keys, so that only the missing creates and the needed patches
+are sent.
+
+Natural keys:
+    organizations: name
+    users: login
+    cameras: name
+    poses: (camera_id, azimuth)
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+from dataclasses import dataclass, field
+
+from utils import api_request
+
+# Camera fields that can be patched on an existing camera, grouped by route
+CAMERA_PATCH_ROUTES = {
+    "location": ("lat", "lon", "elevation"),
+}
+CAMERA_FIELDS = ("angle_of_view", "elevation", "lat", "lon", "is_trustable")
+FLOAT_TOLERANCE = 1e-6
+
+PoseKey = Tuple[int, float]
+
+
+def pose_key(camera_id: int, azimuth: float) -> PoseKey:
+    """Build the natural key of a pose."""
+    return int(camera_id), round(float(azimuth), 2)
+
+
+@dataclass
+class Snapshot:
+    """State of the API at the beginning of a run, indexed on natural keys."""
+
+    organizations: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    users: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    cameras: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    poses: Dict[PoseKey, Dict[str, Any]] = field(default_factory=dict)
+
+
+def fetch_snapshot(
+    api_url: str,
+    headers: Dict[str, str],
+    map_func: Optional[
+        Callable[[Callable[[Any], Any], Iterable[Any]], List[Any]]
+    ] = None,
+) -> Snapshot:
+    """
+    Fetch existing organizations, users, cameras and poses.
+
+    Poses are read from the camera listing. If the listing does not embed
+    them, every camera is fetched individually through map_func.
+
+    Args:
+        api_url: API URL with /api/v1
+        headers: Superadmin request headers
+        map_func: Optional callable(func, items) used to fetch camera details
+            concurrently, defaults to a serial map
+
+    Returns:
+        Snapshot of the API state
+    """
+    map_func = map_func or (lambda func, items: [func(item) for item in items])
+
+    organizations = api_request("get", f"{api_url}/organizations/", headers)
+    users = api_request("get", f"{api_url}/users/", headers)
+    cameras = api_request("get", f"{api_url}/cameras/", headers)
+
+    missing_poses = [camera for camera in cameras if "poses" not in camera]
+    if missing_poses:
+        details = map_func(
+            lambda camera: api_request(
+                "get", f"{api_url}/cameras/{camera['id']}", headers
+            ),
+            missing_poses,
+        )
+        for camera, detail in zip(missing_poses, details):
+            camera["poses"] = detail.get("poses", [])
+
+    snapshot = Snapshot(
+        organizations={orga["name"]: orga for orga in organizations},
+        users={user["login"]: user for user in users},
+        cameras={camera["name"]: camera for camera in cameras},
+        poses={
+            pose_key(camera["id"], pose["azimuth"]): {
+                **pose,
+                "camera_id": camera["id"],
+            }
+            for camera in cameras
+            for pose in camera["poses"]
+        },
+    )
+    logging.info(
+        f"Existing state: {len(snapshot.organizations)} orgs, "
+        f"{len(snapshot.users)} users, {len(snapshot.cameras)} cameras, "
+        f"{len(snapshot.poses)} poses"
+    )
+    return snapshot
+
+
+def _differs(expected: Any, actual: Any) -> bool:
+    if isinstance(expected, float) or isinstance(actual, float):
+        try:
+            return abs(float(expected) - float(actual)) > FLOAT_TOLERANCE
+        except (TypeError, ValueError):
+            return True
+    return expected != actual
+
+
+def camera_patches(
+    camera_id: int, expected: Dict[str, Any], existing: Dict[str, Any]
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    List the patches needed to bring an existing camera in line with the CSV.
+
+    Args:
+        camera_id: API ID of the camera
+        expected: Camera payload built from the CSV row
+        existing: Camera as returned by the API
+
+    Returns:
+        List of (route suffix, payload) to PATCH on /cameras/{camera_id}
+    """
+    drifted = {
+        key
+        for key in CAMERA_FIELDS
+        if key in existing and _differs(expected[key], existing[key])
+    }
+    patches = []
+    for route, keys in CAMERA_PATCH_ROUTES.items():
+        if drifted.intersection(keys):
+            patches.append(
+                (f"{camera_id}/{route}", {key: expected[key] for key in keys})
+            )
+            drifted.difference_update(keys)
+    if drifted:
+        logging.warning(
+            f"Camera {expected['name']} differs from CSV on {sorted(drifted)}, "
+            "which cannot be patched: reset the stack to apply"
+        )
+    return patches
+
+
+def pose_patch(
+    expected: Dict[str, Any], existing: Optional[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """
+    Return the PATCH payload needed for an existing pose, if any.
+
+    Args:
+        expected: Pose payload built from the CSV row
+        existing: Pose as returned by the API
+
+    Returns:
+        Payload to PATCH on /poses/{id}, or None when nothing changed
+    """
+    if existing is None or existing.get("patrol_id") == expected["patrol_id"]:
+        return None
+    return {"patrol_id": expected["patrol_id"]}
@@ -11,11 +11,11 @@ Provides helper functions for API communication, file I/O, and image management.
 
 from typing import Any, Dict, Optional
 import os
-import io
 import json
 import logging
-import zipfile
-import requests
+
+from archive import fetch_and_extract
+from http_client import api_request as _api_request, get_session
 
 
 def get_token(api_url: str, login: str, pwd: str) -> str:
@@ -30,7 +30,7 @@ def get_token(api_url: str, login: str, pwd: str) -> str:
     Returns:
         Access token string
     """
-    response = requests.post(
+    response = get_session().post(
         f"{api_url}/login/creds",
         data={"username": login, "password": pwd},
         timeout=5,
@@ -57,16 +57,11 @@ def api_request(
 
     Returns:
         JSON response data
-    """
-    kwargs = {"json": payload} if isinstance(payload, dict) else {}
 
-    response = getattr(requests, method_type)(route, headers=headers, **kwargs)
-    try:
-        detail = response.json()
-    except (requests.exceptions.JSONDecodeError, KeyError):
-        detail = response.text
-    assert response.status_code // 100 == 2, print(detail)
-    return response.json()
+    Raises:
+        APIError: if the response status code is not 2xx
+    """
+    return _api_request(method_type, route, headers, payload)
 
 
 def read_json_file(file_path: str) -> Dict[str, Any]:
@@ -95,30 +90,26 @@ def write_json_file(file_path: str, data: Dict[str, Any]) -> None:
         json.dump(data, file, indent=4)
 
 
-def download_images_if_needed(base_directory: str, sample_path: str, url: str) -> None:
+def download_images_if_needed(
+    base_directory: str, sample_path: str, url: str, sha256: Optional[str] = None
+) -> None:
     """
     Download and extract images if directory doesn't exist.
 
+    The zip is extracted while it downloads, without being held in memory.
+    A local path or a PYRO_ASSETS_MIRROR entry is used instead of the URL
+    when available.
+
     Args:
         base_directory: Base directory for images (e.g., "data")
         sample_path: Subdirectory name (e.g., "last_image_cameras")
         url: URL to download zip file from
+        sha256: Expected SHA-256 of the zip file, not checked if None
     """
     full_path = os.path.join(base_directory, sample_path)
     if not os.path.isdir(full_path):
         logging.info(f"Images not found at {full_path}, downloading...")
-
-        # Download the zip file
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-
-        # Create parent directory if it doesn't exist
-        os.makedirs(base_directory, exist_ok=True)
-
-        # Extract the zip file
-        zip_content = zipfile.ZipFile(io.BytesIO(response.content))
-        zip_content.extractall(base_directory)
-
+        fetch_and_extract(url, base_directory, sha256=sha256)
         logging.info(f"Images downloaded and extracted to {full_path}")
     else:
         logging.info(f"Directory {sample_path} exists, skipping download")
@@ -0,0 +1,233 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Readiness gate of the init container.
+Polls the API (/status), Postgres and MinIO (/minio/health/ready) concurrently
+with a fast exponential backoff, and returns as soon as all of them answer, so
+that seeding starts on real readiness rather than on the next healthcheck
+cycle. The time each dependency took to come up is logged.
+
+    python wait_for_stack.py && python init_script.py
+    python wait_for_stack.py -- python init_script.py
+"""
+
+from typing import Callable, Dict, List, Optional
+import argparse
+import logging
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+import requests
+
+__all__ = [
+    "Dependency",
+    "DeadlineExceeded",
+    "check_http",
+    "check_postgres",
+    "wait_for",
+    "wait_for_stack",
+]
+
+DEFAULT_TIMEOUT = 180.0  # seconds for the whole stack to come up
+INITIAL_DELAY = 0.05
+MAX_DELAY = 2.0
+PROBE_TIMEOUT = 2.0
+# SSLRequest: the first message of a Postgres session, which the server only
+# answers (with "S" or "N") once it accepts connections
+_PG_SSL_REQUEST = struct.pack("!ii", 8, 80877103)
+
+
+class DeadlineExceeded(RuntimeError):
+    """Raised when dependencies are still down at the deadline."""
+
+    def __init__(self, pending: Dict[str, str]) -> None:
+        self.pending = pending
+        super().__init__(
+            "not ready: "
+            + ", ".join(f"{name} ({error})" for name, error in pending.items())
+        )
+
+
+@dataclass
+class Dependency:
+    name: str
+    # Raises (or returns an error message) until the dependency is ready
+    check: Callable[[], Optional[str]]
+
+
+def check_http(url: str) -> Callable[[], Optional[str]]:
+    """Probe answering once GET url returns a 2xx status."""
+
+    def check() -> Optional[str]:
+        response = requests.get(url, timeout=PROBE_TIMEOUT)
+        if response.status_code // 100 != 2:
+            return f"HTTP {response.status_code}"
+        return None
+
+    return check
+
+
+def check_postgres(host: str, port: int) -> Callable[[], Optional[str]]:
+    """Probe answering once the Postgres server takes protocol requests."""
+
+    def check() -> Optional[str]:
+        with socket.create_connection((host, port), timeout=PROBE_TIMEOUT) as sock:
+            sock.settimeout(PROBE_TIMEOUT)
+            sock.sendall(_PG_SSL_REQUEST)
+            answer = sock.recv(1)
+        if answer not in (b"S", b"N"):
+            return f"unexpected answer {answer!r}"
+        return None
+
+    return check
+
+
+def wait_for(
+    dependency: Dependency,
+    deadline: float,
+    initial_delay: float = INITIAL_DELAY,
+    max_delay: float = MAX_DELAY,
+) -> Dict[str, object]:
+    """
+    Poll a dependency with exponential backoff until it is ready.
+
+    Args:
+        dependency: Dependency to poll
+        deadline: time.monotonic() value at which to give up
+        initial_delay: First delay between two probes (seconds)
+        max_delay: Cap of the delay between two probes (seconds)
+
+    Returns:
+        Readiness of the dependency: ready, seconds it took, attempts and the
+        last error when it did not come up in time
+    """
+    start = time.monotonic()
+    delay, attempts, error = initial_delay, 0, None
+    while True:
+        attempts += 1
+        try:
+            error = dependency.check()
+        except (OSError, requests.RequestException) as e:
+            error = f"{type(e).__name__}: {e}"
+        if error is None:
+            return {
+                "ready": True,
+                "seconds": round(time.monotonic() - start, 3),
+                "attempts": attempts,
+            }
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return {
+                "ready": False,
+                "seconds": round(time.monotonic() - start, 3),
+                "attempts": attempts,
+                "error": error,
+            }
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+
+def wait_for_stack(
+    dependencies: List[Dependency], timeout: float = DEFAULT_TIMEOUT
+) -> Dict[str, Dict[str, object]]:
+    """
+    Wait for all the dependencies at once, each one polled on its own thread.
+
+    Args:
+        dependencies: Dependencies to wait for
+        timeout: Deadline for all of them (seconds)
+
+    Returns:
+        Readiness of each dependency, by name
+
+    Raises:
+        DeadlineExceeded: if a dependency is still down after timeout seconds
+    """
+    deadline = time.monotonic() + timeout
+    results: Dict[str, Dict[str, object]] = {}
+
+    def run(dependency: Dependency) -> None:
+        result = results[dependency.name] = wait_for(dependency, deadline)
+        if result["ready"]:
+            logging.info(
+                f"{dependency.name} ready after {result['seconds']:.2f}s "
+                f"({result['attempts']} attempts)"
+            )
+
+    threads = [
+        threading.Thread(target=run, args=(dependency,), daemon=True)
+        for dependency in dependencies
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    pending = {
+        name: str(result["error"])
+        for name, result in results.items()
+        if not result["ready"]
+    }
+    if pending:
+        raise DeadlineExceeded(pending)
+    return results
+
+
+def default_dependencies() -> List[Dependency]:
+    """API, Postgres and MinIO, located from the environment of the stack."""
+    api_url = os.environ.get("API_URL", "http://pyro_api:5050").rstrip("/")
+    s3_url = os.environ.get("S3_ENDPOINT_URL", "http://minio:9000").rstrip("/")
+    db_host, _, db_port = os.environ.get("WAIT_DB_ADDRESS", "db:5432").partition(":")
+    return [
+        Dependency("api", check_http(f"{api_url}/status")),
+        Dependency("postgres", check_postgres(db_host, int(db_port or 5432))),
+        Dependency("minio", check_http(f"{s3_url}/minio/health/ready")),
+    ]
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Wait for the API, Postgres and MinIO, then run a command"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=float(os.environ.get("WAIT_TIMEOUT", DEFAULT_TIMEOUT)),
+        help="seconds to wait for the whole stack",
+    )
+    parser.add_argument(
+        "command",
+        nargs=argparse.REMAINDER,
+        help="command to run once ready, after --",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO, format="%(message)s")
+    args = parse_args(argv)
+    start = time.monotonic()
+    try:
+        wait_for_stack(default_dependencies(), args.timeout)
+    except DeadlineExceeded as e:
+        logging.error(f"Stack not ready after {args.timeout:g}s, {e}")
+        sys.exit(1)
+    logging.info(f"Stack ready in {time.monotonic() - start:.2f}s")
+
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if command:
+        sys.stdout.flush()
+        os.execvp(command[0], command)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,31 +4,61 @@
 # See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
 # for full license details.
 
+from functools import partial
+from typing import Dict, Optional
 from urllib.parse import urljoin
 
-import requests
+from http_client import api_request
+from token_cache import CameraTokenCache
 
-__all__ = ["get_token", "get_camera_token"]
+__all__ = [
+    "get_token",
+    "get_camera_token",
+    "invalidate_camera_token",
+    "mint_camera_token",
+]
+
+_token_caches: Dict[str, CameraTokenCache] = {}
 
 
 def get_token(API_URL, login: str, passwrd: str) -> str:
     """Authenticate with API and return access token"""
-    response = requests.post(
+    return api_request(
+        "post",
         urljoin(API_URL, "/api/v1/login/creds"),
         data={"username": login, "password": passwrd},
         timeout=5,
-    )
-    response.raise_for_status()
-    return response.json()["access_token"]
+    )["access_token"]
 
 
-def get_camera_token(API_URL, camera_id: int, access_token: str) -> str:
-    """Retrieve the streaming token for a specific camera"""
+def mint_camera_token(API_URL, camera_id: int, access_token: str) -> str:
+    """Request a new streaming token for a specific camera"""
     headers = {"Authorization": f"Bearer {access_token}", "accept": "application/json"}
-    response = requests.post(
+    return api_request(
+        "post",
         urljoin(API_URL, f"/api/v1/cameras/{camera_id}/token"),
-        headers=headers,
+        headers,
         timeout=5,
-    )
-    response.raise_for_status()
-    return response.json()["access_token"]
+    )["access_token"]
+
+
+def _get_token_cache(API_URL, access_token: str) -> CameraTokenCache:
+    cache = _token_caches.get(API_URL)
+    if cache is None:
+        cache = _token_caches[API_URL] = CameraTokenCache(mint=None, api_url=API_URL)
+    # Always mint with the latest admin token
+    cache.mint = partial(mint_camera_token, API_URL, access_token=access_token)
+    return cache
+
+
+def get_camera_token(
+    API_URL, camera_id: int, access_token: str, name: Optional[str] = None
+) -> str:
+    """Retrieve the streaming token for a specific camera, reusing cached tokens"""
+    return _get_token_cache(API_URL, access_token).get(camera_id, name)
+
+
+def invalidate_camera_token(API_URL, camera_id: int) -> None:
+    """Drop a cached camera token rejected by the API (401)"""
+    if API_URL in _token_caches:
+        _token_caches[API_URL].invalidate(camera_id)
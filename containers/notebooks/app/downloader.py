@@ -0,0 +1,298 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Parallel, resumable downloads of sequences from a distant alert API.
+
+Files already on disk are skipped when their size or ETag matches the remote
+one, and interrupted downloads resume from where they stopped with an HTTP
+Range request. Partial files are kept as hidden ".<name>.part" files next to
+their destination, so that they never show up in the sequence folders.
+"""
+
+import datetime
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from http_client import get_session
+
+__all__ = [
+    "Manifest",
+    "download_file",
+    "download_sequences",
+    "list_sequences",
+]
+
+CHUNK_SIZE = 1024 * 1024
+MANIFEST_NAME = ".downloads.json"
+DEFAULT_WORKERS = 8
+
+
+class Manifest:
+    """
+    ETag and size of the files downloaded under a directory.
+
+    Args:
+        root (str): Directory holding the downloads and the manifest file
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.path = os.path.join(root, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r") as file:
+                self._entries = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = {}
+
+    def _key(self, path):
+        return os.path.relpath(path, self.root)
+
+    def get(self, path):
+        with self._lock:
+            return self._entries.get(self._key(path), {})
+
+    def put(self, path, etag, size):
+        with self._lock:
+            self._entries[self._key(path)] = {"etag": etag, "size": size}
+            os.makedirs(self.root, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+            with os.fdopen(fd, "w") as file:
+                json.dump(self._entries, file)
+            os.replace(tmp_path, self.path)
+
+
+def _part_path(path):
+    folder, name = os.path.split(path)
+    return os.path.join(folder, f".{name}.part")
+
+
+def _content_length(response):
+    length = response.headers.get("Content-Length")
+    return int(length) if length is not None else None
+
+
+def _unsatisfied_range_size(response):
+    # 416 answers carry the size of the remote file as "Content-Range: */N"
+    content_range = response.headers.get("Content-Range", "")
+    _, _, size = content_range.rpartition("/")
+    return int(size) if size.isdigit() else None
+
+
+def download_file(url, path, session=None, manifest=None, chunk_size=CHUNK_SIZE):
+    """
+    Download a file unless an identical one is already on disk.
+
+    Args:
+        url (str): File URL
+        path (str): Destination path
+        session (requests.Session): Session to use, defaults to the shared one
+        manifest (Manifest): Where ETags are remembered, to skip with a 304
+        chunk_size (int): Streaming chunk size, in bytes
+
+    Returns:
+        str: "skipped", "resumed" or "downloaded"
+    """
+    status = _download(url, path, session, manifest, chunk_size)
+    if status is None:
+        # The partial file does not match the remote one: start over
+        os.remove(_part_path(path))
+        status = _download(url, path, session, manifest, chunk_size)
+    return status
+
+
+def _download(url, path, session, manifest, chunk_size):
+    # None when the partial file cannot be resumed
+    session = session or get_session()
+    known = manifest.get(path) if manifest else {}
+    part_path = _part_path(path)
+    headers = {}
+    offset = 0
+    if os.path.isfile(path):
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+    elif os.path.isfile(part_path):
+        offset = os.path.getsize(part_path)
+        headers["Range"] = f"bytes={offset}-"
+        if known.get("etag"):
+            # Restart from scratch if the remote file changed meanwhile
+            headers["If-Range"] = known["etag"]
+
+    with session.get(url, headers=headers, stream=True) as response:
+        etag = response.headers.get("ETag")
+        if response.status_code == 304:
+            return "skipped"
+        if response.status_code == 416 and offset:
+            # Nothing left after the offset: the partial file is complete only
+            # if it has the size of the remote file
+            size = _unsatisfied_range_size(response)
+            if size is None:
+                size = known.get("size")
+            if size != offset:
+                return None
+            os.replace(part_path, path)
+            return "resumed"
+        response.raise_for_status()
+
+        length = _content_length(response)
+        if os.path.isfile(path) and (
+            (etag and etag == known.get("etag"))
+            or (length is not None and length == os.path.getsize(path))
+        ):
+            if manifest and etag:
+                manifest.put(path, etag, length)
+            return "skipped"
+
+        resumed = response.status_code == 206
+        if manifest and etag and not resumed:
+            # Remembered before the body, so that If-Range works after a failure
+            manifest.put(path, etag, length)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(part_path, "ab" if resumed else "wb") as file:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                file.write(chunk)
+
+    os.replace(part_path, path)
+    return "resumed" if resumed else "downloaded"
+
+
+def list_sequences(api_client, start_date, end_date=None, page_size=50):
+    """
+    List the sequences of a date range, page by page.
+
+    Args:
+        api_client: pyroclient Client of the distant API
+        start_date (str): First day, YYYY-MM-DD
+        end_date (str): Last day (included), YYYY-MM-DD, defaults to start_date
+        page_size (int): Number of sequences per request
+
+    Returns:
+        List[dict]: Sequences, without duplicates
+    """
+    first = datetime.date.fromisoformat(start_date)
+    last = datetime.date.fromisoformat(end_date or start_date)
+    sequences = {}
+    for n_days in range((last - first).days + 1):
+        day = (first + datetime.timedelta(days=n_days)).isoformat()
+        offset = 0
+        while True:
+            response = api_client.fetch_sequences_from_date(
+                day, limit=page_size, offset=offset
+            )
+            response.raise_for_status()
+            page = response.json()
+            for sequence in page:
+                sequences.setdefault(sequence["id"], sequence)
+            if len(page) < page_size:
+                break
+            offset += page_size
+    return list(sequences.values())
+
+
+def _sequence_dir(detections, camera_names):
+    first = detections[0]
+    cam_id = first["camera_id"]
+    created_at = first["created_at"].split(".")[0].replace(":", "-").replace("T", "_")
+    return f"{cam_id}_{camera_names.get(cam_id, cam_id)}_{created_at}"
+
+
+def download_sequences(
+    api_client,
+    sequence_ids,
+    target_dir,
+    cameras=None,
+    detections_limit=50,
+    max_workers=DEFAULT_WORKERS,
+    session=None,
+):
+    """
+    Download the images and predictions of sequences, in parallel.
+
+    Each sequence goes to {camera_id}_{camera_name}_{created_at}/ with its
+    images in images/ and its bboxes in labels_predictions/.
+
+    Args:
+        api_client: pyroclient Client of the distant API
+        sequence_ids (List[int]): Sequences to download
+        target_dir (str): Directory receiving the sequence folders
+        cameras (List[dict]): Cameras of the distant API, fetched if None
+        detections_limit (int): Maximum number of detections per sequence
+        max_workers (int): Concurrent requests
+        session (requests.Session): Session to use, defaults to the shared one
+
+    Returns:
+        dict: Number of files per status ("downloaded", "resumed", "skipped",
+            "failed"), and number of sequences whose detections could not be
+            listed ("failed_sequences")
+    """
+    if cameras is None:
+        cameras = api_client.fetch_cameras().json()
+    camera_names = {camera["id"]: camera["name"] for camera in cameras}
+    manifest = Manifest(target_dir)
+    stats = {
+        "downloaded": 0,
+        "resumed": 0,
+        "skipped": 0,
+        "failed": 0,
+        "failed_sequences": 0,
+    }
+    stats_lock = threading.Lock()
+
+    def fetch_detections(seq_id):
+        # One failed sequence must not abort the listing of the others
+        try:
+            response = api_client.fetch_sequences_detections(
+                sequence_id=seq_id, limit=detections_limit, desc=False
+            )
+            response.raise_for_status()
+            return seq_id, response.json(), None
+        except Exception as e:
+            return seq_id, None, e
+
+    def fetch_image(job):
+        url, path = job
+        try:
+            status = download_file(url, path, session=session, manifest=manifest)
+        except Exception as e:
+            print(f"Error during download of {url}: {e}")
+            status = "failed"
+        with stats_lock:
+            stats[status] += 1
+
+    jobs = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for seq_id, detections, error in pool.map(fetch_detections, sequence_ids):
+            if error is not None:
+                print(f"== Sequence ID {seq_id}: detections not listed ({error})")
+                stats["failed_sequences"] += 1
+                continue
+            if not detections:
+                print(f"== Sequence ID {seq_id} has no detection")
+                continue
+            seq_dir = os.path.join(target_dir, _sequence_dir(detections, camera_names))
+            image_dir = os.path.join(seq_dir, "images")
+            pred_dir = os.path.join(seq_dir, "labels_predictions")
+            os.makedirs(image_dir, exist_ok=True)
+            os.makedirs(pred_dir, exist_ok=True)
+            print(f"== Sequence ID {seq_id}: {len(detections)} detections")
+            for detection in detections:
+                bucket_key = detection["bucket_key"]
+                with open(os.path.join(pred_dir, bucket_key[:-4] + ".txt"), "w") as f:
+                    f.write(detection["bboxes"])
+                jobs.append((detection["url"], os.path.join(image_dir, bucket_key)))
+
+        list(pool.map(fetch_image, jobs))
+
+    print(
+        f"Download complete: {stats['downloaded']} downloaded, "
+        f"{stats['resumed']} resumed, {stats['skipped']} skipped, "
+        f"{stats['failed']} failed, {stats['failed_sequences']} sequences not listed"
+    )
+    return stats
@@ -0,0 +1,330 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Detection load generator.
+
+Replays the sequence folders downloaded with dl_seqs_from_url from N cameras
+at once, at a target aggregate rate, to stress-test pyro-api and the alert
+grouping. Reports the achieved throughput and create_detection latencies.
+
+From the notebooks container:
+    python loadgen.py --cameras 2 4 5 14 --rate 20 --duration 60 --ramp-up 10
+
+From a notebook (an event loop is already running there):
+    report = await arun_load([2, 4, 5, 14], API_URL, admin_access_token, rate=20)
+"""
+
+import argparse
+import asyncio
+import glob
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from dotenv import load_dotenv
+from pyroclient import Client
+
+from api import get_token, invalidate_camera_token
+from instrumentation import instrument, percentile
+from replay_pack import ReplayPack
+from utils import (
+    camera_client_factory,
+    get_pose_index,
+    image_payload,
+    load_sequence_predictions,
+    split_predictions,
+)
+
+__all__ = ["arun_load", "run_load", "find_sequence_folders"]
+
+ARRIVALS = ("poisson", "fixed")
+MIN_RAMP_FRACTION = 0.05  # rate at the very start of a ramp-up, as a fraction
+
+
+def find_sequence_folders(root):
+    """List the sequence folders (containing an images/ directory) under root."""
+    folders = glob.glob(os.path.join(root, "**", "images"), recursive=True)
+    return sorted(os.path.dirname(folder) for folder in folders)
+
+
+def _load_frames(seq_folder):
+    imgs = sorted(glob.glob(f"{seq_folder}/images/*"))
+    pred_files, preds = load_sequence_predictions(seq_folder)
+    return list(zip(imgs, split_predictions(preds, len(pred_files))))
+
+
+class _Camera:
+    """Replay state of one camera: client, pose and an endless frame cycle."""
+
+    def __init__(self, camera_id, api_url, make_client, frames, rng):
+        self.camera_id = camera_id
+        self.api_url = api_url
+        self.make_client = make_client
+        self.client = make_client(camera_id)
+        self.pose_index = get_pose_index(api_url, self.client, camera_id)
+        self._client_lock = threading.Lock()
+        self._frames = itertools.cycle(frames)
+        self._rng = rng
+        self.pick_pose()
+
+    def pick_pose(self):
+        poses = self.pose_index.poses()
+        if not poses:
+            raise ValueError(f"camera {self.camera_id} has no pose to send from")
+        self.pose_id = self._rng.choice(poses)["id"]
+
+    def _renew_client(self, rejected):
+        # Token expired or signed by another stack: the next sends use a new
+        # one, minted once even if several sends got rejected at the same time
+        with self._client_lock:
+            if self.client is rejected:
+                invalidate_camera_token(self.api_url, self.camera_id)
+                self.client = self.make_client(self.camera_id)
+                get_pose_index(self.api_url, self.client, self.camera_id)
+
+    def send(self):
+        img_file, bboxes = next(self._frames)
+        payload = image_payload(img_file)
+        client = self.client
+        start = time.perf_counter()
+        response = client.create_detection(payload, bboxes, pose_id=self.pose_id)
+        latency = time.perf_counter() - start
+        if response.status_code == 401:
+            self._renew_client(client)
+        # The pose was deleted meanwhile: move on to a current one
+        if self.pose_index.check_response(response):
+            self.pick_pose()
+        return response.status_code, latency
+
+
+def _setup_camera(
+    camera_id, api_url, admin_access_token, sequence_folders, rng, load_frames
+):
+    make_client = camera_client_factory(api_url, Client, admin_access_token)
+    frames = []
+    # A few sequences per camera, so that cameras do not replay in lockstep
+    for seq_folder in rng.sample(sequence_folders, min(3, len(sequence_folders))):
+        frames.extend(load_frames(seq_folder))
+    if not frames:
+        raise ValueError("no frame found in the selected sequence folders")
+    return _Camera(camera_id, api_url, make_client, frames, rng)
+
+
+def _current_rate(rate, elapsed, ramp_up):
+    if ramp_up <= 0:
+        return rate
+    return rate * max(MIN_RAMP_FRACTION, min(1.0, elapsed / ramp_up))
+
+
+async def arun_load(
+    camera_ids,
+    api_url,
+    admin_access_token,
+    sequences_root="../data/alert_samples",
+    rate=10.0,
+    duration=60.0,
+    arrival="poisson",
+    ramp_up=0.0,
+    max_in_flight=None,
+    seed=None,
+):
+    """
+    Send detections from several cameras at a target aggregate rate.
+
+    Args:
+        camera_ids (List[int]): Cameras sending detections
+        api_url (str): API URL, e.g. "http://api:5050"
+        admin_access_token (str): Admin token used to get camera tokens
+        sequences_root (str): Folder holding the downloaded sequences, or a
+            replay pack (.pack) built with replay_pack.py
+        rate (float): Target aggregate detections per second
+        duration (float): Duration of the run in seconds, ramp-up included
+        arrival (str): "poisson" (exponential inter-arrivals) or "fixed"
+        ramp_up (float): Seconds to linearly ramp the rate up to its target
+        max_in_flight (int): Maximum concurrent requests, defaults to 4 per camera
+        seed (int): Seed for camera/sequence selection and arrivals
+
+    Returns:
+        dict: Run report (counts, throughput, latency percentiles)
+    """
+    if arrival not in ARRIVALS:
+        raise ValueError(f"arrival must be one of {ARRIVALS}, got {arrival}")
+    if not rate > 0:
+        raise ValueError(f"rate must be positive, got {rate}")
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    if sequences_root.endswith(".pack"):
+        # Frames point into the mapped pack, which stays open for the run
+        pack = ReplayPack(sequences_root)
+        sequence_folders, load_frames = pack.sequences, pack.frames
+    else:
+        sequence_folders = find_sequence_folders(sequences_root)
+        load_frames = _load_frames
+    if not sequence_folders:
+        raise ValueError(f"no sequence folder found under {sequences_root}")
+
+    max_in_flight = max_in_flight or 4 * len(camera_ids)
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=max_in_flight)
+    cameras = await asyncio.gather(
+        *(
+            loop.run_in_executor(
+                pool,
+                _setup_camera,
+                camera_id,
+                api_url,
+                admin_access_token,
+                sequence_folders,
+                random.Random(rng.random()),
+                load_frames,
+            )
+            for camera_id in camera_ids
+        )
+    )
+
+    semaphore = asyncio.Semaphore(max_in_flight)
+    latencies, statuses, lags = [], [], []
+    errors = 0
+
+    async def send(camera, scheduled):
+        nonlocal errors
+        try:
+            # Lag between the planned arrival and the moment a worker is free
+            lags.append(loop.time() - scheduled)
+            status_code, latency = await loop.run_in_executor(pool, camera.send)
+            statuses.append(status_code)
+            if status_code // 100 == 2:
+                latencies.append(latency)
+            else:
+                errors += 1
+        except Exception as e:
+            errors += 1
+            print(f"camera {camera.camera_id}: {e}")
+        finally:
+            semaphore.release()
+
+    tasks = []
+    start = loop.time()
+    next_arrival = start
+    while next_arrival - start < duration:
+        delay = next_arrival - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await semaphore.acquire()
+        tasks.append(asyncio.create_task(send(rng.choice(cameras), next_arrival)))
+
+        current_rate = _current_rate(rate, next_arrival - start, ramp_up)
+        if arrival == "poisson":
+            next_arrival += np_rng.exponential(1 / current_rate)
+        else:
+            next_arrival += 1 / current_rate
+
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - start
+    pool.shutdown(wait=False)
+
+    lat_ms = sorted(latency * 1000 for latency in latencies)
+    p50, p95, p99 = (
+        [percentile(lat_ms, q) for q in (50, 95, 99)] if lat_ms else [None] * 3
+    )
+    report = {
+        "cameras": len(cameras),
+        "target_rate": rate,
+        "arrival": arrival,
+        "ramp_up_s": ramp_up,
+        "duration_s": round(elapsed, 3),
+        "sent": len(tasks),
+        "succeeded": len(latencies),
+        "errors": errors,
+        "achieved_rate": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": p50,
+            "p95": p95,
+            "p99": p99,
+            "max": lat_ms[-1] if lat_ms else None,
+        },
+        "max_dispatch_lag_ms": round(max(lags, default=0) * 1000, 3),
+        "status_codes": {
+            str(code): statuses.count(code) for code in sorted(set(statuses))
+        },
+    }
+    return report
+
+
+def run_load(*args, **kwargs):
+    """Blocking version of arun_load, for scripts (not usable inside Jupyter)."""
+    return asyncio.run(arun_load(*args, **kwargs))
+
+
+def print_report(report):
+    lat = report["latency_ms"]
+    print(
+        f"{report['succeeded']}/{report['sent']} detections in "
+        f"{report['duration_s']:.1f}s from {report['cameras']} cameras: "
+        f"{report['achieved_rate']:.2f}/s (target {report['target_rate']}/s), "
+        f"{report['errors']} errors"
+    )
+    if lat["p50"] is not None:
+        print(
+            f"create_detection latency p50={lat['p50']:.1f}ms "
+            f"p95={lat['p95']:.1f}ms p99={lat['p99']:.1f}ms max={lat['max']:.1f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detection load generator")
+    parser.add_argument("--cameras", type=int, nargs="+", required=True)
+    parser.add_argument(
+        "--api-url", default=os.environ.get("API_URL", "http://api:5050")
+    )
+    parser.add_argument(
+        "--sequences",
+        default="../data/alert_samples",
+        help="sequence folders, or a .pack file built with replay_pack.py",
+    )
+    parser.add_argument("--rate", type=float, default=10.0, help="detections/s")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds")
+    parser.add_argument("--arrival", choices=ARRIVALS, default="poisson")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="seconds")
+    parser.add_argument("--max-in-flight", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--report", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    load_dotenv("../.env")
+    admin_access_token = get_token(
+        args.api_url,
+        os.environ.get("SUPERADMIN_LOGIN"),
+        os.environ.get("SUPERADMIN_PWD"),
+    )
+    with instrument(log=print) as recorder:
+        report = run_load(
+            args.cameras,
+            args.api_url,
+            admin_access_token,
+            sequences_root=args.sequences,
+            rate=args.rate,
+            duration=args.duration,
+            arrival=args.arrival,
+            ramp_up=args.ramp_up,
+            max_in_flight=args.max_in_flight,
+            seed=args.seed,
+        )
+    report["requests"] = recorder.summary()
+    print_report(report)
+    if args.report:
+        with open(args.report, "w") as file:
+            json.dump(report, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
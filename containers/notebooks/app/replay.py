@@ -0,0 +1,252 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Time-faithful replay of downloaded sequences.
+
+Frames carry their capture time in their file name, either as
+2025-06-13T14-50-34 or as 20251001151013. All the frames of the selected
+cameras are put on one timeline, and each detection is dispatched at its
+offset on that timeline, divided by a speed multiplier (1 is real time, None
+is flat-out). Frames of a camera are always sent in order, cameras are sent
+concurrently, so triangulation and alert grouping see the original timing.
+
+    timeline = build_timeline({12: frames_12, 13: frames_13})
+    report = replay(timeline, send, speed=10)
+"""
+
+import heapq
+import math
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import NamedTuple
+
+from instrumentation import percentile
+
+__all__ = [
+    "ReplayEvent",
+    "build_timeline",
+    "interleaved_timeline",
+    "parse_frame_timestamp",
+    "replay",
+]
+
+DEFAULT_FRAME_INTERVAL = 30.0  # seconds between frames with no timestamp
+
+_TIMESTAMP_FORMATS = (
+    (re.compile(r"(\d{4}-\d{2}-\d{2})[T_](\d{2}-\d{2}-\d{2})"), "%Y-%m-%d%H-%M-%S"),
+    (re.compile(r"(?<!\d)(\d{8})(\d{6})(?!\d)"), "%Y%m%d%H%M%S"),
+)
+
+
+class ReplayEvent(NamedTuple):
+    """One detection to send, offset in seconds from the start of the timeline."""
+
+    offset: float
+    camera_id: object
+    frame_index: int
+    img_file: str
+    bboxes: list
+
+
+def parse_frame_timestamp(path):
+    """
+    Capture time encoded in a frame file name.
+
+    Args:
+        path (str): Frame path, e.g. ".../images/brison-03_2025-06-13T14-50-34.jpg"
+
+    Returns:
+        datetime: Capture time (the last one in the name), None if there is none
+    """
+    name = os.path.basename(path)
+    for pattern, date_format in _TIMESTAMP_FORMATS:
+        for match in reversed(list(pattern.finditer(name))):
+            try:
+                return datetime.strptime("".join(match.groups()), date_format)
+            except ValueError:
+                continue
+    return None
+
+
+def _frame_times(frames, frame_interval):
+    """Capture times in seconds, None if no frame has a timestamp."""
+    stamps = [parse_frame_timestamp(img_file) for img_file, _ in frames]
+    known = [index for index, stamp in enumerate(stamps) if stamp is not None]
+    if not known:
+        return None
+    # Frames with no timestamp are placed frame_interval after the previous one
+    # (or before the first timestamped one)
+    anchor_index, anchor = known[0], stamps[known[0]].timestamp()
+    times = []
+    for index, stamp in enumerate(stamps):
+        if stamp is not None:
+            anchor_index, anchor = index, stamp.timestamp()
+        times.append(anchor + (index - anchor_index) * frame_interval)
+    return times
+
+
+def build_timeline(
+    sequences, frame_interval=DEFAULT_FRAME_INTERVAL, align_starts=False
+):
+    """
+    Put the frames of several cameras on one timeline.
+
+    Args:
+        sequences (Dict[object, List[Tuple[str, list]]]): (image file, bboxes)
+            frames of each camera, in capture order
+        frame_interval (float): Seconds between frames whose name carries no
+            timestamp
+        align_starts (bool): Start every camera at offset 0, for sequences
+            that were not recorded at the same time. By default the real
+            time difference between cameras is kept.
+
+    Returns:
+        List[ReplayEvent]: Events sorted by offset, the first one at 0
+    """
+    per_camera = {}
+    for camera_id, frames in sequences.items():
+        times = _frame_times(frames, frame_interval)
+        if times is None:
+            # No timestamp at all: starts with the others, at a regular pace
+            times = [index * frame_interval for index in range(len(frames))]
+            per_camera[camera_id] = (times, True)
+        else:
+            per_camera[camera_id] = (times, align_starts)
+
+    absolute = [
+        min(times) for times, relative in per_camera.values() if times and not relative
+    ]
+    origin = min(absolute) if absolute else 0.0
+
+    events = []
+    for camera_id, frames in sequences.items():
+        times, relative = per_camera[camera_id]
+        start = min(times) if relative and times else origin
+        for index, ((img_file, bboxes), capture_time) in enumerate(zip(frames, times)):
+            events.append(
+                ReplayEvent(capture_time - start, camera_id, index, img_file, bboxes)
+            )
+    events.sort(
+        key=lambda event: (event.offset, str(event.camera_id), event.frame_index)
+    )
+    return events
+
+
+def interleaved_timeline(sequences, interval):
+    """
+    Put the frames of several cameras on a regular timeline, capture times aside.
+
+    Cameras take turns frame by frame (the first frame of each camera, then
+    the second ones...), one event every interval seconds.
+
+    Args:
+        sequences (Dict[object, List[Tuple[str, list]]]): (image file, bboxes)
+            frames of each camera, in capture order
+        interval (float): Seconds between two events
+
+    Returns:
+        List[ReplayEvent]: Events sorted by offset, the first one at 0
+    """
+    events = []
+    n_frames = max((len(frames) for frames in sequences.values()), default=0)
+    for index in range(n_frames):
+        for camera_id, frames in sequences.items():
+            if index < len(frames):
+                img_file, bboxes = frames[index]
+                events.append(
+                    ReplayEvent(
+                        len(events) * interval, camera_id, index, img_file, bboxes
+                    )
+                )
+    return events
+
+
+def _lag_summary(lags):
+    ordered = sorted(lags)
+    if not ordered:
+        return {"p50_ms": None, "p95_ms": None, "max_ms": None}
+
+    def at(q):
+        return round(1000 * percentile(ordered, q), 1)
+
+    return {"p50_ms": at(50), "p95_ms": at(95), "max_ms": at(100)}
+
+
+def replay(events, send, speed=1.0, log=print):
+    """
+    Dispatch events at their offset, each camera in order, cameras concurrently.
+
+    Events go through a heap, so that a list that is not sorted (e.g. the
+    concatenation of two timelines) is still replayed in time order. Stopping
+    the caller (e.g. the notebook stop button) drops the pending events.
+
+    Args:
+        events (Iterable[ReplayEvent]): Events to send, e.g. from build_timeline
+        send (Callable[[ReplayEvent], object]): Sends one event, an exception
+            counts as a failure
+        speed (float): Time multiplier, 1 is real time, None or inf is flat-out
+        log (Callable[[str], None]): Receives the failures
+
+    Returns:
+        dict: Replay report (events, failures, durations, dispatch lag)
+    """
+    if speed is not None and speed <= 0:
+        raise ValueError(f"speed must be positive, got {speed}")
+    flat_out = speed is None or math.isinf(speed)
+
+    heap = [(event.offset, order, event) for order, event in enumerate(events)]
+    heapq.heapify(heap)
+    origin = heap[0][0] if heap else 0.0
+    span = max((offset for offset, _, _ in heap), default=origin) - origin
+
+    lags, failures = [], []
+
+    def run(event, due):
+        # Lag between the scheduled time and the actual send, queueing included
+        lags.append(max(0.0, time.monotonic() - due) if due is not None else 0.0)
+        try:
+            send(event)
+        except Exception as e:
+            failures.append(event)
+            log(f"camera {event.camera_id} frame {event.frame_index}: {e}")
+
+    # One lane per camera keeps its frames in order
+    lanes = {}
+    start = time.monotonic()
+    dispatched = False
+    try:
+        while heap:
+            offset, _, event = heapq.heappop(heap)
+            due = None
+            if not flat_out:
+                due = start + (offset - origin) / speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            lane = lanes.get(event.camera_id)
+            if lane is None:
+                lane = lanes[event.camera_id] = ThreadPoolExecutor(max_workers=1)
+            lane.submit(run, event, due)
+        dispatched = True
+    finally:
+        # Interrupted, even while waiting for the last event: drop the queued sends
+        for lane in lanes.values():
+            lane.shutdown(wait=True, cancel_futures=not dispatched)
+
+    elapsed = time.monotonic() - start
+    return {
+        "events": len(lags),
+        "failures": len(failures),
+        "cameras": len(lanes),
+        "speed": None if flat_out else speed,
+        "timeline_s": round(span, 3),
+        "elapsed_s": round(elapsed, 3),
+        "lag": _lag_summary(lags),
+    }
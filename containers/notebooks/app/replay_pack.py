@@ -0,0 +1,245 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Packed replay dataset.
+
+Turns a tree of sequence folders (images/ and labels_predictions/) into a
+single file, so that replays neither scan directories nor open and parse one
+file per frame:
+
+    header     b"PYROPACK", format version (uint32), index length (uint64)
+    index      JSON: sequences, and for each frame its name, image offset and
+               length, first box and box count
+    images     upload-ready JPEG payloads, back to back
+    boxes      float32 array of (xmin, ymin, xmax, ymax, conf), one row per box
+
+The reader memory-maps the pack and hands out memoryview slices of it, which
+go to create_detection as they are.
+
+    python replay_pack.py ../data/alert_samples ../data/alert_samples.pack
+"""
+
+import argparse
+import glob
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from typing import NamedTuple
+
+import numpy as np
+
+from image_cache import encode_image
+from utils import load_sequence_predictions, split_predictions
+
+__all__ = ["PackedImage", "ReplayPack", "pack_sequences", "write_pack"]
+
+MAGIC = b"PYROPACK"
+VERSION = 1
+_HEADER = struct.Struct("<8sIQ")
+_ALIGN = 8
+BOX_DTYPE = np.dtype("<f4")
+BOX_FIELDS = 5  # xmin, ymin, xmax, ymax, conf
+
+
+class PackedImage(NamedTuple):
+    """JPEG payload of a packed frame, usable as a path for its name."""
+
+    name: str
+    data: memoryview
+
+    def __fspath__(self):
+        return self.name
+
+
+def _padding(offset):
+    return -offset % _ALIGN
+
+
+def write_pack(path, sequences):
+    """
+    Write sequences to a pack file.
+
+    Args:
+        path (str): Pack file to write
+        sequences (Dict[str, List[Tuple[str, List[tuple]]]]): (image file,
+            bboxes) frames of each sequence, images are encoded for upload
+
+    Returns:
+        dict: Number of sequences, frames, boxes and bytes written
+    """
+    index, boxes = [], []
+    image_offset, n_boxes, n_frames = 0, 0, 0
+    # Images are spooled first: the index, written before them, is only
+    # known once they are all encoded
+    with tempfile.TemporaryFile() as spool:
+        for name, frames in sequences.items():
+            entries = []
+            for img_file, bboxes in frames:
+                payload = encode_image(img_file)
+                spool.write(payload)
+                entries.append(
+                    [
+                        os.path.basename(img_file),
+                        image_offset,
+                        len(payload),
+                        n_boxes,
+                        len(bboxes),
+                    ]
+                )
+                boxes.extend(bboxes)
+                image_offset += len(payload)
+                n_boxes += len(bboxes)
+                n_frames += 1
+            index.append({"name": name, "frames": entries})
+
+        index_bytes = json.dumps(
+            {"sequences": index, "images_size": image_offset, "boxes": n_boxes}
+        ).encode()
+        images_start = _HEADER.size + len(index_bytes)
+        images_start += _padding(images_start)
+        boxes_start = images_start + image_offset
+        boxes_start += _padding(boxes_start)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(_HEADER.pack(MAGIC, VERSION, len(index_bytes)))
+            file.write(index_bytes)
+            file.write(b"\0" * (images_start - file.tell()))
+            spool.seek(0)
+            shutil.copyfileobj(spool, file)
+            file.write(b"\0" * (boxes_start - file.tell()))
+            array = np.asarray(boxes, dtype=BOX_DTYPE).reshape(-1, BOX_FIELDS)
+            file.write(array.tobytes())
+            size = file.tell()
+    os.replace(tmp_path, path)
+    return {
+        "sequences": len(index),
+        "frames": n_frames,
+        "boxes": n_boxes,
+        "bytes": size,
+    }
+
+
+def pack_sequences(root, path):
+    """
+    Pack every sequence folder found under root.
+
+    Sequences are named after their folder, relative to root. Frames pair
+    sorted images with sorted prediction files, like the replay helpers.
+
+    Args:
+        root (str): Folder holding the sequence folders
+        path (str): Pack file to write
+
+    Returns:
+        dict: Number of sequences, frames, boxes and bytes written
+    """
+    folders = sorted(
+        os.path.dirname(folder)
+        for folder in glob.glob(os.path.join(root, "**", "images"), recursive=True)
+    )
+    sequences = {}
+    for seq_folder in folders:
+        imgs = sorted(glob.glob(f"{seq_folder}/images/*"))
+        pred_files, preds = load_sequence_predictions(seq_folder)
+        frames = list(zip(imgs, split_predictions(preds, len(pred_files))))
+        if frames:
+            sequences[os.path.relpath(seq_folder, root)] = frames
+    return write_pack(path, sequences)
+
+
+class ReplayPack:
+    """
+    Memory-mapped reader of a pack file.
+
+    Args:
+        path (str): Pack file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, version, index_size = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} replay pack")
+        index_end = _HEADER.size + index_size
+        index = json.loads(bytes(self._view[_HEADER.size : index_end]))
+        self._images_start = index_end
+        self._images_start += _padding(self._images_start)
+        boxes_start = self._images_start + index["images_size"]
+        boxes_start += _padding(boxes_start)
+        self._boxes = np.frombuffer(
+            self._mmap,
+            dtype=BOX_DTYPE,
+            count=index["boxes"] * BOX_FIELDS,
+            offset=boxes_start,
+        ).reshape(-1, BOX_FIELDS)
+        self._sequences = {seq["name"]: seq["frames"] for seq in index["sequences"]}
+
+    @property
+    def sequences(self):
+        """Names of the packed sequences, in pack order."""
+        return list(self._sequences)
+
+    def frames(self, name):
+        """
+        Frames of a sequence, without copying any image.
+
+        Args:
+            name (str): Sequence name
+
+        Returns:
+            List[Tuple[PackedImage, List[tuple]]]: (image, bboxes) frames, ready
+            for create_detection
+        """
+        frames = []
+        for img_name, offset, size, first_box, n_boxes in self._sequences[name]:
+            start = self._images_start + offset
+            bboxes = [
+                tuple(round(value, 6) for value in box)
+                for box in self._boxes[first_box : first_box + n_boxes].tolist()
+            ]
+            frames.append(
+                (PackedImage(img_name, self._view[start : start + size]), bboxes)
+            )
+        return frames
+
+    def close(self):
+        """Release the mapping, memoryviews handed out must be gone by then."""
+        self._boxes = None
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack sequence folders")
+    parser.add_argument("root", help="folder holding the sequence folders")
+    parser.add_argument("output", help="pack file to write, e.g. alert_samples.pack")
+    args = parser.parse_args(argv)
+    stats = pack_sequences(args.root, args.output)
+    print(
+        f"{stats['sequences']} sequences, {stats['frames']} frames, "
+        f"{stats['boxes']} boxes packed in {args.output} "
+        f"({stats['bytes'] / 1e6:.1f} MB)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+Triangulation scenarios from camera geometry.
+
+Instead of hand-picking camera IDs and azimuths, fires are given as lat/lon
+and every camera that can see them is found: the bearing from each camera to
+each fire is checked against the angle_of_view of the camera poses, and the
+closest pose gets a sequence of jittered bboxes at that bearing. All of it is
+computed with NumPy over cameras x poses x fires, so hundreds of multi-camera
+scenarios are generated in a fraction of a second.
+
+    cameras = load_cameras("../data/csv")  # or fetch_cameras(API_URL, token)
+    lat, lon = random_fires(cameras, 200, seed=0)
+    scenarios = generate_scenarios(cameras, lat, lon, min_cameras=2)
+    report = send_scenarios(scenarios, images, API_URL, Client, token, speed=None)
+"""
+
+import csv
+import os
+from typing import List, NamedTuple
+from urllib.parse import urljoin
+
+import numpy as np
+
+from http_client import api_request
+from instrumentation import instrument
+from replay import DEFAULT_FRAME_INTERVAL, ReplayEvent, replay
+from utils import (
+    camera_client_factory,
+    detection_sender,
+    generate_bboxes_with_jitter,
+)
+
+__all__ = [
+    "CameraTable",
+    "Scenario",
+    "View",
+    "fetch_cameras",
+    "find_views",
+    "generate_scenarios",
+    "load_cameras",
+    "random_fires",
+    "scenario_timeline",
+    "send_scenarios",
+]
+
+EARTH_RADIUS_KM = 6371.0
+MAX_DISTANCE_KM = 30.0  # beyond that, a smoke is not detected
+
+
+class CameraTable(NamedTuple):
+    """Cameras as arrays, poses padded with NaN to the largest pose count."""
+
+    ids: np.ndarray  # (C,)
+    names: List[str]
+    lat: np.ndarray  # (C,) degrees
+    lon: np.ndarray  # (C,) degrees
+    angle_of_view: np.ndarray  # (C,) degrees
+    pose_azimuths: np.ndarray  # (C, K) degrees, NaN where there is no pose
+
+
+class View(NamedTuple):
+    """One camera seeing a fire."""
+
+    camera_id: int
+    camera_name: str
+    azimuth: float  # of the pose the detections are sent with
+    bearing: float  # from the camera to the fire
+    distance_km: float
+    bboxes: list  # one list of (x0, x0, x1, x1, conf) boxes per frame
+
+
+class Scenario(NamedTuple):
+    """A fire and the cameras that see it."""
+
+    lat: float
+    lon: float
+    views: List[View]
+
+
+def _camera_table(cameras, poses_per_camera):
+    n_poses = max((len(poses) for poses in poses_per_camera), default=0)
+    pose_azimuths = np.full((len(cameras), max(n_poses, 1)), np.nan)
+    for index, poses in enumerate(poses_per_camera):
+        pose_azimuths[index, : len(poses)] = poses
+    return CameraTable(
+        ids=np.array([int(camera["id"]) for camera in cameras]),
+        names=[camera["name"] for camera in cameras],
+        lat=np.array([float(camera["lat"]) for camera in cameras]),
+        lon=np.array([float(camera["lon"]) for camera in cameras]),
+        angle_of_view=np.array([float(camera["angle_of_view"]) for camera in cameras]),
+        pose_azimuths=pose_azimuths,
+    )
+
+
+def load_cameras(csv_dir, sub_path="_DEV"):
+    """
+    Cameras and poses from the seed CSVs.
+
+    Poses reference their camera by its 1-based row in the cameras CSV, which
+    is the ID the camera gets when the stack is seeded.
+
+    Args:
+        csv_dir (str): Directory of the seed CSVs, e.g. "../data/csv"
+        sub_path (str): Dataset suffix, e.g. "_DEV"
+
+    Returns:
+        CameraTable: Cameras with the IDs they have in the seeded API
+    """
+
+    def rows(table):
+        path = os.path.join(csv_dir, f"API_DATA{sub_path} - {table}.csv")
+        with open(path, "r", newline="", encoding="utf-8") as file:
+            return list(csv.DictReader(file))
+
+    cameras = rows("cameras")
+    poses_per_camera = [[] for _ in cameras]
+    for pose in rows("poses"):
+        row = int(pose["camera_id"]) - 1
+        if 0 <= row < len(cameras):
+            poses_per_camera[row].append(float(pose["azimuth"]))
+    cameras = [{**camera, "id": row + 1} for row, camera in enumerate(cameras)]
+    return _camera_table(cameras, poses_per_camera)
+
+
+def fetch_cameras(API_URL, access_token):
+    """
+    Cameras and poses from the API.
+
+    Args:
+        API_URL (str): API URL
+        access_token (str): Admin (or organization) access token
+
+    Returns:
+        CameraTable: Cameras visible to the token
+    """
+    headers = {"Authorization": f"Bearer {access_token}", "accept": "application/json"}
+    cameras = api_request(
+        "get", urljoin(API_URL, "/api/v1/cameras/"), headers, timeout=10
+    )
+    poses_per_camera = [
+        [float(pose["azimuth"]) for pose in camera.get("poses") or []]
+        for camera in cameras
+    ]
+    return _camera_table(cameras, poses_per_camera)
+
+
+def _distances_and_bearings(lat1, lon1, lat2, lon2):
+    """Great-circle distance (km) and initial bearing (degrees) from 1 to 2."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    dlat, dlon = lat2 - lat1, lon2 - lon1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    bearing = np.degrees(
+        np.arctan2(
+            np.sin(dlon) * np.cos(lat2),
+            np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon),
+        )
+    )
+    return distance, bearing % 360
+
+
+def find_views(cameras, fire_lat, fire_lon, max_distance_km=MAX_DISTANCE_KM):
+    """
+    Find the cameras that see each fire, and the pose they see it from.
+
+    A camera sees a fire within max_distance_km that falls in the field of
+    view of one of its poses. When several poses do, the one looking closest
+    to the fire is used.
+
+    Args:
+        cameras (CameraTable): Cameras, from load_cameras or fetch_cameras
+        fire_lat (array-like): Fire latitudes (degrees), shape (F,)
+        fire_lon (array-like): Fire longitudes (degrees), shape (F,)
+        max_distance_km (float): Detection range of the cameras
+
+    Returns:
+        dict: Arrays with one entry per (camera, fire) view, sorted by fire:
+        fire and camera (row in the table) indices, pose azimuth, bearing,
+        distance and offset of the fire from the pose azimuth (degrees)
+    """
+    fire_lat = np.atleast_1d(np.asarray(fire_lat, dtype=np.float64))
+    fire_lon = np.atleast_1d(np.asarray(fire_lon, dtype=np.float64))
+    # (C, F)
+    distance, bearing = _distances_and_bearings(
+        cameras.lat[:, None], cameras.lon[:, None], fire_lat, fire_lon
+    )
+    # (C, K, F): offset of the fire from each pose azimuth, in [-180, 180)
+    offset = (bearing[:, None, :] - cameras.pose_azimuths[:, :, None] + 180) % 360
+    offset -= 180
+    half_fov = cameras.angle_of_view[:, None, None] / 2
+    in_view = (np.abs(offset) <= half_fov) & (distance[:, None, :] <= max_distance_km)
+    # NaN (missing) poses compare False, so they are never in view
+    score = np.where(in_view, np.abs(offset), np.inf)
+    best_pose = score.argmin(axis=1)  # (C, F)
+    visible = np.isfinite(np.take_along_axis(score, best_pose[:, None], 1)[:, 0])
+
+    fire_index, camera_index = np.nonzero(visible.T)
+    pose_index = best_pose[camera_index, fire_index]
+    return {
+        "fire": fire_index,
+        "camera": camera_index,
+        "pose_azimuth": cameras.pose_azimuths[camera_index, pose_index],
+        "bearing": bearing[camera_index, fire_index],
+        "distance_km": distance[camera_index, fire_index],
+        "offset": offset[camera_index, pose_index, fire_index],
+    }
+
+
+def random_fires(cameras, n, max_distance_km=MAX_DISTANCE_KM, rng=None, seed=None):
+    """
+    Draw fire locations around random cameras, so that most are seen.
+
+    Args:
+        cameras (CameraTable): Cameras to draw around
+        n (int): Number of fires
+        max_distance_km (float): Largest distance from the drawn camera
+        rng (np.random.Generator): Random generator, overrides seed
+        seed (int): Seed of the generator created when rng is not given
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Fire latitudes and longitudes (degrees)
+    """
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    origin = rng.integers(len(cameras.ids), size=n)
+    lat1, lon1 = np.radians(cameras.lat[origin]), np.radians(cameras.lon[origin])
+    bearing = np.radians(rng.uniform(0, 360, n))
+    angle = rng.uniform(0.1, max_distance_km, n) / EARTH_RADIUS_KM
+    # Destination point given a distance and a bearing from a start point
+    lat2 = np.arcsin(
+        np.sin(lat1) * np.cos(angle) + np.cos(lat1) * np.sin(angle) * np.cos(bearing)
+    )
+    lon2 = lon1 + np.arctan2(
+        np.sin(bearing) * np.sin(angle) * np.cos(lat1),
+        np.cos(angle) - np.sin(lat1) * np.sin(lat2),
+    )
+    return np.degrees(lat2), (np.degrees(lon2) + 180) % 360 - 180
+
+
+def generate_scenarios(
+    cameras,
+    fire_lat,
+    fire_lon,
+    n_frames=5,
+    min_cameras=1,
+    max_distance_km=MAX_DISTANCE_KM,
+    base_conf=0.8,
+    jitter_ratio=0.1,
+    rng=None,
+    seed=None,
+):
+    """
+    Build the detections of every camera seeing each fire.
+
+    The bboxes of all views and frames are generated in one
+    generate_bboxes_with_jitter call.
+
+    Args:
+        cameras (CameraTable): Cameras, from load_cameras or fetch_cameras
+        fire_lat (array-like): Fire latitudes (degrees)
+        fire_lon (array-like): Fire longitudes (degrees)
+        n_frames (int): Frames (jittered bbox sets) per view
+        min_cameras (int): Drop fires seen by fewer cameras, 2 for
+            triangulation
+        max_distance_km (float): Detection range of the cameras
+        base_conf (float): Confidence score of the detections
+        jitter_ratio (float): Maximum percentage of bbox width to use as jitter
+        rng (np.random.Generator): Random generator, overrides seed
+        seed (int): Seed of the generator created when rng is not given
+
+    Returns:
+        List[Scenario]: Scenarios, in fire order
+    """
+    fire_lat = np.atleast_1d(np.asarray(fire_lat, dtype=np.float64))
+    fire_lon = np.atleast_1d(np.asarray(fire_lon, dtype=np.float64))
+    views = find_views(cameras, fire_lat, fire_lon, max_distance_km)
+    camera_index = views["camera"]
+    # Offset from the pose rather than the raw bearing: no wrap around 0/360
+    bboxes = generate_bboxes_with_jitter(
+        views["pose_azimuth"] + views["offset"],
+        views["pose_azimuth"],
+        cameras.angle_of_view[camera_index],
+        n=n_frames,
+        base_conf=base_conf,
+        jitter_ratio=jitter_ratio,
+        rng=rng,
+        seed=seed,
+    ).round(6)
+
+    per_fire = [[] for _ in fire_lat]
+    for index, (fire, camera, azimuth, bearing, distance, boxes) in enumerate(
+        zip(
+            views["fire"].tolist(),
+            camera_index.tolist(),
+            views["pose_azimuth"].tolist(),
+            views["bearing"].tolist(),
+            views["distance_km"].tolist(),
+            bboxes.tolist(),
+        )
+    ):
+        per_fire[fire].append(
+            View(
+                camera_id=int(cameras.ids[camera]),
+                camera_name=cameras.names[camera],
+                azimuth=azimuth,
+                bearing=round(bearing, 2),
+                distance_km=round(distance, 2),
+                bboxes=[[tuple(box)] for box in boxes],
+            )
+        )
+    return [
+        Scenario(lat, lon, views)
+        for lat, lon, views in zip(fire_lat.tolist(), fire_lon.tolist(), per_fire)
+        if len(views) >= min_cameras
+    ]
+
+
+def scenario_timeline(
+    scenarios, images, frame_interval=DEFAULT_FRAME_INTERVAL, scenario_interval=0.0
+):
+    """
+    Put the detections of scenarios on one replay timeline.
+
+    Events are keyed by (camera_id, pose azimuth): the frames of a camera pose
+    are sent in order, those of different scenarios interleaved.
+
+    Args:
+        scenarios (List[Scenario]): Scenarios, from generate_scenarios
+        images (List): Image files (or PackedImage) cycled through as frames
+        frame_interval (float): Seconds between the frames of a view
+        scenario_interval (float): Seconds between the starts of two
+            scenarios, 0 starts them all at once
+
+    Returns:
+        List[ReplayEvent]: Events sorted by offset
+    """
+    if not images:
+        raise ValueError("scenario_timeline needs at least one image")
+    events = []
+    for scenario_index, scenario in enumerate(scenarios):
+        start = scenario_index * scenario_interval
+        for view in scenario.views:
+            for frame_index, bboxes in enumerate(view.bboxes):
+                events.append(
+                    ReplayEvent(
+                        start + frame_index * frame_interval,
+                        (view.camera_id, view.azimuth),
+                        frame_index,
+                        images[frame_index % len(images)],
+                        bboxes,
+                    )
+                )
+    events.sort(key=lambda event: (event.offset, event.camera_id, event.frame_index))
+    return events
+
+
+def send_scenarios(
+    scenarios,
+    images,
+    API_URL,
+    Client,
+    admin_access_token,
+    speed=1.0,
+    report_path=None,
+    frame_interval=DEFAULT_FRAME_INTERVAL,
+    scenario_interval=0.0,
+):
+    """
+    Replay scenarios against the API.
+
+    Args:
+        scenarios (List[Scenario]): Scenarios, from generate_scenarios
+        images (List): Image files (or PackedImage) cycled through as frames
+        API_URL (str): API URL
+        Client: pyroclient Client class
+        admin_access_token (str): Admin token used to get camera tokens
+        speed (float): Time multiplier, 1 is real time, None is flat-out
+        report_path (str): Request timing report, JSON or CSV
+        frame_interval (float): Seconds between the frames of a view
+        scenario_interval (float): Seconds between the starts of two scenarios
+
+    Returns:
+        dict: Replay report
+    """
+    timeline = scenario_timeline(scenarios, images, frame_interval, scenario_interval)
+    with instrument(report_path, log=print):
+        make_client = camera_client_factory(API_URL, Client, admin_access_token)
+        clients, cam_triangulation = {}, {}
+        for event in timeline:
+            camera_id, azimuth = event.camera_id
+            if camera_id not in clients:
+                clients[camera_id] = make_client(camera_id)
+            cam_triangulation[event.camera_id] = {
+                "camera_id": camera_id,
+                "azimuth": azimuth,
+                "client": clients[camera_id],
+            }
+
+        print(
+            f"Replay {len(scenarios)} scenarios, {len(timeline)} detections from "
+            f"{len(clients)} cameras at speed {speed}"
+        )
+        report = replay(
+            timeline,
+            detection_sender(
+                cam_triangulation, API_URL, make_client, log=lambda _: None
+            ),
+            speed,
+        )
+        print(report)
+    return report
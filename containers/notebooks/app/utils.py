@@ -1,15 +1,19 @@
 import ast
-import os
 import io
 import glob
 import numpy as np
-import shutil
-import itertools
-import time
-from PIL import Image
-import requests
+import threading
 
-from api import get_camera_token
+from api import get_camera_token, invalidate_camera_token
+from archive import fetch_and_extract
+from image_cache import encode_image
+from instrumentation import instrument
+from replay import (
+    DEFAULT_FRAME_INTERVAL,
+    build_timeline,
+    interleaved_timeline,
+    replay,
+)
 
 
 def xywh2xyxy(x: np.ndarray):
@@ -45,11 +49,8 @@ def read_pred_file(filepath):
         confs = bboxes[:, 5]  # confidence
         xyxy_boxes = xywh2xyxy(coords)
 
-        bbox_list = [
-            (xmin, ymin, xmax, ymax, conf)
-            for (xmin, ymin, xmax, ymax), conf in zip(xyxy_boxes, confs)
-        ]
-        return bbox_list
+        # tolist converts all rows at once instead of one numpy scalar at a time
+        return list(map(tuple, np.column_stack((xyxy_boxes, confs)).tolist()))
 
     except OSError:
         print(f"File not found: {filepath}")
@@ -59,22 +60,108 @@ def read_pred_file(filepath):
         return []
 
 
-def dl_data():
-    print("Images not found, dowloading ...")
-    url = "https://github.com/pyronear/pyro-envdev/releases/download/v0.0.1/selection-true-positives.zip"
-    output_path = "selection-true-positives.zip"
+PRED_DTYPE = np.dtype(
+    [
+        ("frame", np.int32),
+        ("xmin", np.float64),
+        ("ymin", np.float64),
+        ("xmax", np.float64),
+        ("ymax", np.float64),
+        ("conf", np.float64),
+    ]
+)
+
+
+def _parse_pred_content(content):
+    """
+    Parse the content of a prediction file as an (N, 5) xyxy + conf array.
 
-    response = requests.get(url, stream=True)
-    response.raise_for_status()  # Raises an error for bad status codes
+    Two formats are found in the sequence folders: the API bboxes literal
+    written by the download notebook, "[(xmin, ymin, xmax, ymax, conf), ...]",
+    and YOLO rows "class x_center y_center width height conf".
+    """
+    content = content.strip()
+    if not content:
+        return np.empty((0, 5))
+    if content.startswith("["):
+        boxes = np.asarray(ast.literal_eval(content), dtype=np.float64)
+        return boxes.reshape(-1, 5)
+    rows = np.loadtxt(io.StringIO(content), ndmin=2)
+    return np.column_stack((xywh2xyxy(rows[:, 1:5]), rows[:, 5]))
+
+
+def load_sequence_predictions(seq_folder):
+    """
+    Read the whole labels_predictions/ directory of a sequence up front.
 
-    with open(output_path, "wb") as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            f.write(chunk)
+    Args:
+        seq_folder (str): Sequence folder containing labels_predictions/
 
-    zip_path = "selection-true-positives.zip"
+    Returns:
+        Tuple[List[str], np.ndarray]: sorted prediction files, and a structured
+        array (PRED_DTYPE) with one row per box, sorted by frame index
+
+    Raises:
+        ValueError: if a prediction file cannot be parsed, rather than
+            sending its frame without boxes
+    """
+    pred_files = sorted(glob.glob(f"{seq_folder}/labels_predictions/*"))
+    chunks = []
+    for frame, pred_file in enumerate(pred_files):
+        with open(pred_file, "r", encoding="utf-8") as file:
+            try:
+                boxes = _parse_pred_content(file.read())
+            except (ValueError, SyntaxError, IndexError) as e:
+                raise ValueError(f"Invalid content in file: {pred_file}") from e
+        chunk = np.empty(len(boxes), dtype=PRED_DTYPE)
+        chunk["frame"] = frame
+        for i, name in enumerate(PRED_DTYPE.names[1:]):
+            chunk[name] = boxes[:, i]
+        chunks.append(chunk)
+    preds = np.concatenate(chunks) if chunks else np.empty(0, dtype=PRED_DTYPE)
+    return pred_files, preds
+
+
+def split_predictions(preds, n_frames):
+    """
+    Split a structured prediction array into per-frame bbox lists.
+
+    Args:
+        preds (np.ndarray): Array returned by load_sequence_predictions
+        n_frames (int): Number of frames of the sequence
+
+    Returns:
+        List[List[Tuple[float, float, float, float, float]]]: bboxes ready for
+        create_detection, one list per frame
+    """
+    bounds = np.searchsorted(preds["frame"], np.arange(n_frames + 1))
+    boxes = np.column_stack([preds[name] for name in PRED_DTYPE.names[1:]])
+    rows = list(map(tuple, boxes.tolist()))
+    return [rows[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def image_payload(img_file):
+    """
+    JPEG bytes to upload for a frame.
+
+    Args:
+        img_file: Image path, or PackedImage from a replay pack whose
+            memoryview is sent as is
+
+    Returns:
+        bytes-like payload for create_detection
+    """
+    data = getattr(img_file, "data", None)
+    return data if data is not None else encode_image(img_file)
+
+
+def dl_data():
+    print("Images not found, dowloading ...")
+    url = "https://github.com/pyronear/pyro-envdev/releases/download/v0.0.1/selection-true-positives.zip"
     extract_dir = "selection-true-positives"  # Current directory
 
-    shutil.unpack_archive(zip_path, extract_dir, "zip")
+    # Extracted while downloading, resumed if interrupted
+    fetch_and_extract(url, extract_dir)
 
     print("Extraction completed.")
 
@@ -98,25 +185,65 @@ def generate_bbox_with_jitter(
     Returns:
         np.ndarray: Array with one bounding box in format (x0, x0, x1, x1, confidence)
     """
-    bbox_center = 0.5 + (detection_azimuth - cam_center_azimuth) / FOV
-    bbox_width = 3 / FOV
+    return generate_bboxes_with_jitter(
+        detection_azimuth,
+        cam_center_azimuth,
+        FOV,
+        n=1,
+        base_conf=base_conf,
+        jitter_ratio=jitter_ratio,
+        rng=np.random,
+    )
 
-    # Apply random jitter on width while keeping center fixed
-    jitter = (
-        bbox_width * jitter_ratio * (2 * np.random.rand() - 1)
-    )  # Random in [-jitter, +jitter]
-    adjusted_width = max(0, bbox_width + jitter)  # Ensure width stays positive
 
-    x0 = bbox_center - adjusted_width
-    x1 = bbox_center + adjusted_width
+def generate_bboxes_with_jitter(
+    detection_azimuths,
+    cam_center_azimuths,
+    FOVs,
+    n=1,
+    base_conf=0.8,
+    jitter_ratio=0.1,
+    rng=None,
+    seed=None,
+):
+    """
+    Batched version of generate_bbox_with_jitter.
 
-    # Clamp values to [0,1] to avoid invalid coordinates
-    x0 = max(0, min(1, x0))
-    x1 = max(0, min(1, x1))
+    Azimuths and fields of view are broadcast against each other, so a whole
+    set of cameras x azimuths is generated in a single NumPy call.
 
-    bbox = np.array([(x0, x0, x1, x1, base_conf)])
+    Args:
+        detection_azimuths (array-like): Azimuths of detections (degrees)
+        cam_center_azimuths (array-like): Camera center azimuths (degrees)
+        FOVs (array-like): Fields of view of the cameras (degrees)
+        n (int): Number of jittered boxes per azimuth
+        base_conf (float): Confidence score for the detections
+        jitter_ratio (float): Maximum percentage of bbox width to use as jitter
+        rng (np.random.Generator): Random generator, overrides seed
+        seed (int): Seed of the generator created when rng is not given
 
-    return bbox
+    Returns:
+        np.ndarray: Array of shape broadcast_shape + (n, 5), boxes in format
+        (x0, x0, x1, x1, confidence)
+    """
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    detection_azimuths, cam_center_azimuths, FOVs = np.broadcast_arrays(
+        np.asarray(detection_azimuths, dtype=np.float64),
+        np.asarray(cam_center_azimuths, dtype=np.float64),
+        np.asarray(FOVs, dtype=np.float64),
+    )
+    bbox_center = (0.5 + (detection_azimuths - cam_center_azimuths) / FOVs)[..., None]
+    bbox_width = (3 / FOVs)[..., None]
+
+    # Apply random jitter on width while keeping center fixed
+    jitter = bbox_width * jitter_ratio * rng.uniform(-1, 1, FOVs.shape + (n,))
+    adjusted_width = np.maximum(0, bbox_width + jitter)  # Ensure width stays positive
+
+    # Clamp values to [0,1] to avoid invalid coordinates
+    x0 = np.clip(bbox_center - adjusted_width, 0, 1)
+    x1 = np.clip(bbox_center + adjusted_width, 0, 1)
+
+    return np.stack([x0, x0, x1, x1, np.full_like(x0, base_conf)], axis=-1)
 
 
 def dl_seqs_from_url(url, output_path):
@@ -128,79 +255,282 @@ def dl_seqs_from_url(url, output_path):
 
     Returns:
     """
-    response = requests.get(url, stream=True)
-    response.raise_for_status()  # Raises an error for bad status codes
+    fetch_and_extract(url, output_path)
+    print("Extraction completed.")
 
-    zip_path = f"{output_path}.zip"
 
-    with open(zip_path, "wb") as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            f.write(chunk)
+class PoseIndex:
+    """
+    Poses of a camera, loaded once and looked up by azimuth.
 
-    shutil.unpack_archive(zip_path, output_path, "zip")
-    os.remove(zip_path)
-    print("Extraction completed.")
+    Poses are bucketed by whole degree so that a lookup only scans the buckets
+    covering [azimuth - tol, azimuth + tol]. The index is updated in place when
+    a pose gets created, and reloaded after the API answered 404/409 about one.
+
+    Args:
+        camera_client: pyroclient Client of the camera
+        camera_id (int): API ID of the camera
+        tol (float): Default azimuth tolerance of lookups, in degrees
+    """
+
+    BUCKET_WIDTH = 1.0
+    STALE_STATUSES = (404, 409)
+
+    def __init__(self, camera_client, camera_id, tol=0.1):
+        self.camera_client = camera_client
+        self.camera_id = camera_id
+        self.tol = tol
+        self._poses = None
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, azimuth):
+        return int((azimuth % 360) // self.BUCKET_WIDTH)
+
+    def _add(self, pose):
+        self._poses[pose["id"]] = pose
+        self._buckets.setdefault(self._bucket(pose["azimuth"]), []).append(pose)
+
+    def _ensure_loaded(self):
+        if self._poses is None:
+            resp = self.camera_client.get_current_poses()
+            resp.raise_for_status()
+            self._poses, self._buckets = {}, {}
+            for pose in resp.json():
+                self._add(pose)
+
+    def poses(self):
+        """Return the poses of the camera."""
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._poses.values())
+
+    def lookup(self, azimuth, tol=None):
+        """Return the ID of a pose within tol of azimuth, or None."""
+        tol = self.tol if tol is None else tol
+        n_buckets = int(360 // self.BUCKET_WIDTH)
+        first, last = self._bucket(azimuth - tol), self._bucket(azimuth + tol)
+        span = (last - first) % n_buckets
+        with self._lock:
+            self._ensure_loaded()
+            for offset in range(span + 1):
+                for pose in self._buckets.get((first + offset) % n_buckets, []):
+                    # Circular distance, so that 359.95 matches 0
+                    diff = abs(pose["azimuth"] - azimuth) % 360
+                    if min(diff, 360 - diff) <= tol:
+                        return pose["id"]
+        return None
+
+    def get_or_create(self, azimuth, patrol_id=None, tol=None):
+        """Return the ID of a pose within tol of azimuth, creating it if needed."""
+        pose_id = self.lookup(azimuth, tol)
+        if pose_id is not None:
+            return pose_id
+        print(
+            f"did not found a matching pose_id, gonna create one, azimuth was {azimuth}"
+        )
+        create_resp = self.camera_client.create_pose(
+            camera_id=self.camera_id, azimuth=azimuth, patrol_id=patrol_id
+        )
+        if create_resp.status_code in self.STALE_STATUSES:
+            # Created meanwhile by someone else: reload and look again
+            self.invalidate()
+            pose_id = self.lookup(azimuth, tol)
+            if pose_id is not None:
+                return pose_id
+        create_resp.raise_for_status()
+        pose = create_resp.json()
+        with self._lock:
+            if self._poses is not None:
+                self._add({"azimuth": azimuth, "patrol_id": patrol_id, **pose})
+        return pose["id"]
+
+    def invalidate(self):
+        """Drop the loaded poses, the next lookup fetches them again."""
+        with self._lock:
+            self._poses = None
+            self._buckets = {}
+
+    def check_response(self, response):
+        """
+        Invalidate the index if the API answered that a pose is stale.
+
+        Returns:
+            bool: True if the index was invalidated
+        """
+        if response.status_code in self.STALE_STATUSES:
+            self.invalidate()
+            return True
+        return False
+
+
+_pose_indexes = {}
+_pose_indexes_lock = threading.Lock()
+
+
+def get_pose_index(api_url, camera_client, camera_id):
+    """
+    Return the shared pose index of a camera, using the latest client.
+
+    Indexes are kept per API, camera IDs of two stacks are unrelated.
+    """
+    key = (api_url.rstrip("/"), camera_id)
+    with _pose_indexes_lock:
+        index = _pose_indexes.get(key)
+        if index is None:
+            index = _pose_indexes[key] = PoseIndex(camera_client, camera_id)
+        # The client may have been rebuilt with a fresh token
+        index.camera_client = camera_client
+        return index
 
 
 def get_or_create_pose_id_for_azimuth(
-    camera_client, camera_id, azimuth, tol=0.1, patrol_id=None
+    camera_client, camera_id, azimuth, tol=0.1, patrol_id=None, api_url=None
 ):
-    resp = camera_client.get_current_poses()
-    resp.raise_for_status()
-    for pose in resp.json():
-        if abs(pose["azimuth"] - azimuth) <= tol:
-            return pose["id"]
-    print(f"did not found a matching pose_id, gonna create one, azimuth was {azimuth}")
-    create_resp = camera_client.create_pose(
-        camera_id=camera_id, azimuth=azimuth, patrol_id=patrol_id
-    )
-    create_resp.raise_for_status()
-    return create_resp.json()["id"]
+    """
+    Return the ID of the camera pose within tol of azimuth, creating it if needed.
 
+    With api_url, the poses are looked up in the index shared for that API,
+    otherwise they are fetched for this call only.
+    """
+    if api_url is None:
+        index = PoseIndex(camera_client, camera_id)
+    else:
+        index = get_pose_index(api_url, camera_client, camera_id)
+    return index.get_or_create(azimuth, patrol_id=patrol_id, tol=tol)
 
-def send_triangulated_alerts(
-    cam_triangulation, API_URL, Client, admin_access_token, sleep_seconds=1
-):
-    for cam_id, info in cam_triangulation.items():
-        camera_token = get_camera_token(API_URL, cam_id, admin_access_token)
-        camera_client = Client(camera_token, API_URL)
-        info["client"] = camera_client
-
-        seq_folder = info["path"]
-
-        imgs = glob.glob(f"{seq_folder}/images/*")
-        imgs.sort()
-        preds = glob.glob(f"{seq_folder}/labels_predictions/*")
-        preds.sort()
-
-        print(f"Cam {cam_id}: {len(imgs)} images, {len(preds)} preds")  # debug
-
-        info["seq_data_pair"] = list(zip(imgs, preds))
-
-    print("Send some entrelaced detections")
-    for files in itertools.zip_longest(
-        *(info["seq_data_pair"] for info in cam_triangulation.values())
-    ):
-        for (cam_id, info), pair in zip(cam_triangulation.items(), files):
-            if pair is None:
-                continue  # len of sequences might be different
-            img_file, pred_file = pair
-            client = info["client"]
-            azimuth = info["azimuth"]
-            # print(f"cam if {cam_id}")
-            pose_id = get_or_create_pose_id_for_azimuth(client, cam_id, azimuth)
-            # print(f"pose_id:{pose_id}")
-            stream = io.BytesIO()
-            im = Image.open(img_file)
-            im.save(stream, format="JPEG", quality=80)
 
-            with open(pred_file, "r") as file:
-                bboxes = ast.literal_eval(file.read())
+def camera_client_factory(API_URL, Client, admin_access_token):
+    """
+    Build the camera clients of a replay.
+
+    Args:
+        API_URL (str): API URL
+        Client: pyroclient Client class
+        admin_access_token (str): Admin token used to get camera tokens
+
+    Returns:
+        Callable[[int], Client]: Client of a camera ID, with its cached token
+    """
+
+    def make_client(camera_id):
+        camera_token = get_camera_token(API_URL, camera_id, admin_access_token)
+        return Client(camera_token, API_URL)
+
+    return make_client
+
+
+def detection_sender(cam_triangulation, api_url, make_client=None, log=print):
+    """
+    Build the replay send callback of a set of cameras.
+
+    Args:
+        cam_triangulation (dict): {key: {"client": ..., "azimuth": ...}} where
+            key is the camera_id of the replayed events. An entry may carry
+            its "camera_id" when the key is not the camera ID itself.
+        api_url (str): API URL the clients send to
+        make_client (Callable[[int], Client]): Builds the client of a camera
+            whose token was rejected, e.g. from camera_client_factory
+        log (Callable[[str], None]): Receives a line per detection sent
+
+    Returns:
+        Callable[[ReplayEvent], None]: Sends the event detection, retrying once
+        with reloaded poses if the pose went stale, or with a new token if the
+        API rejected the cached one
+    """
 
+    def send(event):
+        info = cam_triangulation[event.camera_id]
+        camera_id = info.get("camera_id", event.camera_id)
+        for _ in range(2):
+            client = info["client"]
+            pose_index = get_pose_index(api_url, client, camera_id)
+            pose_id = pose_index.get_or_create(info["azimuth"])
             response = client.create_detection(
-                stream.getvalue(), bboxes, pose_id=pose_id
+                image_payload(event.img_file), event.bboxes, pose_id=pose_id
             )
-            time.sleep(sleep_seconds)
+            if response.status_code == 401:
+                # Token expired or signed by another stack: never reuse it
+                invalidate_camera_token(api_url, camera_id)
+                if make_client is None:
+                    break
+                new_client = make_client(camera_id)
+                for other in cam_triangulation.values():
+                    if other["client"] is client:
+                        other["client"] = new_client
+                continue
+            # Retry once with reloaded poses if this one went stale
+            if not pose_index.check_response(response):
+                break
+
+        response.raise_for_status()
+        log(f"detection sent for cam {event.camera_id} at +{event.offset:.0f}s")
+
+    return send
+
 
-            response.json()["id"]  # Force a KeyError if the request failed
-            print(f"detection sent for cam {cam_id}")
+def send_triangulated_alerts(
+    cam_triangulation,
+    API_URL,
+    Client,
+    admin_access_token,
+    sleep_seconds=1,
+    speed=1.0,
+    report_path=None,
+    frame_interval=DEFAULT_FRAME_INTERVAL,
+):
+    """
+    Replay sequences of several cameras, in turn or on their original timeline.
+
+    Args:
+        cam_triangulation (dict): {camera_id: {"azimuth": ..., "path": ...}},
+            or "frames" instead of "path", e.g. ReplayPack.frames(name)
+        API_URL (str): API URL
+        Client: pyroclient Client class
+        admin_access_token (str): Admin token used to get camera tokens
+        sleep_seconds (float): Seconds between two detections, the cameras
+            taking turns frame by frame; None replays the frames on the
+            timeline of their capture times
+        speed (float): Time multiplier, 1 is real time, None is flat-out
+        report_path (str): Request timing report, JSON or CSV
+        frame_interval (float): Seconds between frames whose name carries no
+            timestamp, when sleep_seconds is None
+
+    Returns:
+        dict: Replay report
+    """
+    # Requests are timed per endpoint, the table is printed at the end
+    with instrument(report_path, log=print):
+        make_client = camera_client_factory(API_URL, Client, admin_access_token)
+        sequences = {}
+        for cam_id, info in cam_triangulation.items():
+            info["client"] = make_client(info.get("camera_id", cam_id))
+
+            # Frames already loaded, e.g. from a replay pack
+            if "frames" in info:
+                sequences[cam_id] = info["frames"]
+                continue
+
+            seq_folder = info["path"]
+
+            imgs = glob.glob(f"{seq_folder}/images/*")
+            imgs.sort()
+            # Parsed once here rather than on every send
+            pred_files, preds = load_sequence_predictions(seq_folder)
+
+            bboxes_per_frame = split_predictions(preds, len(pred_files))
+            sequences[cam_id] = list(zip(imgs, bboxes_per_frame))
+
+        send = detection_sender(cam_triangulation, API_URL, make_client)
+
+        if sleep_seconds is None:
+            timeline = build_timeline(sequences, frame_interval=frame_interval)
+        else:
+            timeline = interleaved_timeline(sequences, sleep_seconds)
+        print(
+            f"Replay {len(timeline)} detections spanning "
+            f"{timeline[-1].offset if timeline else 0:.0f}s at speed {speed}"
+        )
+        report = replay(timeline, send, speed=speed)
+        print(report)
+    return report
@@ -0,0 +1,119 @@
+import json
+import os
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Same percentile definition as the request reports of the containers
+sys.path.insert(0, os.path.join(REPO_ROOT, "containers", "common"))
+
+from instrumentation import percentile  # noqa: E402
+
+
+def use_container(directory):
+    """
+    Make the modules of a container importable, e.g. "init_script".
+
+    The init script and the notebooks both have a utils module: the one of the
+    other container is dropped, modules importing it afterwards get this one.
+    """
+    sys.path.insert(0, os.path.join(REPO_ROOT, "containers", directory))
+    sys.modules.pop("utils", None)
+
+
+def create_mock_cameras(mock_api, count, azimuths=()):
+    """
+    Insert cameras in the state of the mock API, with a pose per azimuth.
+
+    Written directly rather than through the routes, so that the setup is not
+    slowed down nor failed by the injected latency and errors.
+
+    Args:
+        mock_api: MockAPI instance
+        count: Number of cameras
+        azimuths: Azimuths of the poses of every camera
+
+    Returns:
+        IDs of the created cameras
+    """
+    state = mock_api.state
+    camera_ids = []
+    with state.lock:
+        for index in range(count):
+            camera = state.insert(
+                "cameras",
+                {
+                    "organization_id": 1,
+                    "name": f"bench-camera-{index:05d}",
+                    "last_active_at": None,
+                    "last_image": None,
+                },
+            )
+            camera_ids.append(camera["id"])
+            for azimuth in azimuths:
+                state.insert(
+                    "poses",
+                    {
+                        "camera_id": camera["id"],
+                        "azimuth": azimuth,
+                        "patrol_id": None,
+                        "image": None,
+                    },
+                )
+    return camera_ids
+
+
+def percentiles(values, qs=(50, 95, 99)):
+    """Nearest-rank percentiles of a list of values, None if empty."""
+    ordered = sorted(values)
+    if not ordered:
+        return {f"p{q}": None for q in qs}
+    return {f"p{q}": percentile(ordered, q) for q in qs}
+
+
+def latency_summary(latencies_s):
+    """Summarize latencies given in seconds, reported in milliseconds."""
+    latencies_ms = [latency * 1000 for latency in latencies_s]
+    summary = {
+        k: round(v, 3) if v is not None else None
+        for k, v in percentiles(latencies_ms).items()
+    }
+    summary["count"] = len(latencies_ms)
+    summary["mean"] = round(statistics.fmean(latencies_ms), 3) if latencies_ms else None
+    summary["max"] = round(max(latencies_ms), 3) if latencies_ms else None
+    return summary
+
+
+def read_camera_tokens(data_dir, api_url):
+    """
+    Camera tokens written by the init script, as {camera_id: token}.
+
+    Read from the token cache (keyed on API URL, then camera ID) when it
+    exists, the credentials files only hold tokens keyed on camera name.
+    api_url is the URL the init script reached the API at, e.g. API_URL of .env.
+    """
+    path = os.path.join(data_dir, "camera_tokens.json")
+    if not os.path.isfile(path):
+        return {}
+    api_url = api_url.rstrip("/")
+    if api_url.endswith("/api/v1"):
+        api_url = api_url[: -len("/api/v1")]
+    with open(path, "r") as file:
+        return {
+            int(camera_id): entry["token"]
+            for camera_id, entry in json.load(file).get(api_url, {}).items()
+            if entry.get("token")
+        }
+
+
+class Timer:
+    """Context manager measuring wall-clock time."""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
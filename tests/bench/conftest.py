@@ -0,0 +1,134 @@
+"""
+Benchmarks of the running dev stack (make run), skipped unless RUN_BENCH=1.
+test_simulator.py and test_mock_*.py run against the in-process mock API
+(mock_api fixture) and need no stack.
+
+Every benchmark stores its numbers through the `bench_results` fixture; they
+are written as one JSON file per run (BENCH_OUTPUT, default
+bench_results/bench-<UTC timestamp>.json) so that runs can be diffed, e.g.
+between two pyro-api image tags. BENCH_LABEL tags the run.
+"""
+
+import datetime
+import json
+import os
+import subprocess
+
+import pytest
+import requests
+from dotenv import load_dotenv
+
+from bench_utils import REPO_ROOT
+from helpers import buckets_per_organization
+from mock_api import MockAPI
+
+# Load environment variables from .env file
+load_dotenv()
+
+API_URL = os.getenv("BENCH_API_URL", "http://localhost:5050")
+DATA_DIR = os.getenv("BENCH_DATA_DIR", os.path.join(REPO_ROOT, "data"))
+MOCK_LATENCY = float(os.getenv("BENCH_MOCK_LATENCY", 0.02))  # seconds
+MOCK_ERROR_RATE = float(os.getenv("BENCH_MOCK_ERROR_RATE", 0))
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_results = {}
+
+
+def _is_bench(item):
+    return os.path.abspath(str(item.fspath)).startswith(BENCH_DIR + os.sep)
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.getenv("RUN_BENCH", "").lower() in ("1", "true", "yes"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks are opt-in, set RUN_BENCH=1")
+    # The hook sees the items of the whole session, not only the benchmarks
+    for item in items:
+        if _is_bench(item):
+            item.add_marker(skip)
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results:
+        return
+    now = datetime.datetime.now(datetime.timezone.utc)
+    path = os.getenv(
+        "BENCH_OUTPUT",
+        os.path.join(
+            REPO_ROOT, "bench_results", f"bench-{now.strftime('%Y%m%dT%H%M%SZ')}.json"
+        ),
+    )
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(
+            {
+                "label": os.getenv("BENCH_LABEL"),
+                "timestamp": now.isoformat(),
+                "git_revision": _git_revision(),
+                "api_url": API_URL,
+                "results": _results,
+            },
+            file,
+            indent=4,
+            sort_keys=True,
+        )
+    print(f"\nBenchmark results written to {path}")
+
+
+@pytest.fixture(scope="session")
+def bench_results():
+    return _results
+
+
+@pytest.fixture(scope="session")
+def api_url():
+    return API_URL
+
+
+@pytest.fixture(scope="session")
+def data_dir():
+    return DATA_DIR
+
+
+@pytest.fixture(scope="session")
+def admin_token(api_url):
+    response = requests.post(
+        f"{api_url}/api/v1/login/creds",
+        data={
+            "username": os.getenv("SUPERADMIN_LOGIN"),
+            "password": os.getenv("SUPERADMIN_PWD"),
+        },
+        timeout=10,
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+@pytest.fixture(scope="session")
+def alert_buckets(s3_client):
+    # One bucket per organization: {SERVER_NAME}-alert-api-{org_id}
+    buckets = list(buckets_per_organization(s3_client).values())
+    if not buckets:
+        pytest.skip("no *-alert-api-* bucket")
+    return buckets
+
+
+@pytest.fixture
+def mock_api():
+    """In-process pyro-api, slowed down and failed as set by BENCH_MOCK_*."""
+    with MockAPI(latency=MOCK_LATENCY, error_rate=MOCK_ERROR_RATE, seed=0) as api:
+        yield api
@@ -0,0 +1,79 @@
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bench_utils import Timer, latency_summary, read_camera_tokens
+
+pyroclient = pytest.importorskip("pyroclient")
+
+INGEST_SECONDS = float(os.getenv("BENCH_INGEST_SECONDS", 30))
+INGEST_RATE = float(os.getenv("BENCH_INGEST_RATE", 5))  # detections per second
+INGEST_WORKERS = int(os.getenv("BENCH_INGEST_WORKERS", 8))
+BBOXES = [(0.4, 0.45, 0.5, 0.55, 0.9)]
+
+
+def count_detections(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM detections")
+        return cursor.fetchone()[0]
+
+
+def test_detection_ingest(bench_results, api_url, data_dir, db_connection):
+    # Cached under the URL the init container reached the API at
+    tokens = read_camera_tokens(data_dir, os.getenv("API_URL", api_url))
+    if not tokens:
+        pytest.skip("no camera token cached, run the init script first")
+    images = sorted(glob.glob(os.path.join(data_dir, "last_image_cameras", "*.jpg")))
+    if not images:
+        pytest.skip("no image in data/last_image_cameras")
+    payloads = []
+    for path in images[:10]:
+        with open(path, "rb") as file:
+            payloads.append(file.read())
+
+    senders = []
+    for token in tokens.values():
+        client = pyroclient.Client(token, api_url)
+        response = client.get_current_poses()
+        if response.status_code == 200 and response.json():
+            senders.append((client, response.json()[0]["id"]))
+    if not senders:
+        pytest.skip("no camera with a pose")
+
+    def send(index):
+        client, pose_id = senders[index % len(senders)]
+        start = time.perf_counter()
+        response = client.create_detection(
+            payloads[index % len(payloads)], BBOXES, pose_id=pose_id
+        )
+        return response.status_code, time.perf_counter() - start
+
+    n_detections = int(INGEST_SECONDS * INGEST_RATE)
+    rows_before = count_detections(db_connection)
+    with Timer() as timer, ThreadPoolExecutor(max_workers=INGEST_WORKERS) as pool:
+        futures = []
+        for index in range(n_detections):
+            # Fixed arrival rate, whatever the response times
+            delay = timer.start + index / INGEST_RATE - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(send, index))
+        results = [future.result() for future in futures]
+    rows_added = count_detections(db_connection) - rows_before
+
+    succeeded = [latency for status, latency in results if status // 100 == 2]
+    bench_results["ingest"] = {
+        "cameras": len(senders),
+        "target_rate": INGEST_RATE,
+        "sent": n_detections,
+        "succeeded": len(succeeded),
+        "achieved_rate": round(len(succeeded) / timer.elapsed, 3),
+        "latency_ms": latency_summary(succeeded),
+        "rows_added": rows_added,
+    }
+    # Other clients (e.g. the engine) may add rows, none may be missing
+    assert rows_added >= len(succeeded)
+    assert len(succeeded) == n_detections
@@ -0,0 +1,112 @@
+import datetime
+import os
+
+import pytest
+from PIL import Image
+
+from bench_utils import Timer, create_mock_cameras, use_container
+
+pyroclient = pytest.importorskip("pyroclient")
+
+use_container(os.path.join("notebooks", "app"))
+
+from loadgen import run_load  # noqa: E402
+from utils import send_triangulated_alerts  # noqa: E402
+
+REPLAY_CAMERAS = int(os.getenv("BENCH_REPLAY_CAMERAS", 4))
+REPLAY_FRAMES = int(os.getenv("BENCH_REPLAY_FRAMES", 20))
+LOAD_RATE = float(os.getenv("BENCH_LOAD_RATE", 50))
+LOAD_SECONDS = float(os.getenv("BENCH_LOAD_SECONDS", 5))
+
+
+def make_sequence(seq_folder, frames, start):
+    """Sequence folder as downloaded by the notebooks, one box per frame."""
+    (seq_folder / "images").mkdir(parents=True)
+    (seq_folder / "labels_predictions").mkdir()
+    for index in range(frames):
+        stamp = (start + datetime.timedelta(seconds=30 * index)).strftime(
+            "%Y-%m-%dT%H-%M-%S"
+        )
+        Image.new("RGB", (64, 48), (index % 256, 80, 120)).save(
+            seq_folder / "images" / f"{seq_folder.name}_{stamp}.jpg"
+        )
+        (
+            seq_folder / "labels_predictions" / f"{seq_folder.name}_{stamp}.txt"
+        ).write_text("[(0.1, 0.1, 0.3, 0.3, 0.9)]")
+    return str(seq_folder)
+
+
+@pytest.fixture
+def sequences(tmp_path, monkeypatch):
+    # Token and image caches defaulting to data/ stay in the test directory
+    monkeypatch.chdir(tmp_path)
+    start = datetime.datetime(2025, 6, 13, 14, 50, 34)
+    return [
+        make_sequence(
+            tmp_path / "sequences" / f"seq-{index:02d}",
+            REPLAY_FRAMES,
+            start + datetime.timedelta(seconds=7 * index),
+        )
+        for index in range(REPLAY_CAMERAS)
+    ]
+
+
+@pytest.fixture
+def mock_admin_token(mock_api):
+    # Issued directly, a login could get an injected error
+    return mock_api.issue_token(1, "admin", 1)
+
+
+def test_replay_timeline(bench_results, mock_api, sequences, mock_admin_token):
+    camera_ids = create_mock_cameras(mock_api, REPLAY_CAMERAS)
+    cam_triangulation = {
+        camera_id: {"azimuth": 90.0 * index, "path": seq_folder}
+        for index, (camera_id, seq_folder) in enumerate(zip(camera_ids, sequences))
+    }
+    with Timer() as timer:
+        report = send_triangulated_alerts(
+            cam_triangulation,
+            mock_api.url,
+            pyroclient.Client,
+            mock_admin_token,
+            sleep_seconds=None,
+            speed=None,
+        )
+
+    bench_results["mock_replay"] = {
+        "cameras": REPLAY_CAMERAS,
+        "frames_per_camera": REPLAY_FRAMES,
+        "mock_latency_s": mock_api.latency,
+        "mock_error_rate": mock_api.error_rate,
+        "duration_s": round(timer.elapsed, 3),
+        "detections_per_s": round(report["events"] / timer.elapsed, 1),
+        "camera_tokens_minted": mock_api.calls.get("camera_token", 0),
+        **report,
+    }
+    assert report["events"] == REPLAY_CAMERAS * REPLAY_FRAMES
+    if not mock_api.error_rate:
+        assert report["failures"] == 0
+        assert len(mock_api.state.detections) == report["events"]
+
+
+def test_load(bench_results, mock_api, sequences, mock_admin_token):
+    camera_ids = create_mock_cameras(mock_api, REPLAY_CAMERAS, azimuths=(0,))
+    report = run_load(
+        camera_ids,
+        mock_api.url,
+        mock_admin_token,
+        sequences_root=os.path.dirname(sequences[0]),
+        rate=LOAD_RATE,
+        duration=LOAD_SECONDS,
+        seed=0,
+    )
+
+    bench_results["mock_load"] = {
+        "mock_latency_s": mock_api.latency,
+        "mock_error_rate": mock_api.error_rate,
+        **report,
+    }
+    assert report["sent"] > 0
+    if not mock_api.error_rate:
+        assert report["errors"] == 0
+        assert len(mock_api.state.detections) == report["succeeded"]
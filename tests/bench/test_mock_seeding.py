@@ -0,0 +1,89 @@
+import json
+import os
+import shutil
+
+import pytest
+import requests
+from PIL import Image
+
+from bench_utils import REPO_ROOT, Timer, use_container
+
+pytest.importorskip("pyroclient")
+
+use_container("init_script")
+
+import init_script  # noqa: E402
+from http_client import APIError  # noqa: E402
+from seed_data import load_seed_data  # noqa: E402
+
+SEED_SUB_PATH = os.getenv("BENCH_SEED_SUB_PATH", "_DEV")
+SEED_WORKERS = int(os.getenv("BENCH_SEED_WORKERS", 8))
+# Runs resumed after an injected error, before giving up
+SEED_MAX_RUNS = int(os.getenv("BENCH_SEED_MAX_RUNS", 20))
+
+
+def make_data_dir(data_dir):
+    shutil.copytree(os.path.join(REPO_ROOT, "data", "csv"), data_dir / "csv")
+    # Stands in for the image bundle, which is then not downloaded
+    image_dir = data_dir / init_script.SAMPLE_PATH
+    image_dir.mkdir()
+    for index, name in enumerate(init_script.POSE_IMAGE_FILES):
+        Image.new("RGB", (64, 48), (40 * index, 80, 120)).save(image_dir / name)
+
+
+@pytest.mark.parametrize("workers", [1, SEED_WORKERS])
+def test_seeding_stages(bench_results, mock_api, tmp_path, monkeypatch, workers):
+    # Caches defaulting to data/ stay in the test directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SUPERADMIN_LOGIN", "admin")
+    monkeypatch.setenv("SUPERADMIN_PWD", "admin")
+    monkeypatch.setattr(init_script, "sub_path", SEED_SUB_PATH)
+    monkeypatch.setattr(init_script, "slack_hook", None)
+    data_dir = tmp_path / "data"
+    make_data_dir(data_dir)
+    argv = [
+        "--api-url",
+        mock_api.url,
+        "--data-dir",
+        str(data_dir),
+        "--mode",
+        "full",
+        "--workers",
+        str(workers),
+    ]
+
+    # An injected error aborts the run, the next one resumes from the journal
+    runs = 0
+    with Timer() as timer:
+        while True:
+            runs += 1
+            try:
+                init_script.main(argv + (["--resume"] if runs > 1 else []))
+                break
+            except (APIError, requests.RequestException, ValueError):
+                if not mock_api.error_rate or runs >= SEED_MAX_RUNS:
+                    raise
+
+    seed_data = load_seed_data(str(data_dir / "csv"), SEED_SUB_PATH)
+    assert len(mock_api.state.cameras) == len(seed_data.cameras)
+    assert len(mock_api.state.poses) == len(seed_data.poses)
+    with open(data_dir / "init_report.json", "r") as file:
+        endpoints = [
+            {
+                key: row[key]
+                for key in ("method", "endpoint", "calls", "p50_ms", "p95_ms")
+            }
+            for row in json.load(file)["endpoints"]
+        ]
+    bench_results[f"mock_seeding_{workers}_workers"] = {
+        "sub_path": SEED_SUB_PATH,
+        "workers": workers,
+        "mock_latency_s": mock_api.latency,
+        "mock_error_rate": mock_api.error_rate,
+        "runs": runs,
+        "duration_s": round(timer.elapsed, 3),
+        "requests": sum(mock_api.calls.values()),
+        "injected_errors": mock_api.errors,
+        # Endpoints of the last run only
+        "endpoints": endpoints,
+    }
@@ -0,0 +1,101 @@
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from bench_utils import Timer, latency_summary
+
+S3_OBJECTS = int(os.getenv("BENCH_S3_OBJECTS", 50))
+S3_OBJECT_SIZE = int(os.getenv("BENCH_S3_OBJECT_SIZE", 1024 * 1024))
+S3_WORKERS = int(os.getenv("BENCH_S3_WORKERS", 8))
+PRESIGNED_FETCHES = int(os.getenv("BENCH_PRESIGNED_FETCHES", 50))
+
+
+def timed(func, **kwargs):
+    start = time.perf_counter()
+    result = func(**kwargs)
+    return result, time.perf_counter() - start
+
+
+def test_s3_put_get_throughput(bench_results, s3_client, alert_buckets):
+    payload = os.urandom(S3_OBJECT_SIZE)
+    megabytes = S3_OBJECTS * S3_OBJECT_SIZE / 1e6
+    results = {}
+    for bucket in alert_buckets:
+        keys = [f"bench/{uuid.uuid4().hex}/{i:05d}.bin" for i in range(S3_OBJECTS)]
+        try:
+            with Timer() as put_timer, ThreadPoolExecutor(S3_WORKERS) as pool:
+                puts = list(
+                    pool.map(
+                        lambda key: timed(
+                            s3_client.put_object, Bucket=bucket, Key=key, Body=payload
+                        ),
+                        keys,
+                    )
+                )
+            with Timer() as get_timer, ThreadPoolExecutor(S3_WORKERS) as pool:
+                gets = list(
+                    pool.map(
+                        lambda key: timed(
+                            lambda: s3_client.get_object(Bucket=bucket, Key=key)[
+                                "Body"
+                            ].read()
+                        ),
+                        keys,
+                    )
+                )
+        finally:
+            for start in range(0, len(keys), 1000):
+                s3_client.delete_objects(
+                    Bucket=bucket,
+                    Delete={
+                        "Objects": [{"Key": key} for key in keys[start : start + 1000]]
+                    },
+                )
+        assert all(len(body) == S3_OBJECT_SIZE for body, _ in gets)
+        results[bucket] = {
+            "put_mb_s": round(megabytes / put_timer.elapsed, 3),
+            "get_mb_s": round(megabytes / get_timer.elapsed, 3),
+            "put_latency_ms": latency_summary([latency for _, latency in puts]),
+            "get_latency_ms": latency_summary([latency for _, latency in gets]),
+        }
+    bench_results["s3"] = {
+        "objects": S3_OBJECTS,
+        "object_size": S3_OBJECT_SIZE,
+        "workers": S3_WORKERS,
+        "buckets": results,
+    }
+
+
+def test_presigned_url_fetch_latency(bench_results, s3_client, alert_buckets):
+    targets = []
+    for bucket in alert_buckets:
+        listing = s3_client.list_objects_v2(Bucket=bucket, MaxKeys=PRESIGNED_FETCHES)
+        targets += [
+            (bucket, item["Key"])
+            for item in listing.get("Contents", [])
+            if not item["Key"].startswith("bench/")
+        ]
+    if not targets:
+        pytest.skip("no object in the alert buckets, send some detections first")
+    targets = targets[:PRESIGNED_FETCHES]
+
+    session = requests.Session()
+    latencies, sizes = [], []
+    for bucket, key in targets:
+        url = s3_client.generate_presigned_url(
+            "get_object", Params={"Bucket": bucket, "Key": key}, ExpiresIn=300
+        )
+        start = time.perf_counter()
+        response = session.get(url, timeout=30)
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text[:200]
+        sizes.append(len(response.content))
+    bench_results["presigned_fetch"] = {
+        "fetches": len(targets),
+        "mean_bytes": round(sum(sizes) / len(sizes)),
+        "latency_ms": latency_summary(latencies),
+    }
@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from bench_utils import REPO_ROOT, Timer
+
+# Full seeding POSTs every CSV row, so it runs against an empty stack of its
+# own: a separate compose project, with its own volumes, next to the dev stack
+PROJECT = os.getenv("BENCH_SEED_PROJECT", "pyro-bench-seed")
+COMPOSE = [
+    "docker",
+    "compose",
+    "-p",
+    PROJECT,
+    "-f",
+    os.path.join(REPO_ROOT, "docker-compose.yml"),
+    "-f",
+    os.path.join(REPO_ROOT, "tests", "bench", "docker-compose.seed.yml"),
+]
+SEED_ARGS = ["run", "--rm", "--no-deps", "-e", "INIT_MODE=full", "init_script"]
+
+
+@pytest.fixture(scope="module")
+def empty_stack(tmp_path_factory):
+    """Data directory of the init script of a fresh db/api/minio stack."""
+    data_dir = tmp_path_factory.mktemp("seed_data")
+    shutil.copytree(os.path.join(REPO_ROOT, "data", "csv"), data_dir / "csv")
+    # Saves the download of the image bundle when it is already there
+    images = os.path.join(REPO_ROOT, "data", "last_image_cameras")
+    if os.path.isdir(images):
+        shutil.copytree(images, data_dir / "last_image_cameras")
+    env = {**os.environ, "BENCH_SEED_DATA_DIR": str(data_dir)}
+    # Leftovers of an interrupted benchmark would not be empty
+    subprocess.run([*COMPOSE, "down", "-v"], cwd=REPO_ROOT, env=env, check=True)
+    try:
+        subprocess.run(
+            [*COMPOSE, "up", "-d", "--wait", "pyro_api"],
+            cwd=REPO_ROOT,
+            env=env,
+            check=True,
+        )
+        yield data_dir, env
+    finally:
+        subprocess.run([*COMPOSE, "down", "-v"], cwd=REPO_ROOT, env=env, check=False)
+
+
+def test_seeding_duration(bench_results, empty_stack):
+    data_dir, env = empty_stack
+    with Timer() as timer:
+        result = subprocess.run(
+            [*COMPOSE, *SEED_ARGS],
+            cwd=REPO_ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-2000:]
+
+    # Per-endpoint timings written by the init script itself
+    with open(data_dir / "init_report.json", "r") as file:
+        endpoints = [
+            {
+                key: row[key]
+                for key in (
+                    "method",
+                    "endpoint",
+                    "calls",
+                    "p50_ms",
+                    "p95_ms",
+                    "total_ms",
+                )
+            }
+            for row in json.load(file)["endpoints"]
+        ]
+    bench_results["seeding"] = {
+        "project": PROJECT,
+        "duration_s": round(timer.elapsed, 3),
+        "endpoints": endpoints,
+    }
@@ -0,0 +1,56 @@
+import logging
+import os
+import threading
+
+from bench_utils import Timer, create_mock_cameras, use_container
+
+# The simulator runs in the init image, next to the shared modules
+use_container("init_script")
+
+from heartbeat_simulator import Simulator  # noqa: E402
+
+SIM_CAMERAS = int(os.getenv("BENCH_SIM_CAMERAS", 500))
+SIM_SECONDS = float(os.getenv("BENCH_SIM_SECONDS", 10))
+SIM_HEARTBEAT_INTERVAL = float(os.getenv("BENCH_SIM_HEARTBEAT_INTERVAL", 1))
+SIM_WORKERS = int(os.getenv("BENCH_SIM_WORKERS", 16))
+
+
+def test_heartbeat_simulator(bench_results, mock_api, tmp_path, monkeypatch):
+    # The token cache defaulting to data/ stays in the test directory
+    monkeypatch.chdir(tmp_path)
+    create_mock_cameras(mock_api, SIM_CAMERAS)
+    simulator = Simulator(
+        mock_api.api_url,
+        "admin",
+        "admin",
+        heartbeat_interval=SIM_HEARTBEAT_INTERVAL,
+        image_interval=0,
+        workers=SIM_WORKERS,
+        late_after=SIM_HEARTBEAT_INTERVAL,
+        seed=0,
+    )
+    logging.getLogger().setLevel(logging.WARNING)
+    thread = threading.Thread(target=simulator.run, daemon=True)
+    with Timer() as timer:
+        thread.start()
+        thread.join(SIM_SECONDS)
+        simulator.stop()
+        thread.join()
+
+    counts = simulator.counters.snapshot()["heartbeat"]
+    expected = SIM_CAMERAS * timer.elapsed / SIM_HEARTBEAT_INTERVAL
+    bench_results["heartbeat_simulator"] = {
+        "cameras": SIM_CAMERAS,
+        "seconds": round(timer.elapsed, 3),
+        "heartbeat_interval_s": SIM_HEARTBEAT_INTERVAL,
+        "workers": SIM_WORKERS,
+        "mock_latency_s": mock_api.latency,
+        **counts,
+        "heartbeats_per_s": round(counts["sent"] / timer.elapsed, 1),
+        # Share of the scheduled heartbeats that went through
+        "delivered_ratio": round(counts["sent"] / expected, 3),
+        "camera_tokens_minted": mock_api.calls.get("camera_token", 0),
+    }
+    assert counts["sent"] > 0
+    if not mock_api.error_rate:
+        assert counts["failed"] == 0
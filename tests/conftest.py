@@ -0,0 +1,82 @@
+import fcntl
+import os
+import shlex
+import subprocess
+
+import boto3
+import pytest
+from botocore.config import Config
+from dotenv import load_dotenv
+from psycopg2.pool import ThreadedConnectionPool
+
+# Load environment variables from .env file
+load_dotenv()
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Run once per test session (across xdist workers) if the database is empty
+SEED_CMD = os.getenv("TEST_SEED_CMD", "docker compose run --rm init_script")
+DB_POOL_SIZE = int(os.getenv("TEST_DB_POOL_SIZE", 4))
+S3_POOL_SIZE = int(os.getenv("TEST_S3_POOL_SIZE", 16))
+
+
+@pytest.fixture(scope="session")
+def db_pool():
+    # One pool per xdist worker, each test borrows a connection from it
+    pool = ThreadedConnectionPool(
+        1,
+        DB_POOL_SIZE,
+        dbname=os.getenv("POSTGRES_DB"),
+        user=os.getenv("POSTGRES_USER"),
+        password=os.getenv("POSTGRES_PASSWORD"),
+        host="localhost",
+        port="5432",
+    )
+    yield pool
+    pool.closeall()
+
+
+def _camera_count(pool):
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM cameras")
+            return cursor.fetchone()[0]
+    finally:
+        conn.rollback()
+        pool.putconn(conn)
+
+
+@pytest.fixture(scope="session")
+def seeded_stack(db_pool, tmp_path_factory, request):
+    """Seed the stack once if it is empty, whichever xdist worker gets there first."""
+    # Shared by all the workers of a run (tmp_path_factory is per worker)
+    root = tmp_path_factory.getbasetemp()
+    if hasattr(request.config, "workerinput"):
+        root = root.parent
+    with open(root / "seed.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if _camera_count(db_pool) == 0:
+            subprocess.run(shlex.split(SEED_CMD), cwd=REPO_ROOT, check=True)
+        fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+@pytest.fixture
+def db_connection(db_pool, seeded_stack):
+    # Read-only: tests running in parallel cannot change each other's data
+    conn = db_pool.getconn()
+    conn.set_session(readonly=True, autocommit=True)
+    yield conn
+    db_pool.putconn(conn, close=bool(conn.closed))
+
+
+@pytest.fixture(scope="session")
+def s3_client(seeded_stack):
+    # Tests run on the host: prefer the public endpoint, `minio` is compose-only.
+    return boto3.client(
+        "s3",
+        endpoint_url=(os.getenv("S3_PROXY_URL") or os.getenv("S3_ENDPOINT_URL")) + "/",
+        aws_access_key_id=os.getenv("S3_ACCESS_KEY"),
+        aws_secret_access_key=os.getenv("S3_SECRET_KEY"),
+        region_name=os.getenv("S3_REGION"),
+        config=Config(max_pool_connections=S3_POOL_SIZE),
+    )
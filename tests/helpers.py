@@ -0,0 +1,72 @@
+"""
+Bulk verification helpers: one query or one parallel listing per check,
+rather than one round trip per camera, table or object.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from psycopg2 import sql
+
+
+def table_counts(conn, tables):
+    """Row count of several tables, in a single query."""
+    query = sql.SQL("SELECT {}").format(
+        sql.SQL(", ").join(
+            sql.SQL("(SELECT count(*) FROM {})").format(sql.Identifier(table))
+            for table in tables
+        )
+    )
+    with conn.cursor() as cursor:
+        cursor.execute(query)
+        return dict(zip(tables, cursor.fetchone()))
+
+
+def counts_per_camera(conn):
+    """Detections and sequences of each camera, {camera_id: (detections, sequences)}."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.id, COALESCE(d.count, 0), COALESCE(s.count, 0)
+            FROM cameras c
+            LEFT JOIN (
+                SELECT camera_id, count(*) FROM detections GROUP BY camera_id
+            ) d ON d.camera_id = c.id
+            LEFT JOIN (
+                SELECT camera_id, count(*) FROM sequences GROUP BY camera_id
+            ) s ON s.camera_id = c.id
+            """
+        )
+        return {
+            camera_id: (detections, sequences)
+            for camera_id, detections, sequences in cursor
+        }
+
+
+def buckets_per_organization(s3_client):
+    """Alert buckets ({SERVER_NAME}-alert-api-{org_id}), as {org_id: name}."""
+    buckets = {}
+    for bucket in s3_client.list_buckets()["Buckets"]:
+        prefix, _, org_id = bucket["Name"].rpartition("-alert-api-")
+        if prefix and org_id.isdigit():
+            buckets[int(org_id)] = bucket["Name"]
+    return buckets
+
+
+def _list_bucket(s3_client, bucket, prefix):
+    objects, size = 0, 0
+    # Pages of 1000 keys, list_objects_v2 alone stops at the first one
+    for page in s3_client.get_paginator("list_objects_v2").paginate(
+        Bucket=bucket, Prefix=prefix
+    ):
+        for item in page.get("Contents", []):
+            objects += 1
+            size += item["Size"]
+    return bucket, {"objects": objects, "bytes": size}
+
+
+def bucket_inventory(s3_client, buckets, prefix="", max_workers=8):
+    """Object count and total size of several buckets, listed in parallel."""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return dict(
+            pool.map(lambda bucket: _list_bucket(s3_client, bucket, prefix), buckets)
+        )
@@ -0,0 +1,584 @@
+# Copyright (C) 2020-2026, Pyronear.
+
+# This program is licensed under the Apache License 2.0.
+# See LICENSE or go to <https://www.apache.org/licenses/LICENSE-2.0>
+# for full license details.
+
+"""
+In-process stand-in for pyro-api, to benchmark the seeding and replay clients
+without Docker.
+
+Serves, under /api/v1, the routes used by init_script.py and the notebooks:
+login, organizations, users, cameras (creation, listing, location patch,
+token, heartbeat, last image), poses (creation, listing, patch, image) and
+detections. State lives in memory; tokens are JWT-like (HS256, with an exp
+claim) so that the token cache sees realistic expiries. Every request can be
+slowed down and failed on purpose. Handlers hold the state lock for every
+read and write, and answer with copies of the rows.
+
+In-process, e.g. for the heartbeat simulator (see tests/bench/test_simulator.py):
+    with MockAPI(latency=0.02, error_rate=0.01, seed=0) as api:
+        Simulator(api.api_url, "admin", "admin").run()
+
+Or standalone, e.g. for the notebooks:
+    python tests/mock_api.py --port 5050 --latency 0.02 \
+        --route-latency detections=0.2 --error-rate 0.05 --error-routes detections
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import random
+import re
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+__all__ = ["MockAPI"]
+
+API_PREFIX = "/api/v1"
+NON_CREATING = ("login", "camera_token")  # POST routes answering 200
+SECRET = b"mock-api-secret"
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class _HTTPError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+class _State:
+    """In-memory tables, with serial IDs like the real database."""
+
+    def __init__(self, admin_login, admin_password):
+        self.lock = threading.Lock()
+        self.organizations = {1: {"id": 1, "name": "admin"}}
+        self.users = {
+            1: {
+                "id": 1,
+                "organization_id": 1,
+                "login": admin_login,
+                "password": admin_password,
+                "role": "admin",
+            }
+        }
+        self.cameras = {}
+        self.poses = {}
+        self.detections = {}
+
+    def insert(self, table, row):
+        rows = getattr(self, table)
+        row = {**row, "id": max(rows, default=0) + 1}
+        rows[row["id"]] = row
+        return row
+
+
+class MockAPI:
+    """
+    Threaded HTTP mock of pyro-api.
+
+    Args:
+        host: Interface to listen on
+        port: Port to listen on, 0 picks a free one
+        latency: Base latency added to every request, in seconds
+        jitter: Uniform random latency added on top, in seconds
+        route_latency: Latency overrides keyed on route name (e.g. "detections")
+        error_rate: Probability of answering error_status instead of serving
+        error_status: Status code of injected errors
+        error_routes: Route names errors are injected on, all if None
+        token_ttl: Lifetime of issued tokens, in seconds
+        admin_login: Superadmin login
+        admin_password: Superadmin password
+        seed: Seed of the latency and error random generator
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        latency=0.0,
+        jitter=0.0,
+        route_latency=None,
+        error_rate=0.0,
+        error_status=503,
+        error_routes=None,
+        token_ttl=3600,
+        admin_login="admin",
+        admin_password="admin",
+        seed=None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.route_latency = route_latency or {}
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.error_routes = set(error_routes) if error_routes else None
+        self.token_ttl = token_ttl
+        self.state = _State(admin_login, admin_password)
+        self.calls = {}
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """Base URL, as given to pyroclient (without /api/v1)."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self):
+        """API URL, as used by the init script (with /api/v1)."""
+        return self.url + API_PREFIX
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve in the calling thread, until stop() is called from another one."""
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # Tokens
+
+    def issue_token(self, sub, scope, organization_id):
+        header = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+        payload = _b64(
+            json.dumps(
+                {
+                    "sub": sub,
+                    "scopes": [scope],
+                    "organization_id": organization_id,
+                    "exp": int(time.time() + self.token_ttl),
+                }
+            ).encode()
+        )
+        signature = hmac.new(SECRET, f"{header}.{payload}".encode(), hashlib.sha256)
+        return f"{header}.{payload}.{_b64(signature.digest())}"
+
+    def _claims(self, headers):
+        authorization = headers.get("Authorization", "")
+        if not authorization.startswith("Bearer "):
+            raise _HTTPError(401, "Not authenticated")
+        try:
+            header, payload, signature = authorization[7:].split(".")
+            expected = hmac.new(
+                SECRET, f"{header}.{payload}".encode(), hashlib.sha256
+            ).digest()
+            claims = json.loads(_b64decode(payload))
+        except ValueError:
+            raise _HTTPError(401, "Invalid token")
+        if not hmac.compare_digest(expected, _b64decode(signature)):
+            raise _HTTPError(401, "Invalid token")
+        if claims["exp"] < time.time():
+            raise _HTTPError(401, "Token expired")
+        return claims
+
+    # Fault injection
+
+    def _delay_and_fail(self, name):
+        with self._rng_lock:
+            delay = self.route_latency.get(name, self.latency)
+            delay += self._rng.uniform(0, self.jitter) if self.jitter else 0.0
+            fail = self._rng.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        if fail and (self.error_routes is None or name in self.error_routes):
+            with self.state.lock:
+                self.errors += 1
+            raise _HTTPError(self.error_status, "Injected error")
+
+    # Routes: (method, path regex, name, handler)
+
+    def _routes(self):
+        return [
+            ("POST", r"/login/creds", "login", self._login),
+            ("GET", r"/status", "status", lambda req: {"status": "ok"}),
+            ("GET", r"/organizations", "organizations", self._list("organizations")),
+            ("POST", r"/organizations", "organizations", self._create_organization),
+            (
+                "PATCH",
+                r"/organizations/slack-hook/(\d+)",
+                "organizations",
+                self._patch_organization,
+            ),
+            ("GET", r"/users", "users", self._list("users")),
+            ("POST", r"/users", "users", self._create_user),
+            ("GET", r"/cameras", "cameras", self._list_cameras),
+            ("POST", r"/cameras", "cameras", self._create_camera),
+            ("PATCH", r"/cameras/heartbeat", "heartbeat", self._heartbeat),
+            ("PATCH", r"/cameras/image", "last_image", self._last_image),
+            ("GET", r"/cameras/(\d+)", "cameras", self._get_camera),
+            ("PATCH", r"/cameras/(\d+)/location", "cameras", self._patch_camera),
+            ("POST", r"/cameras/(\d+)/token", "camera_token", self._camera_token),
+            ("GET", r"/poses", "poses", self._list_poses),
+            ("POST", r"/poses", "poses", self._create_pose),
+            ("PATCH", r"/poses/(\d+)", "poses", self._patch_pose),
+            ("PATCH", r"/poses/(\d+)/image", "pose_image", self._pose_image),
+            ("POST", r"/detections", "detections", self._create_detection),
+        ]
+
+    def _handler_class(self):
+        api = self
+        routes = [
+            (method, re.compile(f"^{API_PREFIX}{pattern}/?$"), name, handler)
+            for method, pattern, name, handler in self._routes()
+        ]
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _dispatch(self, method):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                path = urlsplit(self.path).path
+                # Paths without the prefix (e.g. /status) are served as well
+                if not path.startswith(API_PREFIX):
+                    path = API_PREFIX + path
+                status, payload = 404, {"detail": "Not Found"}
+                for route_method, pattern, name, handler in routes:
+                    match = pattern.match(path)
+                    if match and route_method == method:
+                        with api.state.lock:
+                            api.calls[name] = api.calls.get(name, 0) + 1
+                        request = _Request(self, body, match.groups())
+                        try:
+                            api._delay_and_fail(name)
+                            payload = handler(request)
+                            # Only creations answer 201, like pyro-api
+                            created = method == "POST" and name not in NON_CREATING
+                            status = 201 if created else 200
+                        except _HTTPError as e:
+                            status, payload = e.status, {"detail": e.detail}
+                        break
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def do_PATCH(self):
+                self._dispatch("PATCH")
+
+        return Handler
+
+    # Handlers
+
+    def _admin(self, request):
+        claims = self._claims(request.headers)
+        if "admin" not in claims["scopes"]:
+            raise _HTTPError(403, "Incompatible token scope")
+        return claims
+
+    def _camera(self, request):
+        """Camera of a camera token, to be called with the state lock held."""
+        claims = self._claims(request.headers)
+        if "camera" not in claims["scopes"]:
+            raise _HTTPError(403, "Incompatible token scope")
+        camera = self.state.cameras.get(claims["sub"])
+        if camera is None:
+            raise _HTTPError(404, "Table Camera has no corresponding entry.")
+        return camera
+
+    def _login(self, request):
+        form = request.form()
+        with self.state.lock:
+            for user in self.state.users.values():
+                if (user["login"], user["password"]) == (
+                    form.get("username"),
+                    form.get("password"),
+                ):
+                    scope = "admin" if user["role"] == "admin" else user["role"]
+                    token = self.issue_token(user["id"], scope, user["organization_id"])
+                    return {"access_token": token, "token_type": "bearer"}
+        raise _HTTPError(401, "Invalid credentials.")
+
+    def _list(self, table):
+        def handler(request):
+            self._admin(request)
+            with self.state.lock:
+                rows = getattr(self.state, table).values()
+                return [
+                    {k: v for k, v in row.items() if k != "password"} for row in rows
+                ]
+
+        return handler
+
+    def _create_organization(self, request):
+        self._admin(request)
+        payload = request.json()
+        with self.state.lock:
+            if any(
+                o["name"] == payload["name"] for o in self.state.organizations.values()
+            ):
+                raise _HTTPError(409, "Organization already exists")
+            return self.state.insert("organizations", {"name": payload["name"]})
+
+    def _patch_organization(self, request):
+        self._admin(request)
+        payload = request.json()
+        with self.state.lock:
+            orga = self.state.organizations.get(int(request.args[0]))
+            if orga is None:
+                raise _HTTPError(404, "Table Organization has no corresponding entry.")
+            orga.update(payload)
+            return dict(orga)
+
+    def _create_user(self, request):
+        self._admin(request)
+        payload = request.json()
+        with self.state.lock:
+            if any(u["login"] == payload["login"] for u in self.state.users.values()):
+                raise _HTTPError(409, "Login already taken")
+            user = self.state.insert("users", payload)
+        return {k: v for k, v in user.items() if k != "password"}
+
+    def _camera_view(self, camera):
+        poses = [
+            dict(p) for p in self.state.poses.values() if p["camera_id"] == camera["id"]
+        ]
+        return {**camera, "poses": poses}
+
+    def _list_cameras(self, request):
+        claims = self._claims(request.headers)
+        with self.state.lock:
+            return [
+                self._camera_view(camera)
+                for camera in self.state.cameras.values()
+                if "admin" in claims["scopes"]
+                or camera["organization_id"] == claims["organization_id"]
+            ]
+
+    def _get_camera(self, request):
+        self._admin(request)
+        with self.state.lock:
+            camera = self.state.cameras.get(int(request.args[0]))
+            if camera is None:
+                raise _HTTPError(404, "Table Camera has no corresponding entry.")
+            return self._camera_view(camera)
+
+    def _create_camera(self, request):
+        self._admin(request)
+        payload = request.json()
+        with self.state.lock:
+            if payload.get("organization_id") not in self.state.organizations:
+                raise _HTTPError(404, "Table Organization has no corresponding entry.")
+            if any(c["name"] == payload["name"] for c in self.state.cameras.values()):
+                raise _HTTPError(409, "Camera already exists")
+            return self.state.insert(
+                "cameras", {**payload, "last_active_at": None, "last_image": None}
+            )
+
+    def _patch_camera(self, request):
+        self._admin(request)
+        with self.state.lock:
+            camera = self.state.cameras.get(int(request.args[0]))
+            if camera is None:
+                raise _HTTPError(404, "Table Camera has no corresponding entry.")
+            camera.update(request.json())
+            return dict(camera)
+
+    def _camera_token(self, request):
+        self._admin(request)
+        with self.state.lock:
+            camera = self.state.cameras.get(int(request.args[0]))
+            if camera is None:
+                raise _HTTPError(404, "Table Camera has no corresponding entry.")
+            organization_id = camera["organization_id"]
+        token = self.issue_token(camera["id"], "camera", organization_id)
+        return {"access_token": token, "token_type": "bearer"}
+
+    def _heartbeat(self, request):
+        with self.state.lock:
+            camera = self._camera(request)
+            camera["last_active_at"] = time.time()
+            return dict(camera)
+
+    def _last_image(self, request):
+        bucket_key = f"{hashlib.sha1(request.body).hexdigest()}.jpg"
+        with self.state.lock:
+            camera = self._camera(request)
+            camera["last_image"] = bucket_key
+            return dict(camera)
+
+    def _list_poses(self, request):
+        claims = self._claims(request.headers)
+        with self.state.lock:
+            return [
+                dict(pose)
+                for pose in self.state.poses.values()
+                if "admin" in claims["scopes"] or pose["camera_id"] == claims["sub"]
+            ]
+
+    def _create_pose(self, request):
+        claims = self._claims(request.headers)
+        payload = request.json()
+        if "camera" in claims["scopes"] and payload["camera_id"] != claims["sub"]:
+            raise _HTTPError(403, "Access forbidden.")
+        with self.state.lock:
+            if payload["camera_id"] not in self.state.cameras:
+                raise _HTTPError(404, "Table Camera has no corresponding entry.")
+            return self.state.insert("poses", {**payload, "image": None})
+
+    def _patch_pose(self, request):
+        self._admin(request)
+        with self.state.lock:
+            pose = self.state.poses.get(int(request.args[0]))
+            if pose is None:
+                raise _HTTPError(404, "Table Pose has no corresponding entry.")
+            pose.update(request.json())
+            return dict(pose)
+
+    def _pose_image(self, request):
+        self._admin(request)
+        bucket_key = f"{hashlib.sha1(request.body).hexdigest()}.jpg"
+        with self.state.lock:
+            pose = self.state.poses.get(int(request.args[0]))
+            if pose is None:
+                raise _HTTPError(404, "Table Pose has no corresponding entry.")
+            pose["image"] = bucket_key
+            return dict(pose)
+
+    def _create_detection(self, request):
+        form = request.form()
+        bucket_key = f"{hashlib.sha1(request.body).hexdigest()}.jpg"
+        with self.state.lock:
+            camera = self._camera(request)
+            pose = self.state.poses.get(int(form.get("pose_id") or 0))
+            if pose is None or pose["camera_id"] != camera["id"]:
+                raise _HTTPError(404, "Table Pose has no corresponding entry.")
+            return self.state.insert(
+                "detections",
+                {
+                    "camera_id": camera["id"],
+                    "pose_id": pose["id"],
+                    "bboxes": form.get("bboxes"),
+                    "bucket_key": bucket_key,
+                    "created_at": time.time(),
+                },
+            )
+
+
+class _Request:
+    """Parsed view of an incoming request."""
+
+    def __init__(self, handler, body, args):
+        self.headers = handler.headers
+        self.body = body
+        self.args = args
+
+    def json(self):
+        return json.loads(self.body or b"{}")
+
+    def form(self):
+        """Text fields of an urlencoded or multipart body (files are skipped)."""
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            message = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode() + self.body
+            )
+            return {
+                part.get_param("name", header="content-disposition"): part.get_content()
+                for part in message.iter_parts()
+                if not part.get_filename()
+            }
+        return {k: v[0] for k, v in parse_qs(self.body.decode()).items()}
+
+
+def _route_latency(value):
+    name, _, seconds = value.partition("=")
+    try:
+        return name, float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected ROUTE=SECONDS, got {value!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process pyro-api mock")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5050)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument(
+        "--route-latency",
+        type=_route_latency,
+        action="append",
+        default=[],
+        metavar="ROUTE=SECONDS",
+        help="latency override of a route, e.g. detections=0.2 (repeatable)",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument(
+        "--error-routes",
+        nargs="+",
+        default=None,
+        metavar="ROUTE",
+        help="routes errors are injected on, all by default",
+    )
+    parser.add_argument("--token-ttl", type=int, default=3600, help="seconds")
+    parser.add_argument("--admin-login", default="admin")
+    parser.add_argument("--admin-password", default="admin")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    api = MockAPI(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        route_latency=dict(args.route_latency),
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        error_routes=args.error_routes,
+        token_ttl=args.token_ttl,
+        admin_login=args.admin_login,
+        admin_password=args.admin_password,
+        seed=args.seed,
+    )
+    print(f"Mock API listening on {api.url}")
+    try:
+        api.serve_forever()
+    except KeyboardInterrupt:
+        api.stop()
+
+
+if __name__ == "__main__":
+    main()
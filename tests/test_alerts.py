@@ -1,30 +1,6 @@
-import os
-import psycopg2
 import pytest
 
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-
-@pytest.fixture
-def db_connection():
-    # Load environment variables
-    db_user = os.getenv("POSTGRES_USER")
-    db_password = os.getenv("POSTGRES_PASSWORD")
-    db_name = os.getenv("POSTGRES_DB")
-
-    # Connect to the PostgreSQL database
-    conn = psycopg2.connect(
-        dbname=db_name,
-        user=db_user,
-        password=db_password,
-        host="localhost",
-        port="5432",
-    )
-    yield conn
-    conn.close()
+from helpers import counts_per_camera, table_counts
 
 
 def test_detections_count(db_connection):
@@ -44,5 +20,15 @@ def test_detections_count(db_connection):
     # assert result > 0, "Number of alerts is " + str(result)
 
 
+def test_counts_per_camera(db_connection):
+    counts = counts_per_camera(db_connection)
+    assert counts, "no camera seeded"
+
+    # Every detection and sequence belongs to a known camera
+    totals = table_counts(db_connection, ["detections", "sequences"])
+    assert sum(detections for detections, _ in counts.values()) == totals["detections"]
+    assert sum(sequences for _, sequences in counts.values()) == totals["sequences"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -1,29 +1,6 @@
-import boto3
-import os
-from dotenv import load_dotenv
 import pytest
 
-# Load environment variables from .env file
-load_dotenv()
-
-# Tests run on the host: prefer the public endpoint, `minio` is compose-only.
-s3_endpoint_url = (os.getenv("S3_PROXY_URL") or os.getenv("S3_ENDPOINT_URL")) + "/"
-s3_access_key = os.getenv("S3_ACCESS_KEY")
-s3_secret_key = os.getenv("S3_SECRET_KEY")
-s3_region = os.getenv("S3_REGION")
-
-
-@pytest.fixture
-def s3_client():
-    # Create a Boto3 client for the S3 service
-    s3_client = boto3.client(
-        "s3",
-        endpoint_url=s3_endpoint_url,
-        aws_access_key_id=s3_access_key,
-        aws_secret_access_key=s3_secret_key,
-        region_name=s3_region,
-    )
-    return s3_client
+from helpers import bucket_inventory, buckets_per_organization
 
 
 def test_s3_bucket(s3_client):
@@ -40,5 +17,17 @@ def test_s3_bucket(s3_client):
     # assert keys != []
 
 
+def test_bucket_per_organization(s3_client, db_connection):
+    with db_connection.cursor() as cursor:
+        cursor.execute("SELECT id FROM organizations")
+        org_ids = {org_id for (org_id,) in cursor}
+    buckets = buckets_per_organization(s3_client)
+    assert org_ids <= buckets.keys(), f"missing buckets for {org_ids - buckets.keys()}"
+
+    inventory = bucket_inventory(s3_client, list(buckets.values()))
+    print(inventory)
+    assert inventory.keys() == set(buckets.values())
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,13 @@
+"""
+Unit tests of the container modules: they need neither the stack nor network
+access, e.g. `pytest tests/unit`.
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Modules shared by the containers, and the notebook helpers
+for directory in ("common", os.path.join("notebooks", "app")):
+    sys.path.insert(0, os.path.join(REPO_ROOT, "containers", directory))
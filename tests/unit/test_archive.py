@@ -0,0 +1,169 @@
+import hashlib
+import io
+import os
+import re
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from archive import ArchiveError, fetch_and_extract
+
+FILES = {
+    # Larger than a few download chunks (archive.CHUNK_SIZE)
+    "images/a.jpg": os.urandom(3_000_000),
+    "images/b.jpg": b"b" * 100_000,
+    "README.txt": b"sample bundle\n",
+}
+
+
+class _Unseekable(io.RawIOBase):
+    """Write-only stream: zipfile then writes data descriptors."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        return len(data)
+
+
+def make_zip(compression=zipfile.ZIP_DEFLATED, descriptors=False):
+    stream = _Unseekable() if descriptors else io.BytesIO()
+    with zipfile.ZipFile(stream, "w", compression=compression) as archive:
+        for name, data in FILES.items():
+            archive.writestr(name, data)
+    return bytes(stream.buffer) if descriptors else stream.getvalue()
+
+
+class ZipServer:
+    """
+    Local HTTP server of zip files, with Range support.
+
+    The first response of a file listed in cut_after stops after that many
+    bytes, as an interrupted download does.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.cut_after = {}
+        self.ranges = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                data = server.files.get(self.path.lstrip("/"))
+                if data is None:
+                    self.send_error(404)
+                    return
+                match = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range", ""))
+                start = int(match.group(1)) if match else 0
+                server.ranges.append(start)
+                if start >= len(data):
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{len(data)}")
+                    self.end_headers()
+                    return
+                self.send_response(206 if match else 200)
+                if match:
+                    self.send_header(
+                        "Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}"
+                    )
+                self.send_header("Content-Length", str(len(data) - start))
+                self.end_headers()
+                cut = server.cut_after.pop(self.path.lstrip("/"), None)
+                self.wfile.write(data[start:cut])
+                if cut is not None:
+                    self.close_connection = True
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def add(self, name, data):
+        self.files[name] = data
+        return f"{self.url}/{name}"
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def zip_server():
+    server = ZipServer()
+    yield server
+    server.close()
+
+
+def assert_extracted(extract_dir):
+    for name, data in FILES.items():
+        with open(os.path.join(extract_dir, name), "rb") as file:
+            assert file.read() == data, name
+    # No staging directory nor spool left behind
+    assert sorted(os.listdir(extract_dir)) == ["README.txt", "images"]
+
+
+def test_plain_zip(zip_server, tmp_path):
+    data = make_zip()
+    url = zip_server.add("bundle.zip", data)
+    sha256 = hashlib.sha256(data).hexdigest()
+
+    assert fetch_and_extract(url, str(tmp_path), sha256=sha256) == sha256
+    assert_extracted(tmp_path)
+    assert zip_server.ranges == [0]
+
+
+@pytest.mark.parametrize(
+    "compression",
+    # Stored entries with a descriptor can only be extracted once spooled
+    [zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED],
+)
+def test_zip_with_data_descriptors(zip_server, tmp_path, compression):
+    data = make_zip(compression, descriptors=True)
+    # General purpose flag 0x8: sizes and CRC follow the entry data
+    assert int.from_bytes(data[6:8], "little") & 0x8
+    url = zip_server.add("bundle.zip", data)
+
+    fetch_and_extract(url, str(tmp_path), sha256=hashlib.sha256(data).hexdigest())
+    assert_extracted(tmp_path)
+
+
+def test_interrupted_download_resumes(zip_server, tmp_path):
+    data = make_zip()
+    url = zip_server.add("bundle.zip", data)
+    zip_server.cut_after["bundle.zip"] = 2_500_000
+    sha256 = hashlib.sha256(data).hexdigest()
+
+    with pytest.raises(requests.RequestException):
+        fetch_and_extract(url, str(tmp_path), sha256=sha256)
+    # The chunks received before the interruption are kept
+    spooled = (tmp_path / ".bundle.zip.part").stat().st_size
+    assert 0 < spooled <= 2_500_000
+    assert not (tmp_path / "images").exists()
+
+    assert fetch_and_extract(url, str(tmp_path), sha256=sha256) == sha256
+    assert_extracted(tmp_path)
+    # Only the missing bytes were downloaded again
+    assert zip_server.ranges == [0, spooled]
+
+
+def test_bad_checksum(zip_server, tmp_path):
+    url = zip_server.add("bundle.zip", make_zip())
+    (tmp_path / "images").mkdir()
+    (tmp_path / "images" / "old.jpg").write_bytes(b"old")
+
+    with pytest.raises(ArchiveError, match="sha256"):
+        fetch_and_extract(url, str(tmp_path), sha256="0" * 64)
+    # The existing content is left untouched and the spool is dropped
+    assert sorted(os.listdir(tmp_path)) == ["images"]
+    assert os.listdir(tmp_path / "images") == ["old.jpg"]
@@ -0,0 +1,167 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from replay import ReplayEvent, build_timeline, parse_frame_timestamp, replay
+
+# Kept aside, tests patch the sleep of the replay loop
+_sleep = time.sleep
+
+
+def frames(*names):
+    return [(f"seq/images/{name}", [(0.1, 0.1, 0.2, 0.2, 0.9)]) for name in names]
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("brison-03_2025-06-13T14-50-34.jpg", datetime(2025, 6, 13, 14, 50, 34)),
+        ("11-20251001151013-d6de7b82.jpg", datetime(2025, 10, 1, 15, 10, 13)),
+        # The last timestamp of the name is the capture time
+        (
+            "2025-06-13T14-50-34_2025-06-13T14-51-04.jpg",
+            datetime(2025, 6, 13, 14, 51, 4),
+        ),
+        ("frame-0001.jpg", None),
+    ],
+)
+def test_parse_frame_timestamp(name, expected):
+    assert parse_frame_timestamp(f"seq/images/{name}") == expected
+
+
+def test_timeline_keeps_time_between_cameras():
+    timeline = build_timeline(
+        {
+            1: frames("cam1_2025-06-13T14-50-34.jpg", "cam1_2025-06-13T14-51-04.jpg"),
+            # Other name format, 10 s after the first camera
+            2: frames("2-20250613145044-x.jpg", "2-20250613145114-x.jpg"),
+        }
+    )
+    assert [(e.offset, e.camera_id, e.frame_index) for e in timeline] == [
+        (0.0, 1, 0),
+        (10.0, 2, 0),
+        (30.0, 1, 1),
+        (40.0, 2, 1),
+    ]
+
+
+def test_timeline_align_starts():
+    sequences = {
+        1: frames("cam1_2025-06-13T14-50-34.jpg", "cam1_2025-06-13T14-51-04.jpg"),
+        2: frames("cam2_2025-06-14T09-00-00.jpg", "cam2_2025-06-14T09-00-20.jpg"),
+    }
+    timeline = build_timeline(sequences, align_starts=True)
+    assert [(e.offset, e.camera_id) for e in timeline] == [
+        (0.0, 1),
+        (0.0, 2),
+        (20.0, 2),
+        (30.0, 1),
+    ]
+    # Without alignment the second camera starts a day later
+    assert build_timeline(sequences)[-1].offset == 18 * 3600 + 9 * 60 + 46
+
+
+def test_timeline_frames_without_timestamp():
+    timeline = build_timeline(
+        {
+            1: frames("a.jpg", "cam1_2025-06-13T14-50-34.jpg", "b.jpg"),
+            # No timestamp at all: a regular pace from the start
+            2: frames("c.jpg", "d.jpg"),
+        },
+        frame_interval=5,
+    )
+    offsets = {(e.camera_id, e.frame_index): e.offset for e in timeline}
+    # Placed frame_interval before and after the timestamped frame
+    assert [offsets[1, index] for index in range(3)] == [0.0, 5.0, 10.0]
+    assert [offsets[2, index] for index in range(2)] == [0.0, 5.0]
+
+
+def test_timeline_keeps_frame_order_per_camera():
+    timeline = build_timeline(
+        {
+            1: frames(*(f"cam1_2025-06-13T14-5{i}-00.jpg" for i in range(5))),
+            2: frames(*(f"cam2_2025-06-13T14-5{i}-30.jpg" for i in range(5))),
+        }
+    )
+    for camera_id in (1, 2):
+        indexes = [e.frame_index for e in timeline if e.camera_id == camera_id]
+        assert indexes == list(range(5))
+    assert [e.offset for e in timeline] == sorted(e.offset for e in timeline)
+
+
+class FakeSend:
+    """Records the sent events, failing the frames listed in fail."""
+
+    def __init__(self, fail=(), delay=0.0):
+        self.sent = []
+        self.fail = set(fail)
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            self.sent.append((event.camera_id, event.frame_index))
+        _sleep(self.delay)
+        if (event.camera_id, event.frame_index) in self.fail:
+            raise RuntimeError("rejected")
+
+
+def test_replay_sends_each_camera_in_order():
+    timeline = build_timeline(
+        {
+            1: frames(*(f"cam1_2025-06-13T14-5{i}-00.jpg" for i in range(5))),
+            2: frames(*(f"cam2_2025-06-13T14-5{i}-30.jpg" for i in range(5))),
+        }
+    )
+    send = FakeSend(fail={(2, 3)}, delay=0.01)
+    # Reversed: the heap restores the time order
+    report = replay(list(reversed(timeline)), send, speed=None, log=lambda _: None)
+
+    assert report["events"] == 10
+    assert report["failures"] == 1
+    assert report["cameras"] == 2
+    for camera_id in (1, 2):
+        sent = [index for cam, index in send.sent if cam == camera_id]
+        assert sent == list(range(5))
+
+
+def test_replay_paces_events():
+    timeline = build_timeline(
+        {1: frames("cam1_2025-06-13T14-50-00.jpg", "cam1_2025-06-13T14-50-10.jpg")}
+    )
+    start = time.monotonic()
+    report = replay(timeline, FakeSend(), speed=50)
+    # 10 s of timeline at speed 50
+    assert time.monotonic() - start >= 0.2
+    assert report["timeline_s"] == 10.0
+
+
+def test_replay_rejects_bad_speed():
+    with pytest.raises(ValueError):
+        replay([], FakeSend(), speed=0)
+
+
+def test_replay_interrupt_drops_pending_events(monkeypatch):
+    # Three frames due at once, queued behind a slow send, then one a minute later
+    timeline = [
+        ReplayEvent(offset, 1, index, f"frame-{index}.jpg", [])
+        for index, offset in enumerate((0, 0, 0, 60))
+    ]
+    send = FakeSend(delay=0.2)
+
+    class Interrupt(BaseException):
+        pass
+
+    def interrupted_sleep(seconds):
+        # The notebook stop button, while waiting for the last event
+        while not send.sent:
+            _sleep(0.001)
+        raise Interrupt
+
+    monkeypatch.setattr("replay.time.sleep", interrupted_sleep)
+    with pytest.raises(Interrupt):
+        replay(timeline, send, speed=1)
+    # The send in progress completes, the queued ones are cancelled
+    assert send.sent == [(1, 0)]
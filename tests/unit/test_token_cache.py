@@ -0,0 +1,162 @@
+import base64
+import json
+import threading
+import time
+
+import pytest
+
+import token_cache
+from token_cache import CameraTokenCache
+
+API_URL = "http://api.test:5050/api/v1"
+
+
+def make_jwt(exp=None, sub=1):
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+    claims = {"sub": sub} if exp is None else {"sub": sub, "exp": exp}
+    return f"{encode({'alg': 'HS256'})}.{encode(claims)}.signature"
+
+
+class CountingMint:
+    """Mints a new token on every call, expiring after ttl seconds (None: no exp)."""
+
+    def __init__(self, ttl=3600, delay=0.0):
+        self.ttl = ttl
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, camera_id):
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls.append(camera_id)
+            count = len(self.calls)
+        exp = None if self.ttl is None else int(time.time() + self.ttl)
+        # The count keeps tokens distinct even with the same expiry
+        return make_jwt(exp, sub=count)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    return tmp_path / "data"
+
+
+def make_cache(data_dir, mint, **kwargs):
+    return CameraTokenCache(
+        mint=mint,
+        api_url=API_URL,
+        credentials_paths=(),
+        cache_path=str(data_dir / "camera_tokens.json"),
+        **kwargs,
+    )
+
+
+def test_token_reused_until_refresh_margin(data_dir):
+    mint = CountingMint(ttl=1000)
+    cache = make_cache(data_dir, mint, refresh_margin=300)
+    token = cache.get(1)
+    assert cache.get(1) == token
+    assert mint.calls == [1]
+
+    # Expires within the refresh margin: minted again
+    mint.ttl = 200
+    cache = make_cache(data_dir, mint, refresh_margin=300)
+    first = cache.get(2)
+    assert cache.get(2) != first
+    assert mint.calls == [1, 2, 2]
+
+
+def test_expired_token_from_disk_is_replaced(data_dir):
+    mint = CountingMint(ttl=-10)
+    make_cache(data_dir, mint).get(1)
+    mint.ttl = 3600
+    token = make_cache(data_dir, mint).get(1)
+    assert mint.calls == [1, 1]
+    assert token_cache.jwt_expiry(token) > time.time()
+
+
+def test_token_shared_through_the_cache_file(data_dir):
+    mint = CountingMint()
+    token = make_cache(data_dir, mint).get(1, "cam-1")
+    # Another process, or a later run
+    other = make_cache(data_dir, CountingMint())
+    assert other.get(1) == token
+    # Keyed on API URL: another stack does not get it
+    distant = CameraTokenCache(
+        mint=mint,
+        api_url="http://distant:5050",
+        credentials_paths=(),
+        cache_path=str(data_dir / "camera_tokens.json"),
+    )
+    assert distant.get(1) != token
+
+
+def test_no_expiry_ttl(data_dir):
+    mint = CountingMint(ttl=None)
+    cache = make_cache(data_dir, mint, no_expiry_ttl=0.2)
+    token = cache.get(1)
+    assert token_cache.jwt_expiry(token) is None
+    assert cache.get(1) == token
+
+    time.sleep(0.3)
+    assert cache.get(1) != token
+    assert mint.calls == [1, 1]
+
+
+def test_rejected_token_never_handed_out_again(data_dir):
+    mint = CountingMint()
+    cache = make_cache(data_dir, mint)
+    token = cache.get(1)
+    cache.invalidate(1)
+    assert not cache.is_fresh(token)
+
+    new_token = cache.get(1)
+    assert new_token != token
+    assert mint.calls == [1, 1]
+    # Not even if another process stores it again
+    cache.put_many([(1, None, token)])
+    assert cache.get(1) != token
+
+
+def test_single_mint_per_camera_under_concurrent_misses(data_dir):
+    mint = CountingMint(delay=0.05)
+    cache = make_cache(data_dir, mint)
+    barrier = threading.Barrier(16)
+    tokens = []
+
+    def get(camera_id):
+        barrier.wait()
+        tokens.append((camera_id, cache.get(camera_id)))
+
+    threads = [threading.Thread(target=get, args=(i % 2,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(mint.calls) == [0, 1]
+    assert len({token for camera_id, token in tokens if camera_id == 0}) == 1
+    assert len({token for camera_id, token in tokens if camera_id == 1}) == 1
+
+
+def test_credentials_files_only_for_the_stack_api(data_dir, monkeypatch):
+    data_dir.mkdir()
+    credentials = data_dir / "credentials.json"
+    credentials.write_text(json.dumps({"cam-1": {"name": "cam-1", "token": ""}}))
+    monkeypatch.setattr(token_cache, "STACK_API_URLS", "http://pyro_api:5050")
+    monkeypatch.setattr(token_cache, "DEFAULT_CREDENTIALS_PATHS", (str(credentials),))
+
+    def cache_of(api_url):
+        return CameraTokenCache(
+            mint=CountingMint(),
+            api_url=api_url,
+            cache_path=str(data_dir / "camera_tokens.json"),
+        )
+
+    cache_of("http://distant:5050").get(1, "cam-1")
+    assert json.loads(credentials.read_text())["cam-1"]["token"] == ""
+
+    token = cache_of("http://pyro_api:5050/api/v1").get(1, "cam-1")
+    assert json.loads(credentials.read_text())["cam-1"]["token"] == token